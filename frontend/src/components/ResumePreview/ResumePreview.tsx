@@ -70,7 +70,7 @@ const ResumePreview: React.FC<ResumePreviewProps> = ({ selectedCandidate }) => {
                 // <PDFViewer selectedCandidate={selectedCandidate} />
                 <embed
                   title="Resume PDF Preview"
-                  src={`https://shqiw-talentmatch-backend.hf.space/static/pdf/${selectedCandidate.resume_name}`}
+                  src={`https://shqiw-talentmatch-backend.hf.space/api/resumes/${selectedCandidate.resume_name}`}
                   width="100%"
                   height="600px"
                   style={{ border: 'none' }}
@@ -1,15 +1,166 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from talentmatch.config import Config
-from talentmatch.utils import create_upload_folder
+from talentmatch.utils import create_upload_folder, resume_store
 from talentmatch.services.candidate_service import CandidateService
 from talentmatch.services.recommendation_service import RecommendationService
+from talentmatch.services.model_service import ModelService
+from talentmatch.services.resume_service import ResumeService
+from talentmatch.services.diagnostics_service import DiagnosticsService
 from talentmatch.routes.health_routes import create_health_routes
 from talentmatch.routes.candidate_routes import create_candidate_routes
 from talentmatch.routes.recommendation_routes import create_recommendation_routes
+from talentmatch.routes.model_routes import create_model_routes
+from talentmatch.routes.resume_routes import create_resume_routes
+from talentmatch.routes.diagnostics_routes import create_diagnostics_routes
 from talentmatch import EMBEDDING_MODEL, STATIC_DIR
-from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+from talentmatch.etc.modelregistry import EmbeddingModelRegistry
 from talentmatch.etc.recommendengine import RecommendationEngine
+from talentmatch.etc.fieldextractor import FieldExtractor
+from talentmatch.etc.reranker import CrossEncoderReranker
+from talentmatch.etc.promptbuilder import SummaryPromptBuilder
+from talentmatch.etc.shardindex import ShardedIndex
+from talentmatch.etc.sectionexplainer import SectionExplainer
+from talentmatch.etc.matchcache import MatchResultCache
+from talentmatch.etc.memoryprofiler import MemoryProfiler
+from talentmatch.etc.llmclient import (CircuitBreaker, LLMClient, LLMResponseCache,
+                                        RateLimiter)
+
+
+def create_services(app_config):
+    """Initialize processors and services shared by the WSGI and ASGI apps"""
+    # Create upload folder
+    create_upload_folder(app_config['UPLOAD_FOLDER'])
+
+    # Initialize processors
+    # Other models are loaded next to it by embedding migrations
+    model_registry = EmbeddingModelRegistry()
+    embedding_processor = model_registry.load(EMBEDDING_MODEL)
+    # One client so identical in-flight LLM calls are shared across requests
+    llm_client = LLMClient(
+        cache=LLMResponseCache(
+            app_config['LLM_CACHE_PATH'],
+            ttl_seconds=app_config['LLM_CACHE_TTL_SECONDS'],
+            max_bytes=app_config['LLM_CACHE_MAX_BYTES'],
+        ) if app_config['LLM_CACHE_ENABLED'] else None,
+        rate_limiter=RateLimiter(
+            requests_per_minute=app_config['LLM_REQUESTS_PER_MINUTE'],
+            tokens_per_minute=app_config['LLM_TOKENS_PER_MINUTE'],
+        ),
+        circuit_breaker=CircuitBreaker(
+            failure_rate=app_config['LLM_BREAKER_FAILURE_RATE'],
+            min_requests=app_config['LLM_BREAKER_MIN_REQUESTS'],
+            window_size=app_config['LLM_BREAKER_WINDOW'],
+            cooldown_seconds=app_config['LLM_BREAKER_COOLDOWN_SECONDS'],
+        ),
+        request_timeout=app_config['LLM_REQUEST_TIMEOUT'],
+        max_retries=app_config['LLM_MAX_RETRIES'],
+        hedge_after_seconds=app_config['LLM_HEDGE_AFTER_SECONDS'],
+    )
+    # The cross-encoder is only loaded by the first re-ranked request
+    reranker = CrossEncoderReranker(
+        app_config['RERANK_MODEL'],
+        shortlist_size=app_config['RERANK_SHORTLIST'],
+        latency_budget_ms=app_config['RERANK_LATENCY_BUDGET_MS'],
+    )
+    prompt_builder = SummaryPromptBuilder(
+        embedding_processor,
+        job_token_budget=app_config['SUMMARY_JOB_TOKEN_BUDGET'],
+        resume_token_budget=app_config['SUMMARY_RESUME_TOKEN_BUDGET'],
+        max_output_tokens=app_config['SUMMARY_MAX_OUTPUT_TOKENS'],
+        batch_size=app_config['SUMMARY_BATCH_SIZE'],
+        batch_token_budget=app_config['SUMMARY_BATCH_TOKEN_BUDGET'],
+    )
+    # Shared so each resume is analysed once across ingest and matching
+    field_extractor = FieldExtractor(
+        use_llm=app_config['LLM_FIELD_EXTRACTION'],
+        llm_client=llm_client,
+    )
+    # Shared so resume sections embedded at ingest serve match explanations
+    section_explainer = SectionExplainer(
+        max_cache_entries=app_config['EXPLANATION_CACHE_SIZE'],
+        snippets=app_config['EXPLANATION_SNIPPETS'],
+    ) if app_config['EXPLANATIONS_ENABLED'] else None
+    match_cache = MatchResultCache(
+        max_entries=app_config['MATCH_CACHE_MAX_ENTRIES'],
+        max_bytes=app_config['MATCH_CACHE_MAX_BYTES'],
+        ttl_seconds=app_config['MATCH_CACHE_TTL_SECONDS'],
+    ) if app_config['MATCH_CACHE_ENABLED'] else None
+    recommendation_engine = RecommendationEngine(
+        embedding_processor,
+        reranker=reranker,
+        prompt_builder=prompt_builder,
+        llm_client=llm_client,
+        field_extractor=field_extractor,
+    )
+
+    # Initialize services
+    candidate_service = CandidateService(
+        model_registry,
+        near_duplicate_threshold=app_config['NEAR_DUPLICATE_THRESHOLD'],
+        field_extractor=field_extractor,
+        reduction=app_config['EMBEDDING_REDUCTION'],
+        reduced_dimensions=app_config['EMBEDDING_REDUCED_DIMENSIONS'],
+        reduction_min_candidates=app_config[
+            'EMBEDDING_REDUCTION_MIN_CANDIDATES'],
+        shard_index=ShardedIndex(
+            app_config['SHARD_COUNT'],
+            timeout=app_config['SHARD_TIMEOUT_SECONDS'],
+        ) if app_config['SHARD_COUNT'] > 0 else None,
+        section_explainer=section_explainer,
+    )
+    recommendation_service = RecommendationService(
+        recommendation_engine,
+        candidate_storage=candidate_service.storage,
+        field_extractor=field_extractor,
+        model_registry=model_registry,
+        pipeline_batch_size=app_config['MATCH_BATCH_SIZE'],
+        pipeline_queue_size=app_config['MATCH_QUEUE_SIZE'],
+        section_explainer=section_explainer,
+        match_cache=match_cache,
+    )
+    model_service = ModelService(
+        model_registry,
+        candidate_service.storage,
+        batch_size=app_config['EMBEDDING_MIGRATION_BATCH_SIZE'],
+        on_activate=candidate_service.refresh_projection,
+    )
+    resume_service = ResumeService(
+        resume_store,
+        candidate_service.storage,
+        retention_seconds=app_config['RESUME_RETENTION_SECONDS'],
+        gc_interval_seconds=app_config['RESUME_GC_INTERVAL_SECONDS'],
+    )
+    resume_service.start()
+
+    diagnostics_service = None
+    if app_config['MEMORY_DIAGNOSTICS_ENABLED']:
+        # Started last, allocation diffs then start from a loaded server
+        memory_profiler = MemoryProfiler(
+            trace_frames=app_config['MEMORY_TRACE_FRAMES'],
+            top_n=app_config['MEMORY_TOP_N'],
+        )
+        memory_profiler.start()
+        storage = candidate_service.storage
+        components = {
+            'candidates': lambda: {
+                'count': storage.count(),
+                'revision': storage.revision,
+            },
+            'resume_files': resume_service.get_stats,
+        }
+        if match_cache is not None:
+            components['match_cache'] = match_cache.stats
+        if section_explainer is not None:
+            components['explanation_cache'] = lambda: {
+                'entries': section_explainer.cache_size()
+            }
+        if llm_client.cache is not None:
+            components['llm_cache'] = llm_client.cache.stats
+        diagnostics_service = DiagnosticsService(memory_profiler, components)
+
+    return candidate_service, recommendation_service, model_service, \
+        resume_service, diagnostics_service
 
 
 def create_app():
@@ -25,16 +176,8 @@ def create_app():
     # Enable CORS
     CORS(app)
 
-    # Create upload folder
-    create_upload_folder(app.config['UPLOAD_FOLDER'])
-
-    # Initialize processors
-    embedding_processor = EmbeddingProcessor(EMBEDDING_MODEL)
-    recommendation_engine = RecommendationEngine(embedding_processor)
-
-    # Initialize services
-    candidate_service = CandidateService(embedding_processor)
-    recommendation_service = RecommendationService(recommendation_engine, )
+    candidate_service, recommendation_service, model_service, \
+        resume_service, diagnostics_service = create_services(app.config)
 
     # Register routes
     app.register_blueprint(create_health_routes())
@@ -48,6 +191,10 @@ def create_app():
             recommendation_service,
             app.config,
         ))
+    app.register_blueprint(create_model_routes(model_service))
+    app.register_blueprint(create_resume_routes(resume_service, app.config))
+    if diagnostics_service is not None:
+        app.register_blueprint(create_diagnostics_routes(diagnostics_service))
 
     # Error handling
     @app.errorhandler(404)
@@ -72,12 +219,21 @@ if __name__ == '__main__':
     print("  GET  / - Health check")
     print("  GET  /api/health - Health check")
     print("  POST /api/candidates - Add candidates via JSON")
-    print("  POST /api/candidates/upload - Upload candidate files")
-    print("  GET  /api/candidates - Get all candidates")
+    print("  POST /api/candidates/upload - Upload candidate files (PDF/TXT, zip/tar archives)")
+    print("  GET  /api/candidates - Get all candidates (?limit=&cursor= to paginate)")
     # print("  POST /api/recommendations - Get recommendations (supports both stored and frontend data)")
     print("  POST /api/match - Real-time matching with frontend data")
     print("  DELETE /api/candidates - Clear all candidates")
     print("  DELETE /api/candidates/<id> - Delete specific candidate")
+    print("  POST /api/candidates/delete - Delete candidates by id list")
+    print("  GET  /api/candidates/export - Export the pool as a tar archive")
+    print("  POST /api/candidates/import - Import a pool archive")
+    print("  GET  /api/models - Embedding models and migration status")
+    print("  POST /api/models/migration - Re-embed candidates with another model")
+    print("  GET  /api/resumes/<name> - Resume PDF (cached, range requests)")
+    print("  GET  /api/resumes/stats - Resume PDF garbage collection counters")
+    print("  POST /api/resumes/gc - Remove unreferenced resume PDFs")
+    print("  GET  /api/admin/memory - Memory diagnostics (MEMORY_DIAGNOSTICS_ENABLED, X-Invitation-Code header)")
     print("")
     print("💡 First run will download the model (~1.5GB)")
 
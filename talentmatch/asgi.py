@@ -0,0 +1,112 @@
+"""
+Async serving mode (ASGI, Quart)
+
+Mirrors talentmatch.app with async handlers: LLM calls are awaited and PDF
+parsing, file writes and embeddings run in a thread pool, so one process can
+hold many in-flight matches. Run with e.g.
+
+    uvicorn --factory talentmatch.asgi:create_asgi_app --port 7860
+"""
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from quart import Quart, jsonify, render_template
+    from quart_cors import cors
+except ImportError as e:
+    raise ImportError(
+        "The async serving mode requires quart and quart-cors, "
+        "install them with: pip install 'talentmatch[async]'") from e
+from talentmatch.config import Config
+from talentmatch.app import create_services
+from talentmatch.routes.async_candidate_routes import (StreamedBodyRequest,
+                                                       create_async_candidate_routes)
+from talentmatch.routes.async_recommendation_routes import create_async_recommendation_routes
+from talentmatch.routes.async_model_routes import create_async_model_routes
+from talentmatch.routes.async_resume_routes import create_async_resume_routes
+from talentmatch.routes.async_diagnostics_routes import create_async_diagnostics_routes
+from talentmatch import EMBEDDING_MODEL, STATIC_DIR
+
+
+def create_asgi_app():
+    """Create Quart (ASGI) application"""
+    print(f"Frontend provided through {STATIC_DIR}")
+    app = Quart(
+        __name__,
+        template_folder=STATIC_DIR,
+        static_folder=STATIC_DIR,
+    )
+    app.config.from_object(Config)
+    # Uploads and pool imports are limited by their own settings
+    app.request_class = StreamedBodyRequest
+
+    # Enable CORS
+    app = cors(app)
+
+    candidate_service, recommendation_service, model_service, \
+        resume_service, diagnostics_service = create_services(app.config)
+    executor = ThreadPoolExecutor(
+        max_workers=app.config['ASYNC_EXECUTOR_WORKERS'],
+        thread_name_prefix='talentmatch',
+    )
+
+    @app.route('/')
+    async def index():
+        return await render_template('index.html')
+
+    @app.route('/api/health')
+    async def health_check():
+        """Health check endpoint"""
+        return jsonify({
+            'status': 'healthy',
+            'message': 'API is running successfully'
+        })
+
+    # Register routes
+    app.register_blueprint(
+        create_async_candidate_routes(
+            candidate_service,
+            app.config,
+            executor,
+        ))
+    app.register_blueprint(
+        create_async_recommendation_routes(
+            recommendation_service,
+            app.config,
+            executor,
+        ))
+    app.register_blueprint(create_async_model_routes(model_service))
+    app.register_blueprint(
+        create_async_resume_routes(
+            resume_service,
+            app.config,
+            executor,
+        ))
+    if diagnostics_service is not None:
+        app.register_blueprint(
+            create_async_diagnostics_routes(diagnostics_service, executor))
+
+    @app.after_serving
+    async def shutdown_executor():
+        resume_service.stop()
+        executor.shutdown(wait=False)
+
+    # Error handling
+    @app.errorhandler(404)
+    async def not_found(error):
+        """404 error handling"""
+        return jsonify({'error': 'Endpoint not found'}), 404
+
+    @app.errorhandler(500)
+    async def internal_error(error):
+        """500 error handling"""
+        return jsonify({'error': 'Internal server error'}), 500
+
+    return app
+
+
+if __name__ == '__main__':
+    app = create_asgi_app()
+
+    print("🚀 Starting Candidate Recommendation Engine (async mode)...")
+    print(f"🎯 Using embedding model: {EMBEDDING_MODEL}")
+
+    app.run(host='0.0.0.0', port=7860)
@@ -0,0 +1,483 @@
+"""
+Score a directory of resumes against job descriptions offline
+
+    python -m talentmatch.batch resumes/ --job backend.txt --job data.txt \\
+        --output results.jsonl [--top-k 10] [--summaries]
+
+Resumes (PDF/TXT, walked recursively) are extracted by a pool of worker
+processes and embedded in batches. Every resume gets one row per job in the
+output (.jsonl or .csv), written and flushed batch by batch. A checkpoint
+file next to the output records the files done and the output size after
+each batch, so an interrupted run started again with the same arguments
+resumes after the last complete batch.
+
+Rows carry the raw cosine similarity, which does not depend on an LLM and so
+is identical across resumed runs. Once every resume is scored, the top k of
+each job are written to <stem>.top<ext> (results.top.jsonl), with LLM
+summaries when --summaries is given.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from pathlib import Path
+import argparse
+import csv
+import hashlib
+import heapq
+import json
+import os
+import sys
+import time
+import numpy as np
+
+ALLOWED_EXTENSIONS = {'txt', 'pdf'}
+DEFAULT_BATCH_SIZE = 64
+
+RESULT_COLUMNS = ('job', 'file', 'name', 'similarity', 'duplicate_of',
+                  'years_experience', 'education', 'seniority', 'skills',
+                  'error')
+TOP_COLUMNS = ('job', 'rank', 'file', 'name', 'similarity', 'summary')
+
+
+def find_resumes(directory: Path) -> List[str]:
+    """Resume files under a directory, as sorted relative POSIX paths"""
+    resumes = []
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if '.' in filename and filename.rsplit(
+                    '.', 1)[1].lower() in ALLOWED_EXTENSIONS:
+                resumes.append(
+                    (Path(root) / filename).relative_to(directory).as_posix())
+    return sorted(resumes)
+
+
+def extract_resume(path: str) -> Tuple[str, Optional[str]]:
+    """Text of a resume file, run in the worker processes: (text, error)"""
+    from talentmatch.utils import extract_text_from_bytes
+    try:
+        with open(path, 'rb') as f:
+            text = extract_text_from_bytes(path, f.read()).strip()
+    except OSError as e:
+        return '', str(e)
+    return text, None if text else 'no text could be extracted'
+
+
+def _bounded_map(pool: ProcessPoolExecutor, function, items: List[str],
+                 window: int) -> Iterator[Any]:
+    """pool.map in order, with at most window tasks in flight"""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ResultWriter:
+    """Rows appended to a .jsonl or .csv file, flushed to disk per batch"""
+
+    def __init__(self, path: Path, columns: Tuple[str, ...], offset: int = 0):
+        self.path = path
+        self.columns = columns
+        self.csv = path.suffix.lower() == '.csv'
+        self._file = open(path, 'r+b' if path.exists() else 'wb')
+        self._file.truncate(offset)
+        self._file.seek(offset)
+        if self.csv and offset == 0:
+            self._file.write(self._csv_line(columns))
+
+    def _csv_line(self, values) -> bytes:
+        line = _CSVLine()
+        csv.writer(line).writerow(values)
+        return line.value.encode('utf-8')
+
+    def write(self, row: Dict[str, Any]):
+        if self.csv:
+            self._file.write(self._csv_line([
+                ';'.join(row[column]) if isinstance(row.get(column), list) else
+                '' if row.get(column) is None else row[column]
+                for column in self.columns
+            ]))
+        else:
+            self._file.write(
+                json.dumps(row, ensure_ascii=False).encode('utf-8') + b'\n')
+
+    def commit(self) -> int:
+        """Flush the rows written so far, returns the file size"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class _CSVLine:
+    """File object keeping the last line written by a csv.writer"""
+
+    value = ''
+
+    def write(self, value: str):
+        self.value = value
+
+
+def read_results(path: Path) -> Iterator[Dict[str, Any]]:
+    """Rows of a result file written by ResultWriter"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.suffix.lower() == '.csv':
+            for row in csv.DictReader(f):
+                row['similarity'] = float(row['similarity']) \
+                    if row['similarity'] else None
+                yield row
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class Checkpoint:
+    """
+    Progress of a run: a header line identifying the run, then one line per
+    committed batch with its files and the output size after it
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: Set[str] = set()
+        self.offset = 0
+
+    def load(self, run: Dict[str, Any]) -> bool:
+        """Read the progress of a run, False when there is none to resume"""
+        if not self.path.exists():
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if header != run:
+            raise ValueError(
+                f"{self.path} belongs to a run with other jobs, model or "
+                "output, start again with --restart")
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Torn last line of an interrupted write
+                break
+            self.done.update(entry['files'])
+            self.offset = entry['offset']
+        return True
+
+    def start(self, run: Dict[str, Any]):
+        """Start the progress of a new run"""
+        self.done, self.offset = set(), 0
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(run) + '\n')
+
+    def commit(self, files: List[str], offset: int):
+        """Record a batch written to the output up to offset"""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'offset': offset, 'files': files}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(files)
+        self.offset = offset
+
+
+def _fields_columns(fields: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    fields = fields or {}
+    return {
+        'years_experience': fields.get('years_experience'),
+        'education': fields.get('education'),
+        'seniority': fields.get('seniority'),
+        'skills': fields.get('skills') or [],
+    }
+
+
+def _batch_candidate(path: str, text: str) -> Dict[str, Any]:
+    """Candidate data of an extracted resume, as process_candidates takes it"""
+    return {'id': path, 'name': Path(path).stem, 'resume_text': text}
+
+
+def register_scored(
+    deduplicator,
+    scored: Iterable[Tuple[str, Tuple[str, Optional[str]]]],
+):
+    """
+    Replay the duplicate checks of resumes scored before an interruption, so
+    later resumes duplicating them are still reported
+    """
+    from talentmatch.utils import candidate_resume_text, prepare_candidate
+    for path, (text, error) in scored:
+        if error is not None:
+            continue
+        candidate = _batch_candidate(path, text)
+        # As batch deduplicator, the deduplicator records the unique resumes
+        prepare_candidate(candidate, candidate_resume_text(candidate),
+                          deduplicator, batch_deduplicator=deduplicator)
+
+
+def score_batch(
+    embedding_processor,
+    deduplicator,
+    field_extractor,
+    jobs: List[Tuple[str, np.ndarray]],
+    batch: List[Tuple[str, Tuple[str, Optional[str]]]],
+) -> List[Dict[str, Any]]:
+    """Result rows of a batch of extracted resumes, per job then resume"""
+    from talentmatch.utils import process_candidates
+    candidates = [
+        _batch_candidate(path, text) for path, (text, error) in batch
+        if error is None
+    ]
+    processed = {
+        candidate['id']: candidate
+        for candidate in process_candidates(
+            embedding_processor,
+            candidates,
+            deduplicator=deduplicator,
+            field_extractor=field_extractor,
+        )
+    }
+    embedded = [
+        candidate for candidate in processed.values()
+        if 'embedding' in candidate
+    ]
+    # Later batches detect duplicates of this one
+    for candidate in embedded:
+        if candidate.get('fingerprint') is not None:
+            deduplicator.add(candidate['id'], candidate['fingerprint'])
+    embeddings = np.asarray([candidate['embedding'] for candidate in embedded],
+                            dtype=np.float32)
+
+    rows = []
+    for job_name, job_embedding in jobs:
+        similarities = dict(
+            zip((candidate['id'] for candidate in embedded),
+                embedding_processor.calculate_similarities(
+                    job_embedding, embeddings).tolist())) if embedded else {}
+        for path, (_, error) in batch:
+            candidate = processed.get(path, {})
+            duplicate = candidate.get('duplicate_of')
+            rows.append({
+                'job': job_name,
+                'file': path,
+                'name': Path(path).stem,
+                'similarity': similarities.get(path),
+                'duplicate_of': duplicate['id'] if duplicate else None,
+                **_fields_columns(candidate.get('fields')),
+                'error': error,
+            })
+    return rows
+
+
+def top_results(path: Path, job_names: List[str],
+                top_k: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Best rows of each job in a result file, ties in file order"""
+    return {
+        job_name: heapq.nsmallest(
+            top_k,
+            (row for row in read_results(path)
+             if row['job'] == job_name and row['similarity'] is not None),
+            key=lambda row: (-row['similarity'], row['file']))
+        for job_name in job_names
+    }
+
+
+def write_top_results(
+    path: Path,
+    resumes_dir: Path,
+    jobs: List[Tuple[str, str, np.ndarray]],
+    top: Dict[str, List[Dict[str, Any]]],
+    engine=None,
+):
+    """Write the top rows of each job, summarized by the engine when given"""
+    writer = ResultWriter(path, TOP_COLUMNS)
+    try:
+        for job_name, job_description, job_embedding in jobs:
+            rows = top.get(job_name, [])
+            summaries = [''] * len(rows)
+            if engine is not None and rows:
+                candidates = []
+                for row in rows:
+                    text, _ = extract_resume(str(resumes_dir / row['file']))
+                    candidates.append({'id': row['file'], 'resume_text': text})
+                summaries = engine.summarize_candidates(
+                    job_description, job_embedding, candidates)
+            for rank, (row, summary) in enumerate(zip(rows, summaries), 1):
+                writer.write({
+                    'job': job_name,
+                    'rank': rank,
+                    'file': row['file'],
+                    'name': row['name'],
+                    'similarity': row['similarity'],
+                    'summary': summary,
+                })
+        writer.commit()
+    finally:
+        writer.close()
+
+
+def _run_signature(model: str, jobs: List[Tuple[str, str]],
+                   output: Path) -> Dict[str, Any]:
+    """What a checkpoint must match to be resumed"""
+    return {
+        'model': model,
+        'jobs': {
+            name: hashlib.sha256(text.encode('utf-8')).hexdigest()
+            for name, text in jobs
+        },
+        'output': output.suffix.lower(),
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    """Score a resume directory, returns a summary of the run"""
+    from talentmatch import EMBEDDING_MODEL
+    from talentmatch.config import Config
+    from talentmatch.etc.deduplicator import Deduplicator
+    from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+    from talentmatch.etc.fieldextractor import FieldExtractor
+
+    resumes_dir = Path(args.resumes_dir)
+    output = Path(args.output)
+    if not resumes_dir.is_dir():
+        raise ValueError(f"{resumes_dir} is not a directory")
+    if output.suffix.lower() not in ('.jsonl', '.csv'):
+        raise ValueError("Output must be a .jsonl or .csv file")
+    jobs = []
+    for job_path in args.job:
+        with open(job_path, 'r', encoding='utf-8') as f:
+            jobs.append((Path(job_path).stem, f.read().strip()))
+    if len({name for name, _ in jobs}) != len(jobs):
+        raise ValueError("Job files must have distinct names")
+
+    model = args.model or EMBEDDING_MODEL
+    checkpoint = Checkpoint(output.with_name(output.name + '.checkpoint'))
+    run_signature = _run_signature(model, jobs, output)
+    resumed = not args.restart and checkpoint.load(run_signature)
+    if not resumed:
+        checkpoint.start(run_signature)
+
+    files = find_resumes(resumes_dir)
+    pending = [path for path in files if path not in checkpoint.done]
+    print(f"{len(files)} resumes, {len(files) - len(pending)} already scored, "
+          f"{len(jobs)} jobs")
+
+    embedding_processor = EmbeddingProcessor(model)
+    job_embeddings = [
+        (name, embedding_processor.generate_embedding(text))
+        for name, text in jobs
+    ]
+    deduplicator = Deduplicator(threshold=Config.NEAR_DUPLICATE_THRESHOLD)
+    field_extractor = FieldExtractor(use_llm=False)
+    writer = ResultWriter(output, RESULT_COLUMNS, checkpoint.offset)
+    started, scored = time.time(), 0
+    try:
+        with ProcessPoolExecutor(args.workers) as pool:
+            window = max(args.batch_size, 4 * args.workers)
+            # Duplicates of resumes scored before an interruption still count
+            done = sorted(checkpoint.done)
+            register_scored(
+                deduplicator,
+                zip(done,
+                    _bounded_map(pool, extract_resume,
+                                 [str(resumes_dir / path) for path in done],
+                                 window)))
+
+            extracted = zip(
+                pending,
+                _bounded_map(pool, extract_resume,
+                             [str(resumes_dir / path) for path in pending],
+                             window))
+            for batch in _batched(extracted, args.batch_size):
+                for row in score_batch(embedding_processor, deduplicator,
+                                       field_extractor, job_embeddings, batch):
+                    writer.write(row)
+                checkpoint.commit([path for path, _ in batch], writer.commit())
+                scored += len(batch)
+                print(f"Scored {scored}/{len(pending)} resumes "
+                      f"({scored / (time.time() - started):.1f}/s)")
+    finally:
+        writer.close()
+
+    top_path = output.with_name(f'{output.stem}.top{output.suffix}')
+    engine = None
+    if args.summaries:
+        from talentmatch.etc.recommendengine import RecommendationEngine
+        from talentmatch.etc.llmclient import LLMClient, LLMResponseCache
+        engine = RecommendationEngine(
+            embedding_processor,
+            llm_client=LLMClient(cache=LLMResponseCache(
+                Config.LLM_CACHE_PATH,
+                ttl_seconds=Config.LLM_CACHE_TTL_SECONDS,
+                max_bytes=Config.LLM_CACHE_MAX_BYTES,
+            ) if Config.LLM_CACHE_ENABLED else None),
+            field_extractor=field_extractor,
+        )
+    write_top_results(
+        top_path, resumes_dir,
+        [(name, text, embedding)
+         for (name, text), (_, embedding) in zip(jobs, job_embeddings)],
+        top_results(output, [name for name, _ in jobs], args.top_k), engine)
+
+    return {
+        'resumes': len(files),
+        'scored': scored,
+        'resumed': resumed,
+        'output': str(output),
+        'top': str(top_path),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m talentmatch.batch',
+        description='Score a directory of resumes against job descriptions')
+    parser.add_argument('resumes_dir', help='directory of PDF/TXT resumes')
+    parser.add_argument('--job', action='append', required=True,
+                        help='job description text file (repeatable)')
+    parser.add_argument('--output', required=True,
+                        help='result file, .jsonl or .csv')
+    parser.add_argument('--top-k', type=int, default=10,
+                        help='candidates per job in the top file (default 10)')
+    parser.add_argument('--summaries', action='store_true',
+                        help='summarize the top candidates with the LLM')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='text extraction processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='resumes embedded and checkpointed together '
+                        f'(default {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--model', help='embedding model (default '
+                        'EMBEDDING_MODEL)')
+    parser.add_argument('--restart', action='store_true',
+                        help='ignore the checkpoint and start over')
+    args = parser.parse_args(argv)
+    if args.top_k <= 0 or args.workers <= 0 or args.batch_size <= 0:
+        parser.error('--top-k, --workers and --batch-size must be positive')
+
+    try:
+        result = run(args)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
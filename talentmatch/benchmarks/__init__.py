@@ -0,0 +1,4 @@
+"""
+Offline benchmarks on labelled synthetic data, run as
+python -m talentmatch.benchmarks.<name>
+"""
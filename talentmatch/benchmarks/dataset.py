@@ -0,0 +1,135 @@
+"""
+Labelled synthetic resumes and jobs shared by the benchmarks
+
+Every job is built from the profile of one candidate: a title, two required
+skills and a required certification. Candidates holding the certification
+and both skills are relevant (grade 2). Candidates with both skills but not
+the certification look alike to an embedding model and get grade 1, the
+certification being the kind of hard requirement cosine similarity misses.
+"""
+from typing import Dict, List, NamedTuple, Sequence
+import random
+import numpy as np
+
+SKILLS = ('python', 'java', 'golang', 'rust', 'typescript', 'react', 'sql',
+          'spark', 'airflow', 'kafka', 'docker', 'kubernetes', 'terraform',
+          'aws', 'azure', 'gcp', 'pytorch', 'tensorflow', 'pandas', 'tableau',
+          'excel', 'salesforce', 'figma', 'swift', 'kotlin', 'django',
+          'flask', 'postgres', 'redis', 'graphql')
+CERTIFICATIONS = ('CISSP', 'CKA', 'PMP', 'CFA', 'CCNA', 'CISA', 'CPA',
+                  'OSCP', 'TOGAF', 'ITIL', 'CSM', 'SHRM')
+TITLES = ('backend engineer', 'data scientist', 'frontend developer',
+          'devops engineer', 'data engineer', 'security engineer',
+          'machine learning engineer', 'project manager', 'network engineer',
+          'financial analyst', 'product designer', 'mobile developer')
+_FILLER = (
+    "Collaborated with cross-functional teams to deliver projects on time.",
+    "Mentored junior colleagues and ran weekly knowledge sharing sessions.",
+    "Improved the reliability of production systems and on-call processes.",
+    "Wrote design documents and presented them to stakeholders.",
+    "Reduced operating costs by automating recurring manual work.",
+    "Worked closely with customers to gather and refine requirements.",
+    "Participated in hiring, interviewing and onboarding new team members.",
+    "Maintained documentation and internal tooling used across the company.",
+    "Led the migration of legacy services to a modern architecture.",
+    "Tracked delivery metrics and reported progress to management.",
+)
+
+
+class LabelledJob(NamedTuple):
+    """A job description and the relevance grade of each candidate id"""
+    id: str
+    text: str
+    grades: Dict[str, int]
+
+    def relevant(self) -> set:
+        """Ids of the fully qualified candidates"""
+        return {
+            candidate_id
+            for candidate_id, grade in self.grades.items() if grade == 2
+        }
+
+
+def _profile(rng: random.Random) -> Dict:
+    return {
+        'title': rng.choice(TITLES),
+        'years': rng.randint(1, 20),
+        'skills': rng.sample(SKILLS, 6),
+        'certifications': rng.sample(CERTIFICATIONS, rng.choice((0, 1, 1, 2))),
+    }
+
+
+def _resume(rng: random.Random, profile: Dict, filler: int) -> str:
+    skills = profile['skills']
+    lines = [
+        f"{profile['title'].title()} with {profile['years']} years of "
+        f"experience.",
+        f"Skills: {', '.join(skills)}.",
+        f"Built and operated {skills[0]} and {skills[1]} systems, later "
+        f"moved the team to {skills[2]}.",
+    ]
+    if profile['certifications']:
+        lines.append(f"Certifications: {', '.join(profile['certifications'])}.")
+    lines.extend(rng.sample(_FILLER, min(filler, len(_FILLER))))
+    rng.shuffle(lines)
+    return '\n'.join(lines)
+
+
+def labelled_pool(candidate_count: int, job_count: int, seed: int = 0,
+                  filler: int = 4):
+    """
+    Synthetic candidates ({'id', 'name', 'resume_text'}) and labelled jobs,
+    filler generic sentences pad each resume
+    :return: (candidates, jobs)
+    """
+    rng = random.Random(seed)
+    profiles = [_profile(rng) for _ in range(candidate_count)]
+    candidates = [{
+        'id': f'c{index}',
+        'name': f'Candidate {index}',
+        'resume_text': _resume(rng, profile, filler),
+    } for index, profile in enumerate(profiles)]
+
+    anchors = [profile for profile in profiles if profile['certifications']]
+    jobs = []
+    for index in range(job_count):
+        anchor = rng.choice(anchors)
+        certification = rng.choice(anchor['certifications'])
+        skills = rng.sample(anchor['skills'], 2)
+        text = (f"We are hiring a {anchor['title']}. A {certification} "
+                f"certification is required. Must have hands-on experience "
+                f"with {skills[0]} and {skills[1]}. You will work with a "
+                f"friendly team on products used by thousands of customers.")
+        grades = {}
+        for candidate, profile in zip(candidates, profiles):
+            if all(skill in profile['skills'] for skill in skills):
+                grades[candidate['id']] = \
+                    2 if certification in profile['certifications'] else 1
+        jobs.append(LabelledJob(f'job{index}', text, grades))
+    return candidates, jobs
+
+
+def latency_stats(seconds: Sequence[float]) -> Dict[str, float]:
+    """Mean, median and 95th percentile of timings, in milliseconds"""
+    milliseconds = np.asarray(seconds, dtype=np.float64) * 1000
+    if not len(milliseconds):
+        return {'mean_ms': None, 'p50_ms': None, 'p95_ms': None}
+    return {
+        'mean_ms': round(float(milliseconds.mean()), 2),
+        'p50_ms': round(float(np.percentile(milliseconds, 50)), 2),
+        'p95_ms': round(float(np.percentile(milliseconds, 95)), 2),
+    }
+
+
+def print_table(rows: List[Dict], columns: Sequence[str]):
+    """Print rows as an aligned text table"""
+    cells = [[str(column) for column in columns]] + [[
+        '-' if row.get(column) is None else
+        f"{row[column]:.3f}" if isinstance(row[column], float) else
+        str(row[column]) for column in columns
+    ] for row in rows]
+    widths = [max(len(line[index]) for line in cells)
+              for index in range(len(columns))]
+    for line in cells:
+        print('  '.join(cell.rjust(width)
+                        for cell, width in zip(line, widths)))
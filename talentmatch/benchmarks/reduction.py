@@ -0,0 +1,189 @@
+"""
+Recall and speed of shortlisting on reduced embeddings (PCA or Matryoshka
+prefix) at 64/128/256 dimensions
+
+    python -m talentmatch.benchmarks.reduction [--candidates 5000] \
+        [--jobs 100] [--dimensions 64,128,256] [--methods pca,prefix] \
+        [--speed-rows 100000] [--report out.json]
+
+As for stored matches, each job is scored against the reduced rows
+(EmbeddingProcessor.shortlist_reduced), the shortlist is re-ranked on the
+full embeddings and its top k compared with the exact top k over the full
+matrix: recall@k of the shortlist re-rank, and of the reduced ranking
+alone. PCA is fitted on the pool. Timings cover a query from the job
+embedding to its top k, on --speed-rows rows (the pool tiled with small
+noise) when it is larger than the pool. Prefix truncation is only
+meaningful for models trained with a Matryoshka loss.
+"""
+from typing import Dict, List, Sequence
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from talentmatch.benchmarks.dataset import labelled_pool, latency_stats, print_table
+
+
+def shortlist_size(top_k: int) -> int:
+    """Shortlist of a stored match over reduced embeddings"""
+    from talentmatch.etc.recommendengine import RecommendationEngine
+    return max(top_k * RecommendationEngine.REDUCED_SHORTLIST_FACTOR,
+               RecommendationEngine.REDUCED_MIN_SHORTLIST)
+
+
+def _top_k(similarities: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest similarities, best first"""
+    if len(similarities) > k:
+        indices = np.argpartition(-similarities, k - 1)[:k]
+    else:
+        indices = np.arange(len(similarities))
+    return indices[np.argsort(-similarities[indices], kind='stable')]
+
+
+def _tile(embeddings: np.ndarray, rows: int, seed: int) -> np.ndarray:
+    """rows embeddings: the given ones repeated with small gaussian noise"""
+    if rows <= len(embeddings):
+        return embeddings
+    rng = np.random.default_rng(seed)
+    tiled = np.resize(embeddings, (rows, embeddings.shape[1]))
+    tiled = tiled + rng.normal(scale=0.01, size=tiled.shape).astype(
+        np.float32)
+    return tiled.astype(np.float32)
+
+
+def run_benchmark(embedding_processor, candidates: List[Dict], jobs,
+                  dimensions: Sequence[int] = (64, 128, 256),
+                  methods: Sequence[str] = ('pca', 'prefix'),
+                  top_k: int = 10, limit: int = None,
+                  speed_rows: int = 0, seed: int = 0) -> List[Dict]:
+    """Recall@k and query latency of full scoring and of each projection"""
+    from talentmatch.etc.projection import create_projection
+
+    limit = limit or shortlist_size(top_k)
+    embeddings = np.asarray(embedding_processor.generate_embeddings(
+        [candidate['resume_text'] for candidate in candidates]),
+                            dtype=np.float32)
+    job_embeddings = [embedding_processor.generate_embedding(job.text)
+                      for job in jobs]
+    exact = [
+        set(_top_k(embedding_processor.calculate_similarities(
+            job_embedding, embeddings), top_k))
+        for job_embedding in job_embeddings
+    ]
+    timed = _tile(embeddings, speed_rows, seed)
+
+    def time_queries(query) -> Dict[str, float]:
+        timings = []
+        for job_embedding in job_embeddings:
+            started = time.perf_counter()
+            query(job_embedding)
+            timings.append(time.perf_counter() - started)
+        return latency_stats(timings)
+
+    rows = [{
+        'method': 'none',
+        'dimensions': embeddings.shape[1],
+        'recall_rerank': 1.0,
+        'recall_reduced': 1.0,
+        'bytes_per_row': embeddings.shape[1] * 4,
+        **time_queries(lambda job_embedding: _top_k(
+            embedding_processor.calculate_similarities(job_embedding, timed),
+            top_k)),
+    }]
+    for method in methods:
+        for dimension in dimensions:
+            if dimension >= embeddings.shape[1]:
+                print(f"Skipping {method} {dimension}: the model has "
+                      f"{embeddings.shape[1]} dimensions")
+                continue
+            projection = create_projection(method, dimension).fit(embeddings)
+            reduced = projection.transform(embeddings)
+            recall_rerank, recall_reduced = [], []
+            for job_embedding, expected in zip(job_embeddings, exact):
+                shortlist = embedding_processor.shortlist_reduced(
+                    job_embedding, reduced, projection, limit)
+                reranked = shortlist[_top_k(
+                    embedding_processor.calculate_similarities(
+                        job_embedding, embeddings[shortlist]), top_k)]
+                recall_rerank.append(len(expected.intersection(reranked)) /
+                                     len(expected))
+                reduced_top = _top_k(
+                    reduced @ projection.transform(job_embedding)[0], top_k)
+                recall_reduced.append(
+                    len(expected.intersection(reduced_top)) / len(expected))
+
+            timed_reduced = projection.transform(timed)
+
+            def query(job_embedding):
+                shortlist = embedding_processor.shortlist_reduced(
+                    job_embedding, timed_reduced, projection, limit)
+                return shortlist[_top_k(
+                    embedding_processor.calculate_similarities(
+                        job_embedding, timed[shortlist]), top_k)]
+
+            rows.append({
+                'method': method,
+                'dimensions': dimension,
+                'recall_rerank': round(float(np.mean(recall_rerank)), 4),
+                'recall_reduced': round(float(np.mean(recall_reduced)), 4),
+                'bytes_per_row': dimension * 4,
+                **time_queries(query),
+            })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m talentmatch.benchmarks.reduction',
+        description='Recall and speed of reduced-dimension shortlisting')
+    parser.add_argument('--candidates', type=int, default=5000,
+                        help='synthetic candidates (default 5000)')
+    parser.add_argument('--jobs', type=int, default=100,
+                        help='queries (default 100)')
+    parser.add_argument('--dimensions', default='64,128,256',
+                        help='reduced dimensions (default 64,128,256)')
+    parser.add_argument('--methods', default='pca,prefix',
+                        help='projections (default pca,prefix)')
+    parser.add_argument('--top-k', type=int, default=10,
+                        help='recall depth (default 10)')
+    parser.add_argument('--shortlist', type=int,
+                        help='reduced shortlist size (default as /api/match)')
+    parser.add_argument('--speed-rows', type=int, default=0,
+                        help='rows of the timed matrix (default the pool)')
+    parser.add_argument('--model', help='embedding model (default '
+                        'EMBEDDING_MODEL)')
+    parser.add_argument('--report', help='write the results as JSON here')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from talentmatch import EMBEDDING_MODEL
+    from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+    from talentmatch.etc.projection import REDUCTION_METHODS
+
+    try:
+        dimensions = [int(dimension)
+                      for dimension in args.dimensions.split(',')]
+    except ValueError:
+        parser.error("--dimensions must be a comma separated list of integers")
+    methods = args.methods.split(',')
+    if not set(methods) <= set(REDUCTION_METHODS) - {'none'}:
+        parser.error("--methods must be pca and/or prefix")
+
+    candidates, jobs = labelled_pool(args.candidates, args.jobs, args.seed)
+    limit = args.shortlist or shortlist_size(args.top_k)
+    print(f"{len(candidates)} candidates, {len(jobs)} queries, recall@"
+          f"{args.top_k} within a {limit} candidate shortlist")
+    rows = run_benchmark(EmbeddingProcessor(args.model or EMBEDDING_MODEL),
+                         candidates, jobs, dimensions, methods, args.top_k,
+                         limit, args.speed_rows, args.seed)
+    print_table(rows, ('method', 'dimensions', 'recall_rerank',
+                       'recall_reduced', 'bytes_per_row', 'p50_ms',
+                       'p95_ms'))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'arguments': vars(args), 'results': rows}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
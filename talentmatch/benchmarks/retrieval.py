@@ -0,0 +1,140 @@
+"""
+Latency and ranking quality of semantic and hybrid retrieval on a labelled
+synthetic pool
+
+    python -m talentmatch.benchmarks.retrieval [--candidates 2000] \
+        [--jobs 50] [--top-k 10] [--model all-mpnet-base-v2] [--report out.json]
+
+Each job requires a certification and two skills (see dataset.py). Both
+modes rank the whole pool with RecommendationEngine.find_top_candidates, as
+/api/match does with stored candidates: the hybrid mode reads the BM25
+scores of an index built once over the pool. Reported per mode: precision,
+recall and nDCG at k, MRR of the first fully qualified candidate, and the
+latency of a query including the job embedding. The ideal candidate LLM
+call is left out (the prompt stands in for its answer), it is the same in
+both modes and cached in production.
+"""
+from typing import Dict, List
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from talentmatch.benchmarks.dataset import (LabelledJob, labelled_pool, latency_stats,
+                                            print_table)
+
+MODES = ('semantic', 'hybrid')
+
+
+class _OfflineLLM:
+    """LLM client stand-in answering with the prompt itself"""
+
+    def complete(self, messages, **options) -> str:
+        return messages[-1]['content']
+
+
+def ranking_metrics(ranked_ids: List[str], job: LabelledJob,
+                    k: int) -> Dict[str, float]:
+    """Precision, recall and nDCG at k, reciprocal rank of the first relevant"""
+    relevant = job.relevant()
+    top = ranked_ids[:k]
+    hits = sum(candidate_id in relevant for candidate_id in top)
+    gains = [job.grades.get(candidate_id, 0) for candidate_id in top]
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    ideal = sorted(job.grades.values(), reverse=True)[:k]
+    ideal_dcg = float(np.dot(ideal, discounts[:len(ideal)]))
+    reciprocal_rank = next((1 / rank for rank, candidate_id in enumerate(
+        ranked_ids, 1) if candidate_id in relevant), 0.0)
+    return {
+        'precision': hits / k,
+        'recall': hits / len(relevant) if relevant else 0.0,
+        'ndcg': float(np.dot(gains, discounts[:len(gains)])) / ideal_dcg
+        if ideal_dcg else 0.0,
+        'mrr': reciprocal_rank,
+    }
+
+
+def run_benchmark(embedding_processor, candidates: List[Dict],
+                  jobs: List[LabelledJob], top_k: int = 10,
+                  modes=MODES) -> List[Dict]:
+    """Mean metrics and latency of each retrieval mode"""
+    from talentmatch.etc.lexicalindex import BM25Index
+    from talentmatch.etc.recommendengine import RecommendationEngine
+
+    engine = RecommendationEngine(embedding_processor, llm_client=_OfflineLLM())
+    started = time.perf_counter()
+    embeddings = embedding_processor.generate_embeddings(
+        [candidate['resume_text'] for candidate in candidates])
+    print(f"Embedded {len(candidates)} resumes in "
+          f"{time.perf_counter() - started:.1f}s")
+    pool = [dict(candidate, embedding=embedding)
+            for candidate, embedding in zip(candidates, embeddings)]
+    index = BM25Index.from_documents(
+        (candidate['id'], candidate['resume_text']) for candidate in pool)
+
+    results = []
+    for mode in modes:
+        metrics, timings = [], []
+        for job in jobs:
+            started = time.perf_counter()
+            job_embedding = embedding_processor.generate_embedding(job.text)
+            lexical_scores = dict(index.search(job.text)) \
+                if mode == 'hybrid' else None
+            ranked = engine.find_top_candidates(
+                job.text, pool, top_k,
+                min_similarity=float('-inf'),
+                retrieval=mode,
+                lexical_scores=lexical_scores,
+                job_embedding=job_embedding,
+                summarize=False,
+            )
+            timings.append(time.perf_counter() - started)
+            metrics.append(ranking_metrics(
+                [candidate['id'] for candidate in ranked], job, top_k))
+        results.append({
+            'mode': mode,
+            **{
+                name: round(float(np.mean([m[name] for m in metrics])), 4)
+                for name in ('precision', 'recall', 'ndcg', 'mrr')
+            },
+            **latency_stats(timings),
+        })
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m talentmatch.benchmarks.retrieval',
+        description='Semantic vs hybrid retrieval on labelled synthetic data')
+    parser.add_argument('--candidates', type=int, default=2000,
+                        help='synthetic candidates (default 2000)')
+    parser.add_argument('--jobs', type=int, default=50,
+                        help='labelled jobs (default 50)')
+    parser.add_argument('--top-k', type=int, default=10,
+                        help='ranking depth of the metrics (default 10)')
+    parser.add_argument('--model', help='embedding model (default '
+                        'EMBEDDING_MODEL)')
+    parser.add_argument('--report', help='write the results as JSON here')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from talentmatch import EMBEDDING_MODEL
+    from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+
+    candidates, jobs = labelled_pool(args.candidates, args.jobs, args.seed)
+    print(f"{len(candidates)} candidates, {len(jobs)} jobs, "
+          f"{np.mean([len(job.relevant()) for job in jobs]):.1f} relevant "
+          f"candidates per job")
+    results = run_benchmark(EmbeddingProcessor(args.model or EMBEDDING_MODEL),
+                            candidates, jobs, args.top_k)
+    print_table(results, ('mode', 'precision', 'recall', 'ndcg', 'mrr',
+                          'p50_ms', 'p95_ms'))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'arguments': vars(args), 'results': results}, f,
+                      indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
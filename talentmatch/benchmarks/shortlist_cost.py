@@ -0,0 +1,219 @@
+"""
+Cost of a match shortlist at several sizes: LLM summary calls and tokens,
+one call per candidate vs batched vs batched with the response cache, and
+the latency the cross-encoder re-ranking adds
+
+    python -m talentmatch.benchmarks.shortlist_cost [--sizes 5,10,20,50] \
+        [--jobs 5] [--no-rerank] [--live] [--report out.json]
+
+Summaries go through the real RecommendationEngine, SummaryPromptBuilder
+(SUMMARY_* budgets) and LLMClient; only the upstream request is replaced
+by a canned answer, unless --live sends it to the configured LLM (billed).
+Tokens are counted with the local embedding tokenizer, the proxy the
+prompt builder budgets with. The cached row is a repeated request for the
+same job and shortlist, answered from the response cache.
+"""
+from typing import Dict, List
+from pathlib import Path
+import argparse
+import json
+import re
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from talentmatch.benchmarks.dataset import labelled_pool, latency_stats, print_table
+from talentmatch.etc.llmclient import LLMClient
+
+_CANNED_SUMMARY = ' '.join(
+    ["Experienced candidate whose skills match most job requirements."] * 5)
+
+
+class CountingLLMClient(LLMClient):
+    """
+    LLMClient counting its upstream calls and their tokens, answering with
+    canned summaries unless live
+    """
+
+    def __init__(self, embedding_processor, live: bool = False, **options):
+        super().__init__(**options)
+        self.embedding_processor = embedding_processor
+        self.live = live
+        self._count_lock = threading.Lock()
+        self.reset_counts()
+
+    def reset_counts(self):
+        self.calls, self.prompt_tokens, self.output_tokens = 0, 0, 0
+
+    def _send(self, request: Dict) -> str:
+        content = super()._send(request) if self.live else \
+            self._canned_answer(request)
+        prompt_tokens = sum(self.embedding_processor.count_tokens(
+            [message['content'] for message in request['messages']]))
+        output_tokens = sum(self.embedding_processor.count_tokens(
+            [content or '']))
+        with self._count_lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+        return content
+
+    @staticmethod
+    def _canned_answer(request: Dict) -> str:
+        if request.get('response_format'):
+            candidate_ids = re.findall(r'^### Candidate (.+)$',
+                                       request['messages'][-1]['content'],
+                                       re.MULTILINE)
+            return json.dumps({'summaries': {
+                candidate_id: _CANNED_SUMMARY for candidate_id in candidate_ids
+            }})
+        return _CANNED_SUMMARY
+
+
+def _summary_engine(embedding_processor, llm_client, batch_size: int):
+    from talentmatch.config import Config
+    from talentmatch.etc.promptbuilder import SummaryPromptBuilder
+    from talentmatch.etc.recommendengine import RecommendationEngine
+    return RecommendationEngine(
+        embedding_processor,
+        llm_client=llm_client,
+        prompt_builder=SummaryPromptBuilder(
+            embedding_processor,
+            job_token_budget=Config.SUMMARY_JOB_TOKEN_BUDGET,
+            resume_token_budget=Config.SUMMARY_RESUME_TOKEN_BUDGET,
+            max_output_tokens=Config.SUMMARY_MAX_OUTPUT_TOKENS,
+            batch_size=batch_size,
+            batch_token_budget=Config.SUMMARY_BATCH_TOKEN_BUDGET,
+        ),
+    )
+
+
+def run_benchmark(embedding_processor, candidates: List[Dict], jobs,
+                  sizes: List[int], batch_size: int = None, reranker=None,
+                  live: bool = False) -> List[Dict]:
+    """
+    Mean cost per request of each shortlist size: rows of 'mode'
+    per_candidate / batched / batched_cached (LLM calls and tokens, time
+    spent summarizing) and rerank (added latency)
+    """
+    from talentmatch.config import Config
+    from talentmatch.etc.llmclient import LLMResponseCache
+    batch_size = batch_size or Config.SUMMARY_BATCH_SIZE
+
+    embeddings = embedding_processor.generate_embeddings(
+        [candidate['resume_text'] for candidate in candidates])
+    # The shortlist of a job is its best candidates by cosine similarity
+    shortlists = []
+    for job in jobs:
+        job_embedding = embedding_processor.generate_embedding(job.text)
+        order = np.argsort(-embedding_processor.calculate_similarities(
+            job_embedding, embeddings), kind='stable')[:max(sizes)]
+        shortlists.append((job, job_embedding,
+                           [candidates[index] for index in order]))
+
+    if reranker is not None:
+        # Load the model outside the timings
+        reranker.rerank(jobs[0].text, [dict(candidates[0])])
+
+    rows = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for size in sizes:
+            modes = {
+                'per_candidate': (1, None),
+                'batched': (batch_size, None),
+                'batched_cached': (batch_size, LLMResponseCache(
+                    str(Path(cache_dir) / f'llm-{size}.sqlite'))),
+            }
+            for mode, (mode_batch_size, cache) in modes.items():
+                client = CountingLLMClient(embedding_processor, live=live,
+                                           cache=cache)
+                engine = _summary_engine(embedding_processor, client,
+                                         mode_batch_size)
+                counts, timings = [], []
+                for job, job_embedding, shortlist in shortlists:
+                    shortlist = shortlist[:size]
+                    if cache is not None:
+                        # Warm the cache with a first identical request
+                        engine.summarize_candidates(job.text, job_embedding,
+                                                    shortlist)
+                    client.reset_counts()
+                    started = time.perf_counter()
+                    engine.summarize_candidates(job.text, job_embedding,
+                                                shortlist)
+                    timings.append(time.perf_counter() - started)
+                    counts.append((client.calls, client.prompt_tokens,
+                                   client.output_tokens))
+                calls, prompt_tokens, output_tokens = np.mean(counts, axis=0)
+                rows.append({
+                    'shortlist': size,
+                    'mode': mode,
+                    'llm_calls': round(float(calls), 2),
+                    'prompt_tokens': round(float(prompt_tokens), 1),
+                    'output_tokens': round(float(output_tokens), 1),
+                    **latency_stats(timings),
+                })
+
+            if reranker is not None:
+                reranker.shortlist_size = size
+                timings = []
+                for job, _, shortlist in shortlists:
+                    shortlist = [dict(candidate)
+                                 for candidate in shortlist[:size]]
+                    started = time.perf_counter()
+                    reranker.rerank(job.text, shortlist)
+                    timings.append(time.perf_counter() - started)
+                rows.append({'shortlist': size, 'mode': 'rerank',
+                             **latency_stats(timings)})
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m talentmatch.benchmarks.shortlist_cost',
+        description='LLM and re-ranking cost of a match shortlist by size')
+    parser.add_argument('--sizes', default='5,10,20,50',
+                        help='shortlist sizes (default 5,10,20,50)')
+    parser.add_argument('--candidates', type=int, default=500,
+                        help='synthetic candidates (default 500)')
+    parser.add_argument('--jobs', type=int, default=5,
+                        help='jobs averaged over (default 5)')
+    parser.add_argument('--batch-size', type=int,
+                        help='summary batch size (default SUMMARY_BATCH_SIZE)')
+    parser.add_argument('--no-rerank', action='store_true',
+                        help='skip the cross-encoder timings')
+    parser.add_argument('--live', action='store_true',
+                        help='send the summary requests to the configured LLM')
+    parser.add_argument('--model', help='embedding model (default '
+                        'EMBEDDING_MODEL)')
+    parser.add_argument('--report', help='write the results as JSON here')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from talentmatch import EMBEDDING_MODEL
+    from talentmatch.config import Config
+    from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+    from talentmatch.etc.reranker import CrossEncoderReranker
+
+    try:
+        sizes = sorted({int(size) for size in args.sizes.split(',')})
+    except ValueError:
+        parser.error("--sizes must be a comma separated list of integers")
+    # Longer resumes, so the resume token budget matters
+    candidates, jobs = labelled_pool(args.candidates, args.jobs, args.seed,
+                                     filler=10)
+    reranker = None if args.no_rerank else CrossEncoderReranker(
+        Config.RERANK_MODEL, latency_budget_ms=float('inf'))
+    rows = run_benchmark(EmbeddingProcessor(args.model or EMBEDDING_MODEL),
+                         candidates, jobs, sizes, args.batch_size, reranker,
+                         args.live)
+    print_table(rows, ('shortlist', 'mode', 'llm_calls', 'prompt_tokens',
+                       'output_tokens', 'p50_ms', 'p95_ms'))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'arguments': vars(args), 'results': rows}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,6 +12,98 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'txt', 'pdf'}
 
+    # Streaming upload endpoint (/api/candidates/upload), zip/tar archives accepted
+    MAX_UPLOAD_CONTENT_LENGTH = env.int('MAX_UPLOAD_CONTENT_LENGTH', 1024 * 1024 * 1024)  # 1GB per request
+    MAX_UPLOAD_FILE_SIZE = env.int('MAX_UPLOAD_FILE_SIZE', 16 * 1024 * 1024)  # 16MB per resume
+    MAX_UPLOAD_FILES = env.int('MAX_UPLOAD_FILES', 5000)
+    UPLOAD_BATCH_SIZE = env.int('UPLOAD_BATCH_SIZE', 32)
+    # Resumes submitted to /api/match are extracted ahead into a bounded
+    # queue, then embedded and scored in batches
+    MATCH_BATCH_SIZE = env.int('MATCH_BATCH_SIZE', 32)
+    MATCH_QUEUE_SIZE = env.int('MATCH_QUEUE_SIZE', 64)
+    MAX_IMPORT_CONTENT_LENGTH = env.int('MAX_IMPORT_CONTENT_LENGTH', 64 * 1024 * 1024 * 1024)  # 64GB per pool archive
+
+    # Resume PDFs (/api/resumes/<name>): browser cache lifetime, and garbage
+    # collection of the unreferenced ones (interval 0 disables)
+    RESUME_CACHE_MAX_AGE = env.int('RESUME_CACHE_MAX_AGE', 365 * 24 * 3600)
+    RESUME_RETENTION_SECONDS = env.float('RESUME_RETENTION_SECONDS', 7 * 24 * 3600)
+    RESUME_GC_INTERVAL_SECONDS = env.float('RESUME_GC_INTERVAL_SECONDS', 3600)
+
     # API configuration
     MAX_CANDIDATES = 5
     MIN_SIMILARITY_THRESHOLD = 0.1
+    # Default /api/match retrieval: 'semantic' or 'hybrid' (BM25 prefilter + rank fusion)
+    RETRIEVAL_MODE = env.str('RETRIEVAL_MODE', 'semantic')
+
+    # Cross-encoder re-ranking of the best bi-encoder candidates (/api/match 'rerank')
+    RERANK_ENABLED = env.bool('RERANK_ENABLED', False)
+    RERANK_MODEL = env.str('RERANK_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+    RERANK_SHORTLIST = env.int('RERANK_SHORTLIST', 20)
+    RERANK_LATENCY_BUDGET_MS = env.float('RERANK_LATENCY_BUDGET_MS', 500)
+
+    # Local match explanations (/api/match 'explain'): resume sections closest to the job requirements
+    EXPLANATIONS_ENABLED = env.bool('EXPLANATIONS_ENABLED', True)
+    EXPLANATION_SNIPPETS = env.int('EXPLANATION_SNIPPETS', 3)
+    EXPLANATION_CACHE_SIZE = env.int('EXPLANATION_CACHE_SIZE', 2000)  # resumes with cached section embeddings
+    # Default of /api/match 'summaries', false answers with explanations only
+    LLM_SUMMARIES_ENABLED = env.bool('LLM_SUMMARIES_ENABLED', True)
+
+    # Whole /api/match results of repeated requests (ETag / If-None-Match), in memory
+    MATCH_CACHE_ENABLED = env.bool('MATCH_CACHE_ENABLED', True)
+    MATCH_CACHE_TTL_SECONDS = env.float('MATCH_CACHE_TTL_SECONDS', 600)
+    MATCH_CACHE_MAX_ENTRIES = env.int('MATCH_CACHE_MAX_ENTRIES', 256)
+    MATCH_CACHE_MAX_BYTES = env.int('MATCH_CACHE_MAX_BYTES', 128 * 1024 * 1024)
+
+    # LLM summary prompts: input token budgets (local tokenizer) and output cap
+    SUMMARY_JOB_TOKEN_BUDGET = env.int('SUMMARY_JOB_TOKEN_BUDGET', 600)
+    SUMMARY_RESUME_TOKEN_BUDGET = env.int('SUMMARY_RESUME_TOKEN_BUDGET', 1200)
+    SUMMARY_MAX_OUTPUT_TOKENS = env.int('SUMMARY_MAX_OUTPUT_TOKENS', 400)
+    # Candidates summarized per LLM call (1 disables batching) and batch input token budget
+    SUMMARY_BATCH_SIZE = env.int('SUMMARY_BATCH_SIZE', 8)
+    SUMMARY_BATCH_TOKEN_BUDGET = env.int('SUMMARY_BATCH_TOKEN_BUDGET', 6000)
+
+    # Persistent LLM response cache (sqlite), keyed by model, temperature and prompt hash
+    LLM_CACHE_ENABLED = env.bool('LLM_CACHE_ENABLED', True)
+    LLM_CACHE_PATH = env.str('LLM_CACHE_PATH', os.path.join('uploads', 'llm_cache.sqlite3'))
+    LLM_CACHE_TTL_SECONDS = env.float('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600)
+    LLM_CACHE_MAX_BYTES = env.int('LLM_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+
+    # Upstream LLM guards: rate limits (0 disables), timeout, retries, hedging (0 disables)
+    LLM_REQUESTS_PER_MINUTE = env.int('LLM_REQUESTS_PER_MINUTE', 300)
+    LLM_TOKENS_PER_MINUTE = env.int('LLM_TOKENS_PER_MINUTE', 1000000)
+    LLM_REQUEST_TIMEOUT = env.float('LLM_REQUEST_TIMEOUT', 60)
+    LLM_MAX_RETRIES = env.int('LLM_MAX_RETRIES', 2)
+    LLM_HEDGE_AFTER_SECONDS = env.float('LLM_HEDGE_AFTER_SECONDS', 20)
+    # Circuit breaker: failure rate over the last window that falls back to heuristic summaries
+    LLM_BREAKER_FAILURE_RATE = env.float('LLM_BREAKER_FAILURE_RATE', 0.5)
+    LLM_BREAKER_MIN_REQUESTS = env.int('LLM_BREAKER_MIN_REQUESTS', 5)
+    LLM_BREAKER_WINDOW = env.int('LLM_BREAKER_WINDOW', 20)
+    LLM_BREAKER_COOLDOWN_SECONDS = env.float('LLM_BREAKER_COOLDOWN_SECONDS', 30)
+
+    # Background re-embedding of the stored candidates when switching embedding models
+    EMBEDDING_MIGRATION_BATCH_SIZE = env.int('EMBEDDING_MIGRATION_BATCH_SIZE', 64)
+    # Reduced embeddings for shortlist scoring of large pools: 'none', 'pca' or 'prefix' (Matryoshka models)
+    EMBEDDING_REDUCTION = env.str('EMBEDDING_REDUCTION', 'none')
+    EMBEDDING_REDUCED_DIMENSIONS = env.int('EMBEDDING_REDUCED_DIMENSIONS', 128)
+    EMBEDDING_REDUCTION_MIN_CANDIDATES = env.int('EMBEDDING_REDUCTION_MIN_CANDIDATES', 2000)
+    # Sharded scoring: worker processes holding the embeddings partitioned by id hash (0 = in process)
+    SHARD_COUNT = env.int('SHARD_COUNT', 0)
+    SHARD_TIMEOUT_SECONDS = env.float('SHARD_TIMEOUT_SECONDS', 10)
+
+    # Deduplication: estimated Jaccard similarity above which resumes are near duplicates
+    NEAR_DUPLICATE_THRESHOLD = env.float('NEAR_DUPLICATE_THRESHOLD', 0.85)
+
+    # Structured resume fields: rule-based, completed by the LLM when enabled
+    LLM_FIELD_EXTRACTION = env.bool('LLM_FIELD_EXTRACTION', False)
+
+    # Async serving mode: worker threads for PDF parsing, file I/O and embeddings
+    ASYNC_EXECUTOR_WORKERS = env.int('ASYNC_EXECUTOR_WORKERS', 8)
+
+    # Memory diagnostics (/api/admin/memory), off by default: tracemalloc
+    # frames kept per allocation (0 disables tracing) and sites per report.
+    # Tracing hooks every allocation and keeps a traceback per live block, a
+    # significant CPU and memory overhead: not meant for production, enable
+    # it on a staging or canary instance while investigating
+    MEMORY_DIAGNOSTICS_ENABLED = env.bool('MEMORY_DIAGNOSTICS_ENABLED', False)
+    MEMORY_TRACE_FRAMES = env.int('MEMORY_TRACE_FRAMES', 10)
+    MEMORY_TOP_N = env.int('MEMORY_TOP_N', 25)
@@ -0,0 +1,228 @@
+"""
+Filter expressions over candidate metadata, evaluated as NumPy masks
+"""
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from talentmatch.etc.fieldextractor import (EDUCATION_LEVELS, SENIORITY_LEVELS, SKILL_INDEX, SKILLS,
+                                            canonical_skill)
+
+NUMERIC_OPERATORS = ('eq', 'ne', 'gt', 'gte', 'lt', 'lte')
+CATEGORICAL_OPERATORS = ('eq', 'ne', 'in', 'nin')
+SET_OPERATORS = ('any', 'all', 'none')
+
+# Filterable field -> (kind, allowed operators)
+FILTER_FIELDS = {
+    'years_experience': ('numeric', NUMERIC_OPERATORS),
+    'education': ('ordinal', NUMERIC_OPERATORS + ('in', 'nin')),
+    'seniority': ('ordinal', NUMERIC_OPERATORS + ('in', 'nin')),
+    'location': ('categorical', CATEGORICAL_OPERATORS),
+    'skills': ('set', SET_OPERATORS),
+    'tags': ('set', SET_OPERATORS),
+}
+_ORDINAL_LEVELS = {
+    'education': EDUCATION_LEVELS,
+    'seniority': SENIORITY_LEVELS,
+}
+
+
+class CandidateFilter:
+    """
+    Conjunction of conditions on candidate metadata
+
+    Expressions map a field to an {operator: value} object, to a plain
+    value meaning equality or to a list meaning any of its values ('in',
+    'any' for skills and tags), for example:
+
+        {"skills.python": {"gte": 5}, "education": {"gte": "bachelor"},
+         "location": {"in": ["Berlin", "Remote"]}, "tags": {"any": ["visa"]}}
+
+    'skills.<skill>' compares the years of experience with a skill. Masks are
+    computed over metadata columns (see build_columns and CandidateStorage),
+    unknown values never satisfy a comparison.
+    """
+
+    def __init__(self, conditions: List[Tuple[str, str, Any]]):
+        self.conditions = conditions
+
+    @classmethod
+    def parse(cls, expression) -> 'CandidateFilter':
+        """Validate a filter expression, None when it is empty"""
+        if not expression:
+            return None
+        if not isinstance(expression, dict):
+            raise ValueError("filters must be an object of field conditions")
+
+        conditions = []
+        for field, condition in expression.items():
+            if isinstance(condition, list):
+                # A plain list means any of its values
+                kind = FILTER_FIELDS.get(field, (None,))[0]
+                condition = {'any' if kind == 'set' else 'in': condition}
+            elif not isinstance(condition, dict):
+                condition = {'eq': condition}
+            for operator, value in condition.items():
+                conditions.append(cls._parse_condition(field, operator, value))
+        return cls(conditions)
+
+    @staticmethod
+    def _parse_condition(field: str, operator: str, value) -> Tuple[str, str, Any]:
+        """Validate one condition and normalize its value"""
+        if field.startswith('skills.'):
+            skill = canonical_skill(field[len('skills.'):])
+            if skill not in SKILL_INDEX:
+                raise ValueError(f"Unknown skill {skill!r} in filters")
+            kind, operators, field = 'numeric', NUMERIC_OPERATORS, f'skills.{skill}'
+        elif field in FILTER_FIELDS:
+            kind, operators = FILTER_FIELDS[field]
+        else:
+            raise ValueError(f"Unknown filter field {field!r}")
+
+        if operator not in operators:
+            raise ValueError(
+                f"Unsupported operator {operator!r} for {field}, expected one "
+                f"of {', '.join(operators)}")
+
+        if kind == 'numeric':
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{field} filter value must be a number")
+            return field, operator, float(value)
+
+        values = value if isinstance(value, list) else [value]
+        if operator in ('in', 'nin', 'any', 'all', 'none') and \
+                not isinstance(value, list):
+            raise ValueError(f"{field} {operator} filter value must be a list")
+        if operator in ('eq', 'ne') and isinstance(value, list):
+            raise ValueError(
+                f"{field} {operator} filter value must be a single value, use "
+                f"{'in' if operator == 'eq' else 'nin'} for a list")
+
+        if kind == 'ordinal':
+            levels = _ORDINAL_LEVELS[field]
+            unknown = [level for level in values if level not in levels]
+            if unknown:
+                raise ValueError(
+                    f"Unknown {field} {unknown[0]!r}, expected one of "
+                    f"{', '.join(levels)}")
+            indexes = [levels.index(level) for level in values]
+            return field, operator, indexes if isinstance(value, list) \
+                else indexes[0]
+
+        if field == 'skills':
+            values = [canonical_skill(str(skill)) for skill in values]
+            unknown = [skill for skill in values if skill not in SKILL_INDEX]
+            if unknown:
+                raise ValueError(f"Unknown skill {unknown[0]!r} in filters")
+            return field, operator, values
+
+        values = [normalize_metadata(item) for item in values]
+        return field, operator, values if isinstance(value, list) \
+            else values[0]
+
+    def mask(self, columns: Dict[str, Any]) -> np.ndarray:
+        """Evaluate the filter over metadata columns of n candidates"""
+        size = len(columns['years_experience'])
+        mask = np.ones(size, dtype=bool)
+        for field, operator, value in self.conditions:
+            mask &= self._condition_mask(columns, size, field, operator, value)
+        return mask
+
+    def mask_candidates(self, candidates: List[Dict]) -> np.ndarray:
+        """Evaluate the filter over candidate dicts"""
+        return self.mask(build_columns(candidates))
+
+    @staticmethod
+    def _condition_mask(columns, size, field, operator, value) -> np.ndarray:
+        """Mask of one condition"""
+        if field.startswith('skills.'):
+            column = columns['skill_years'][:, SKILL_INDEX[field[7:]]]
+        elif field == 'skills':
+            present = ~np.isnan(columns['skill_years'])
+            column_masks = [present[:, SKILL_INDEX[skill]] for skill in value]
+            return _set_mask(column_masks, operator, size)
+        elif field == 'tags':
+            empty = np.zeros(size, dtype=bool)
+            column_masks = [columns['tags'].get(tag, empty) for tag in value]
+            return _set_mask(column_masks, operator, size)
+        else:
+            column = columns[field]
+
+        if field in _ORDINAL_LEVELS:
+            # -1 marks an unknown level
+            known = column >= 0
+        elif field == 'location':
+            known = column != ''
+        else:
+            # NaN marks an unknown number
+            known = ~np.isnan(column)
+
+        if operator in ('in', 'nin'):
+            inside = np.isin(column, value)
+            return known & (inside if operator == 'in' else ~inside)
+        return known & _compare(column, operator, value)
+
+
+def _compare(column: np.ndarray, operator: str, value) -> np.ndarray:
+    """Vectorized comparison"""
+    if operator == 'eq':
+        return column == value
+    if operator == 'ne':
+        return column != value
+    if operator == 'gt':
+        return column > value
+    if operator == 'gte':
+        return column >= value
+    if operator == 'lt':
+        return column < value
+    return column <= value
+
+
+def _set_mask(column_masks: List[np.ndarray], operator: str,
+              size: int) -> np.ndarray:
+    """Combine membership masks of several set values"""
+    if not column_masks:
+        return np.full(size, operator != 'any', dtype=bool)
+    if operator == 'all':
+        return np.logical_and.reduce(column_masks)
+    matched = np.logical_or.reduce(column_masks)
+    return matched if operator == 'any' else ~matched
+
+
+def normalize_metadata(value) -> str:
+    """Normalize a location or tag value for comparisons"""
+    return str(value or '').strip().lower()
+
+
+def build_columns(candidates: List[Dict]) -> Dict[str, Any]:
+    """
+    Metadata columns of candidate dicts (with 'fields', 'location' and
+    'tags'), laid out like the CandidateStorage columns
+    """
+    size = len(candidates)
+    columns = {
+        'years_experience': np.full(size, np.nan, dtype=np.float32),
+        'education': np.full(size, -1, dtype=np.int8),
+        'seniority': np.full(size, -1, dtype=np.int8),
+        'skill_years': np.full((size, len(SKILLS)), np.nan, dtype=np.float32),
+        'location': np.empty(size, dtype=object),
+        'tags': {},
+    }
+    for row, candidate in enumerate(candidates):
+        fields = candidate.get('fields') or {}
+        if fields.get('years_experience') is not None:
+            columns['years_experience'][row] = fields['years_experience']
+        if fields.get('education') in EDUCATION_LEVELS:
+            columns['education'][row] = EDUCATION_LEVELS.index(
+                fields['education'])
+        if fields.get('seniority') in SENIORITY_LEVELS:
+            columns['seniority'][row] = SENIORITY_LEVELS.index(
+                fields['seniority'])
+        for skill, years in (fields.get('skill_years') or {}).items():
+            if skill in SKILL_INDEX:
+                columns['skill_years'][row, SKILL_INDEX[skill]] = years
+        columns['location'][row] = normalize_metadata(candidate.get('location'))
+        for tag in candidate.get('tags') or []:
+            tag = normalize_metadata(tag)
+            if tag not in columns['tags']:
+                columns['tags'][tag] = np.zeros(size, dtype=bool)
+            columns['tags'][tag][row] = True
+    return columns
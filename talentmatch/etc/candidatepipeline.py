@@ -0,0 +1,163 @@
+"""
+Streaming processing of submitted candidates with a running top k
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import heapq
+import queue
+import threading
+import numpy as np
+from talentmatch.etc.deduplicator import Deduplicator
+from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+from talentmatch.etc.fieldextractor import FieldExtractor
+from talentmatch.etc.candidatefilter import CandidateFilter
+from talentmatch.utils import (candidate_resume_text, filter_candidates,
+                               prepare_candidate, save_resume_pdfs,
+                               split_duplicates)
+
+_END = object()
+
+
+class CandidatePipeline:
+    """
+    Candidates processed in stages connected by bounded queues
+
+    A background thread decodes and extracts the resumes (PDF parsing) into a
+    queue of at most queue_size texts. The calling thread deduplicates,
+    filters and embeds them batch by batch while extraction goes on, and
+    top_candidates() keeps only the best ones of each scored batch. Memory is
+    bounded by the queue, a batch and the kept candidates, whatever the
+    number of candidates.
+
+    One pipeline processes the candidates of one request, it counts them in
+    processed_count, filtered_count and duplicates.
+    """
+
+    def __init__(
+        self,
+        embedding_processor: EmbeddingProcessor,
+        deduplicator: Deduplicator = None,
+        field_extractor: FieldExtractor = None,
+        candidate_filter: CandidateFilter = None,
+        batch_size: int = 32,
+        queue_size: int = 64,
+    ):
+        self.embedding_processor = embedding_processor
+        self.deduplicator = deduplicator
+        self.field_extractor = field_extractor
+        self.candidate_filter = candidate_filter
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        # Unique candidates kept by the filter, whether or not top k kept them
+        self.processed_count = 0
+        self.filtered_count = 0
+        self.duplicates: List[Dict[str, Any]] = []
+
+    def _extracted(self,
+                   candidates: Iterable[Dict]) -> Iterator[Tuple[Dict, str]]:
+        """(candidate, resume text), extracted ahead by a background thread"""
+        extracted = queue.Queue(maxsize=self.queue_size)
+        stopped = threading.Event()
+
+        def put(item) -> bool:
+            while not stopped.is_set():
+                try:
+                    extracted.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def extract():
+            try:
+                for candidate in candidates:
+                    if not put((candidate, candidate_resume_text(candidate))):
+                        return
+            except Exception as e:
+                put(e)
+            put(_END)
+
+        threading.Thread(target=extract, name='candidate-extraction',
+                         daemon=True).start()
+        try:
+            while True:
+                item = extracted.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Stops the thread when the consumer gives up early
+            stopped.set()
+
+    def process(self, candidates: Iterable[Dict]) -> Iterator[List[Dict]]:
+        """
+        Batches of unique candidates kept by the filter, with float32
+        'embedding' arrays; PDFs are not written
+        """
+        batch_deduplicator = self.deduplicator.copy_empty() \
+            if self.deduplicator is not None else None
+        batch = []
+        for candidate, resume_text in self._extracted(candidates):
+            batch.append(prepare_candidate(candidate, resume_text,
+                                           self.deduplicator,
+                                           batch_deduplicator,
+                                           self.field_extractor))
+            if len(batch) == self.batch_size:
+                yield from self._embed(batch)
+                batch = []
+        if batch:
+            yield from self._embed(batch)
+
+    def _embed(self, batch: List[Dict]) -> Iterator[List[Dict]]:
+        """Embed the unique candidates of a batch the filter keeps"""
+        unique, duplicates = split_duplicates(batch)
+        self.duplicates.extend(duplicates)
+        if self.candidate_filter is not None and unique:
+            kept = filter_candidates(self.candidate_filter, unique)
+            self.filtered_count += len(unique) - len(kept)
+            unique = kept
+        if not unique:
+            return
+
+        embeddings = self.embedding_processor.generate_embeddings(
+            [candidate['resume_text'] for candidate in unique])
+        for candidate, embedding in zip(unique, embeddings):
+            candidate['embedding'] = np.asarray(embedding, dtype=np.float32)
+        self.processed_count += len(unique)
+        yield unique
+
+    def top_candidates(
+        self,
+        candidates: Iterable[Dict],
+        job_embedding: np.ndarray,
+        limit: int,
+    ) -> List[Dict]:
+        """
+        The limit candidates most similar to the job, in submission order,
+        with their resume PDF written
+
+        Each batch is scored as soon as it is embedded; the others are
+        dropped, resume text and embedding included.
+        """
+        kept: List[Tuple[float, int, Dict]] = []
+        position = 0
+        for batch in self.process(candidates):
+            similarities = self.embedding_processor.calculate_similarities(
+                job_embedding,
+                np.stack([candidate['embedding'] for candidate in batch]))
+            for candidate, similarity in zip(batch, similarities):
+                # Ties keep the earlier candidate
+                entry = (float(similarity), -position, candidate)
+                position += 1
+                if len(kept) < limit:
+                    heapq.heappush(kept, entry)
+                elif entry[:2] > kept[0][:2]:
+                    heapq.heapreplace(kept, entry)
+
+        top = [
+            candidate for _, _, candidate in sorted(
+                kept, key=lambda entry: entry[1], reverse=True)
+        ]
+        save_resume_pdfs(top)
+        return top
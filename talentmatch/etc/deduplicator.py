@@ -0,0 +1,222 @@
+"""
+Exact and near-duplicate resume detection
+"""
+from typing import Any, Dict, List, NamedTuple, Optional
+import threading
+import zlib
+import numpy as np
+from talentmatch.utils import normalize_resume_text, resume_content_hash
+
+# Mersenne prime used for the universal hash family of the MinHash permutations
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class ResumeFingerprint(NamedTuple):
+    """Content hash and MinHash signature of a resume"""
+    content_hash: str
+    signature: np.ndarray
+
+
+class Deduplicator:
+    """
+    Detect duplicated resumes before any embedding or LLM work is spent on them.
+
+    Exact duplicates are found by a hash of the normalized resume text, near
+    duplicates by MinHash signatures over word shingles bucketed with LSH and
+    verified against the estimated Jaccard similarity. Texts of fewer than
+    min_tokens words (e.g. a scanned PDF without extractable text) are not
+    fingerprinted: they would all share one hash and signature and be
+    reported as duplicates of each other. Lookups and updates are
+    serialized by an internal lock.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 3,
+        seed: int = 42,
+        min_tokens: int = 5,
+    ):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.min_tokens = min_tokens
+
+        # Keep a * x + b below 2**64 so the modulo stays exact in uint64
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, 1 << 31, size=num_perm,
+                                    dtype=np.int64).astype(np.uint64)
+        self._b = generator.randint(0, 1 << 31, size=num_perm,
+                                    dtype=np.int64).astype(np.uint64)
+
+        self._by_hash: Dict[str, str] = {}
+        self._by_id: Dict[str, ResumeFingerprint] = {}
+        # Band key -> candidate id, or set of ids when several share it
+        self._buckets: List[Dict[bytes, Any]] = [{} for _ in range(bands)]
+        self._lock = threading.RLock()
+
+    def copy_empty(self) -> 'Deduplicator':
+        """Create an empty deduplicator with the same parameters"""
+        return Deduplicator(
+            threshold=self.threshold,
+            num_perm=self.num_perm,
+            bands=self.bands,
+            shingle_size=self.shingle_size,
+            seed=self.seed,
+            min_tokens=self.min_tokens,
+        )
+
+    def fingerprint(self, text: str) -> Optional[ResumeFingerprint]:
+        """
+        Compute content hash and MinHash signature of a resume text, None when
+        it is too short to be compared
+        """
+        normalized = normalize_resume_text(text)
+        if len(normalized.split()) < self.min_tokens:
+            return None
+        return ResumeFingerprint(
+            content_hash=resume_content_hash(normalized, normalized=True),
+            signature=self._signature(normalized),
+        )
+
+    def find_duplicate(self,
+                       fingerprint: ResumeFingerprint,
+                       exclude_id: str = None) -> Optional[Dict]:
+        """
+        Return the stored candidate duplicated by the fingerprint, if any,
+        other than exclude_id (e.g. the candidate being replaced)
+        """
+        with self._lock:
+            candidate_id = self._by_hash.get(fingerprint.content_hash)
+            if candidate_id is not None and candidate_id != exclude_id:
+                return {
+                    'id': candidate_id,
+                    'match': 'exact',
+                    'similarity': 1.0
+                }
+
+            best_id, best_similarity = None, 0.0
+            for candidate_id in self._lsh_candidates(fingerprint.signature):
+                if candidate_id == exclude_id:
+                    continue
+                similarity = self.estimate_similarity(
+                    fingerprint.signature,
+                    self._by_id[candidate_id].signature,
+                )
+                if similarity > best_similarity:
+                    best_id, best_similarity = candidate_id, similarity
+
+            if best_id is not None and best_similarity >= self.threshold:
+                return {
+                    'id': best_id,
+                    'match': 'near',
+                    'similarity': best_similarity
+                }
+            return None
+
+    def add(self, candidate_id: str, fingerprint: ResumeFingerprint):
+        """Register a candidate fingerprint"""
+        with self._lock:
+            if candidate_id in self._by_id:
+                self.remove(candidate_id)
+
+            self._by_hash.setdefault(fingerprint.content_hash, candidate_id)
+            self._by_id[candidate_id] = fingerprint
+            for band, key in enumerate(self._band_keys(fingerprint.signature)):
+                buckets = self._buckets[band]
+                bucket = buckets.get(key)
+                # Most buckets hold a single id, stored without a set
+                if bucket is None:
+                    buckets[key] = candidate_id
+                elif isinstance(bucket, set):
+                    bucket.add(candidate_id)
+                elif bucket != candidate_id:
+                    buckets[key] = {bucket, candidate_id}
+
+    def remove(self, candidate_id: str):
+        """Forget a candidate fingerprint"""
+        with self._lock:
+            fingerprint = self._by_id.pop(candidate_id, None)
+            if fingerprint is None:
+                return
+
+            if self._by_hash.get(fingerprint.content_hash) == candidate_id:
+                del self._by_hash[fingerprint.content_hash]
+            for band, key in enumerate(self._band_keys(fingerprint.signature)):
+                buckets = self._buckets[band]
+                bucket = buckets.get(key)
+                if isinstance(bucket, set):
+                    bucket.discard(candidate_id)
+                    if len(bucket) == 1:
+                        buckets[key] = bucket.pop()
+                elif bucket == candidate_id:
+                    del buckets[key]
+
+    def clear(self):
+        """Forget all fingerprints"""
+        with self._lock:
+            self._by_hash.clear()
+            self._by_id.clear()
+            for bucket in self._buckets:
+                bucket.clear()
+
+    def count(self) -> int:
+        """Get registered fingerprint count"""
+        return len(self._by_id)
+
+    @staticmethod
+    def estimate_similarity(signature1: np.ndarray,
+                            signature2: np.ndarray) -> float:
+        """Estimate Jaccard similarity from two MinHash signatures"""
+        return float(np.mean(signature1 == signature2))
+
+    def _shingles(self, normalized: str) -> np.ndarray:
+        """Hash word shingles of a normalized text to 32-bit integers"""
+        words = normalized.split()
+        if len(words) < self.shingle_size:
+            shingles = {' '.join(words)}
+        else:
+            shingles = {
+                ' '.join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)
+            }
+        return np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+
+    def _signature(self, normalized: str) -> np.ndarray:
+        """Compute the MinHash signature of a normalized text"""
+        shingles = self._shingles(normalized)
+        # (num_perm, n_shingles) permuted hashes, minimum per permutation
+        hashed = (np.outer(self._a, shingles) + self._b[:, None]) \
+            % _MERSENNE_PRIME
+        return np.bitwise_and(hashed, _MAX_HASH).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """Split a signature into LSH band keys"""
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def _lsh_candidates(self, signature: np.ndarray) -> set:
+        """Collect candidate ids sharing at least one LSH band"""
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(key)
+            if isinstance(bucket, set):
+                candidates.update(bucket)
+            elif bucket is not None:
+                candidates.add(bucket)
+        return candidates
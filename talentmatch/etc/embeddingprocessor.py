@@ -1,7 +1,10 @@
+from typing import List
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
-import re
+import threading
+from talentmatch.etc.projection import EmbeddingProjection
+from talentmatch.utils import clean_text
 
 
 class EmbeddingProcessor:
@@ -9,27 +12,68 @@ class EmbeddingProcessor:
     def __init__(self, model_name: str = 'all-mpnet-base-v2'):
         """Initialize embedding processor"""
         self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        # Tags embeddings so precomputed vectors can be checked against the model
+        self.fingerprint = f"{model_name}:{self.dimension}"
+        # The HF tokenizer behind the model is not safe for concurrent use
+        self._encode_lock = threading.Lock()
 
     def generate_embedding(self, text: str) -> np.ndarray:
         """Generate text embedding"""
         # Clean text
         cleaned_text = self._clean_text(text)
         # Generate embedding
-        embedding = self.model.encode(
-            cleaned_text,
-            show_progress_bar=True,
-        )
+        with self._encode_lock:
+            embedding = self.model.encode(
+                cleaned_text,
+                show_progress_bar=False,
+            )
         return embedding
 
+    def generate_embeddings(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+    ) -> np.ndarray:
+        """Generate embeddings of several texts in batched encode calls"""
+        cleaned_texts = [self._clean_text(text) for text in texts]
+        with self._encode_lock:
+            embeddings = self.model.encode(
+                cleaned_texts,
+                batch_size=batch_size,
+                show_progress_bar=False,
+            )
+        return np.asarray(embeddings)
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """
+        Count the tokens of several texts with the local model tokenizer
+        (about 4 characters per token when the model has none)
+        """
+        tokenizer = getattr(self.model, 'tokenizer', None)
+        if tokenizer is None:
+            return [len(text) // 4 + 1 for text in texts]
+        with self._encode_lock:
+            encoded = tokenizer(list(texts), add_special_tokens=False)
+        return [len(input_ids) for input_ids in encoded['input_ids']]
+
+    def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        """Cut a text after max_tokens tokens, keeping the original characters"""
+        tokenizer = getattr(self.model, 'tokenizer', None)
+        if tokenizer is None or not getattr(tokenizer, 'is_fast', False):
+            return text[:max_tokens * 4]
+        with self._encode_lock:
+            offsets = tokenizer(text,
+                                add_special_tokens=False,
+                                return_offsets_mapping=True)['offset_mapping']
+        if len(offsets) <= max_tokens:
+            return text
+        return text[:offsets[max_tokens - 1][1]] if max_tokens > 0 else ''
+
     def _clean_text(self, text: str) -> str:
         """Clean text, remove special characters and extra spaces"""
-        # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
-        # Remove special characters, keep letters, numbers, spaces and basic punctuation
-        text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)]', '', text)
-        # Remove extra spaces
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        return clean_text(text)
 
     def calculate_similarity(
         self,
@@ -45,3 +89,27 @@ class EmbeddingProcessor:
 
         similarity = cosine_similarity(embedding1, embedding2)[0][0]
         return float(similarity)
+
+    def calculate_similarities(
+        self,
+        embedding: np.ndarray,
+        embeddings: np.ndarray,
+    ) -> np.ndarray:
+        """Cosine similarities of one embedding with each row of a matrix"""
+        return cosine_similarity(embedding.reshape(1, -1), embeddings)[0]
+
+    def shortlist_reduced(
+        self,
+        embedding: np.ndarray,
+        reduced_embeddings: np.ndarray,
+        projection: EmbeddingProjection,
+        limit: int,
+    ) -> np.ndarray:
+        """
+        Row indices of the limit reduced embeddings most similar to an
+        embedding, which is projected the same way first (unordered)
+        """
+        if len(reduced_embeddings) <= limit:
+            return np.arange(len(reduced_embeddings))
+        similarities = reduced_embeddings @ projection.transform(embedding)[0]
+        return np.argpartition(-similarities, limit - 1)[:limit]
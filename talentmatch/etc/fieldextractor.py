@@ -0,0 +1,378 @@
+"""
+Structured field extraction from resume texts (skills, titles, years, education)
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import date
+import json
+import re
+import threading
+from talentmatch.utils import resume_content_hash
+from talentmatch.etc.llmclient import LLMClient
+
+# Canonical skill name -> aliases matched in resume texts
+SKILL_ALIASES = {
+    'python': ('python', ),
+    'java': ('java', ),
+    'javascript': ('javascript', 'js'),
+    'typescript': ('typescript', ),
+    'c++': ('c++', 'cpp'),
+    'c#': ('c#', 'csharp'),
+    'go': ('golang', ),
+    'rust': ('rust', ),
+    'ruby': ('ruby', ),
+    'php': ('php', ),
+    'scala': ('scala', ),
+    'kotlin': ('kotlin', ),
+    'swift': ('swift', ),
+    'sql': ('sql', ),
+    'postgresql': ('postgresql', 'postgres'),
+    'mysql': ('mysql', ),
+    'mongodb': ('mongodb', 'mongo'),
+    'redis': ('redis', ),
+    'elasticsearch': ('elasticsearch', ),
+    'django': ('django', ),
+    'flask': ('flask', ),
+    'fastapi': ('fastapi', ),
+    'spring': ('spring', 'spring boot'),
+    'react': ('react', 'react.js', 'reactjs'),
+    'angular': ('angular', ),
+    'vue': ('vue', 'vue.js', 'vuejs'),
+    'node.js': ('node.js', 'nodejs', 'node'),
+    'graphql': ('graphql', ),
+    'rest': ('rest api', 'restful'),
+    'microservices': ('microservices', ),
+    'aws': ('aws', 'amazon web services'),
+    'azure': ('azure', ),
+    'gcp': ('gcp', 'google cloud'),
+    'docker': ('docker', ),
+    'kubernetes': ('kubernetes', 'k8s'),
+    'terraform': ('terraform', ),
+    'linux': ('linux', ),
+    'git': ('git', ),
+    'ci/cd': ('ci/cd', 'ci-cd', 'continuous integration'),
+    'spark': ('spark', 'pyspark'),
+    'hadoop': ('hadoop', ),
+    'kafka': ('kafka', ),
+    'machine learning': ('machine learning', 'ml'),
+    'deep learning': ('deep learning', ),
+    'nlp': ('nlp', 'natural language processing'),
+    'computer vision': ('computer vision', ),
+    'pytorch': ('pytorch', ),
+    'tensorflow': ('tensorflow', ),
+    'scikit-learn': ('scikit-learn', 'sklearn'),
+    'pandas': ('pandas', ),
+    'numpy': ('numpy', ),
+    'excel': ('excel', ),
+    'tableau': ('tableau', ),
+    'power bi': ('power bi', ),
+    'figma': ('figma', ),
+    'agile': ('agile', 'scrum'),
+}
+# Column order of the per-skill arrays kept by CandidateStorage
+SKILLS = tuple(SKILL_ALIASES)
+SKILL_INDEX = {skill: index for index, skill in enumerate(SKILLS)}
+
+# Ordered levels, stored as their index
+EDUCATION_LEVELS = ('none', 'associate', 'bachelor', 'master', 'doctorate')
+SENIORITY_LEVELS = ('intern', 'junior', 'mid', 'senior', 'lead', 'executive')
+
+_SKILL_PATTERNS = [
+    (skill,
+     re.compile('|'.join(r'(?<![\w+#.])' + re.escape(alias) + r'(?![\w+#])'
+                         for alias in aliases)))
+    for skill, aliases in SKILL_ALIASES.items()
+]
+_ALIAS_TO_SKILL = {
+    alias: skill
+    for skill, aliases in SKILL_ALIASES.items() for alias in aliases + (skill, )
+}
+
+_EDUCATION_PATTERNS = [
+    ('doctorate', re.compile(r'\bph\.?\s?d\b|\bdoctor(?:ate| of)\b')),
+    ('master', re.compile(r"\bmaster'?s?\b|\bm\.?sc\b|\bm\.s\.|\bmba\b|\bm\.?eng\b")),
+    ('bachelor', re.compile(
+        r"\bbachelor'?s?\b|\bb\.?sc\b|\bb\.s\.|\bb\.a\.|\bb\.?eng\b|\bb\.?tech\b")),
+    ('associate', re.compile(r"\bassociate'?s? degree\b")),
+]
+_DEGREE_LINE = re.compile(
+    r'\b(?:university|college|school|degree|bachelor|master|ph\.?\s?d|b\.?sc|m\.?sc)\b')
+
+_TITLE_PATTERN = re.compile(
+    r"\b((?:senior|sr\.?|junior|jr\.?|lead|principal|staff|chief|head of)\s+)?"
+    r"((?:[a-z][\w/+#.-]*\s+){0,2})"
+    r"(engineer|developer|scientist|analyst|manager|designer|architect|"
+    r"consultant|administrator|programmer|intern|director)\b")
+_TITLE_STOPWORDS = {
+    'a', 'an', 'the', 'as', 'am', 'i', 'was', 'is', 'and', 'of', 'with',
+    'for', 'at', 'to', 'in', 'worked', 'work', 'working', 'experienced'
+}
+_SENIORITY_PATTERNS = [
+    ('executive', re.compile(r'\b(?:head of|director|chief|vp|cto|ceo)\b')),
+    ('lead', re.compile(r'\b(?:lead|principal|staff|architect)\b')),
+    ('senior', re.compile(r'\b(?:senior|sr\.?)\s')),
+    ('junior', re.compile(r'\b(?:junior|jr\.?)\s')),
+    ('intern', re.compile(r'\bintern\b')),
+]
+
+_YEARS = r'(\d{1,2}(?:\.\d)?)\+?\s*(?:years?|yrs?)'
+_TOTAL_YEARS_PATTERN = re.compile(
+    _YEARS + r'\s+(?:of\s+)?(?:professional\s+|industry\s+|work\s+|relevant\s+)?experience')
+_YEARS_PATTERN = re.compile(_YEARS)
+_DATE_RANGE_PATTERN = re.compile(
+    r'\b((?:19|20)\d{2})\s*(?:-|–|—|to|until)\s*((?:19|20)\d{2}|present|current|now|today)\b')
+# Years mentioned further away than this from a skill are not attributed to it
+_YEARS_DISTANCE = 40
+
+
+class FieldExtractor:
+    """
+    Extract structured fields from resume texts at ingest time
+
+    Fields are parsed by rules (skill vocabulary, title and degree patterns,
+    date ranges) and, when use_llm is set, completed by an LLM extraction.
+    Results are cached by resume content hash so a resume is only analysed
+    once. The returned dicts are shared with the cache, do not mutate them.
+    """
+
+    def __init__(
+        self,
+        use_llm: bool = False,
+        max_cache_entries: int = 10000,
+        llm_client: LLMClient = None,
+    ):
+        self.use_llm = use_llm
+        self.llm_client = llm_client or LLMClient()
+        self.max_cache_entries = max_cache_entries
+        self._cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def extract(self, text: str, content_hash: str = None) -> Dict[str, Any]:
+        """
+        Extract the fields of a resume text:
+        skills, skill_years, titles, years_experience, education, seniority
+        """
+        content_hash = content_hash or resume_content_hash(text)
+        with self._lock:
+            fields = self._cache.get(content_hash)
+            if fields is not None:
+                self._cache.move_to_end(content_hash)
+                return fields
+
+        fields = self.extract_rules(text)
+        if self.use_llm:
+            fields = self._merge_llm_fields(fields,
+                                            self._query_llm_for_fields(text))
+
+        with self._lock:
+            self._cache[content_hash] = fields
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+        return fields
+
+    def cache_size(self) -> int:
+        """Get cached extraction count"""
+        return len(self._cache)
+
+    def extract_rules(self, text: str) -> Dict[str, Any]:
+        """Rule-based extraction"""
+        lines = [line.strip().lower() for line in (text or '').splitlines()]
+        lines = [line for line in lines if line]
+        today = date.today().year
+
+        skill_years: Dict[str, float] = {}
+        skill_ranges: Dict[str, List[Tuple[int, int]]] = {}
+        all_ranges: List[Tuple[int, int]] = []
+        block_range: Optional[Tuple[int, int]] = None
+        explicit_total = 0.0
+
+        for line in lines:
+            line_range = self._date_range(line, today)
+            if line_range is not None and not _DEGREE_LINE.search(line):
+                # A dated line opens a new experience block
+                block_range = line_range
+                all_ranges.append(line_range)
+            elif _DEGREE_LINE.search(line):
+                block_range = None
+
+            for match in _TOTAL_YEARS_PATTERN.finditer(line):
+                explicit_total = max(explicit_total, float(match.group(1)))
+
+            years_mentions = [(match.start(), float(match.group(1)))
+                              for match in _YEARS_PATTERN.finditer(line)]
+            for skill, pattern in _SKILL_PATTERNS:
+                match = pattern.search(line)
+                if match is None:
+                    continue
+                years = self._nearest_years(match.start(), years_mentions)
+                skill_years[skill] = max(skill_years.get(skill, 0.0), years)
+                if block_range is not None:
+                    skill_ranges.setdefault(skill, []).append(block_range)
+
+        for skill, ranges in skill_ranges.items():
+            skill_years[skill] = max(skill_years[skill],
+                                     float(self._covered_years(ranges)))
+
+        years_experience = max(explicit_total,
+                               float(self._covered_years(all_ranges)))
+        titles = self._titles(lines)
+
+        return {
+            'skills': sorted(skill_years),
+            'skill_years': skill_years,
+            'titles': titles,
+            'years_experience': years_experience,
+            'education': self._education(lines),
+            'seniority': self._seniority(titles, years_experience),
+        }
+
+    @staticmethod
+    def _date_range(line: str, today: int) -> Optional[Tuple[int, int]]:
+        """First plausible year range of a line, as (start, end) years"""
+        match = _DATE_RANGE_PATTERN.search(line)
+        if match is None:
+            return None
+        start = int(match.group(1))
+        end = today if not match.group(2).isdigit() else int(match.group(2))
+        if start > end or end > today:
+            return None
+        return start, end
+
+    @staticmethod
+    def _nearest_years(position: int,
+                       years_mentions: List[Tuple[int, float]]) -> float:
+        """Years mentioned closest to a skill on the same line (0 when none)"""
+        distances = [(abs(start - position), years)
+                     for start, years in years_mentions
+                     if abs(start - position) <= _YEARS_DISTANCE]
+        return min(distances)[1] if distances else 0.0
+
+    @staticmethod
+    def _covered_years(ranges: List[Tuple[int, int]]) -> int:
+        """Total years covered by possibly overlapping year ranges"""
+        covered, current_start, current_end = 0, None, None
+        for start, end in sorted(ranges):
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    covered += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            covered += current_end - current_start
+        return covered
+
+    @staticmethod
+    def _titles(lines: List[str]) -> List[str]:
+        """Job titles found in the resume, in order of appearance"""
+        titles = []
+        for line in lines:
+            for match in _TITLE_PATTERN.finditer(line):
+                words = ((match.group(1) or '') + match.group(2) +
+                         match.group(3)).split()
+                while words and words[0] in _TITLE_STOPWORDS:
+                    words.pop(0)
+                title = ' '.join(words)
+                if title and title not in titles:
+                    titles.append(title)
+        return titles[:10]
+
+    @staticmethod
+    def _education(lines: List[str]) -> str:
+        """Highest education level mentioned"""
+        text = '\n'.join(lines)
+        for level, pattern in _EDUCATION_PATTERNS:
+            if pattern.search(text):
+                return level
+        return 'none'
+
+    @staticmethod
+    def _seniority(titles: List[str], years_experience: float) -> str:
+        """Seniority from title qualifiers, else from years of experience"""
+        levels = [
+            SENIORITY_LEVELS.index(level) for title in titles
+            for level, pattern in _SENIORITY_PATTERNS
+            if pattern.search(title + ' ')
+        ]
+        if levels:
+            return SENIORITY_LEVELS[max(levels)]
+        if years_experience < 2:
+            return 'junior'
+        if years_experience < 5:
+            return 'mid'
+        return 'senior'
+
+    def _query_llm_for_fields(self, text: str) -> Optional[Dict[str, Any]]:
+        """Query DeepSeek for the resume fields as JSON (None on failure)"""
+        prompt = f"""
+        Extract structured information from the resume below. Answer with a JSON object only, with the keys:
+        "skills": list of technical skills,
+        "skill_years": object mapping skills to years of experience with them,
+        "titles": list of job titles held,
+        "years_experience": total years of professional experience (number),
+        "education": highest degree, one of {', '.join(EDUCATION_LEVELS)}
+
+        Resume:
+        {text}
+        """
+        try:
+            response = self.llm_client.complete(
+                [{
+                    "role": "user",
+                    "content": prompt
+                }],
+                max_tokens=1000,
+                temperature=0.0,
+                response_format={"type": "json_object"},
+            )
+            return json.loads(response)
+        except Exception as e:
+            print(f"Error extracting resume fields with LLM: {e}")
+            return None
+
+    def _merge_llm_fields(
+        self,
+        fields: Dict[str, Any],
+        llm_fields: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Complete rule-based fields with the LLM answer"""
+        if not isinstance(llm_fields, dict):
+            return fields
+
+        merged = dict(fields, skill_years=dict(fields['skill_years']))
+        try:
+            for skill in llm_fields.get('skills') or []:
+                skill = canonical_skill(str(skill))
+                merged['skill_years'].setdefault(skill, 0.0)
+            for skill, years in (llm_fields.get('skill_years') or {}).items():
+                skill = canonical_skill(str(skill))
+                merged['skill_years'][skill] = max(
+                    merged['skill_years'].get(skill, 0.0), float(years))
+            merged['skills'] = sorted(merged['skill_years'])
+
+            titles = [str(title).strip().lower()
+                      for title in llm_fields.get('titles') or []]
+            merged['titles'] = list(dict.fromkeys(
+                fields['titles'] + [title for title in titles if title]))[:10]
+
+            if llm_fields.get('years_experience') is not None:
+                merged['years_experience'] = float(
+                    llm_fields['years_experience'])
+            education = str(llm_fields.get('education', '')).lower()
+            if education in EDUCATION_LEVELS and \
+                    EDUCATION_LEVELS.index(education) > \
+                    EDUCATION_LEVELS.index(fields['education']):
+                merged['education'] = education
+        except (TypeError, ValueError) as e:
+            print(f"Ignoring malformed LLM resume fields: {e}")
+            return fields
+
+        merged['seniority'] = self._seniority(merged['titles'],
+                                              merged['years_experience'])
+        return merged
+
+
+def canonical_skill(name: str) -> str:
+    """Map a skill name or alias to its canonical name"""
+    name = name.strip().lower()
+    return _ALIAS_TO_SKILL.get(name, name)
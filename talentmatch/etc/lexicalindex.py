@@ -0,0 +1,117 @@
+"""
+BM25 inverted index over resume texts
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import Counter
+import math
+from talentmatch.utils import tokenize_text
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index
+
+    Postings map each term to the term frequency per document, so a query
+    only touches the documents containing one of its terms instead of
+    scanning every resume. The index is not synchronized: CandidateStorage
+    updates it under its write lock and searches it under its read lock,
+    indexes built for a single request are not shared.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Tuple[str, str]],
+                       **kwargs) -> 'BM25Index':
+        """Build an index from (document id, text) pairs"""
+        index = cls(**kwargs)
+        for doc_id, text in documents:
+            index.add(doc_id, text)
+        return index
+
+    def add(self, doc_id: str, text: str):
+        """Index a document, replacing any previous version"""
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+
+        terms = Counter(tokenize_text(text or ''))
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+        length = sum(terms.values())
+        self._lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: str, text: str = None):
+        """
+        Drop a document. Passing its text avoids walking the whole term
+        dictionary to find its postings.
+        """
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+
+        terms = set(tokenize_text(text)) if text is not None \
+            else list(self._postings)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None and postings.pop(doc_id, None) is not None \
+                    and not postings:
+                del self._postings[term]
+
+    def clear(self):
+        """Drop all documents"""
+        self._postings.clear()
+        self._lengths.clear()
+        self._total_length = 0
+
+    def count(self) -> int:
+        """Get indexed document count"""
+        return len(self._lengths)
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Score the documents sharing at least one term with the query, returns
+        (document id, BM25 score) pairs, best first
+        """
+        document_count = len(self._lengths)
+        if not document_count:
+            return []
+        average_length = self._total_length / document_count or 1.0
+
+        scores: Dict[str, float] = {}
+        for term, query_frequency in Counter(tokenize_text(query)).items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1.0 + (document_count - len(postings) + 0.5) /
+                           (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b *
+                                  self._lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + \
+                    query_frequency * idf * frequency * (self.k1 + 1.0) / \
+                    (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]],
+                           k: int = 60) -> Dict[str, float]:
+    """Fuse several rankings (ids, best first) into RRF scores"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return scores
@@ -0,0 +1,603 @@
+"""
+LLM chat completion client with a persistent response cache, single-flight,
+rate limiting, a circuit breaker and hedged retries
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor,
+                                TimeoutError as FutureTimeoutError, wait)
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import weakref
+import openai
+from talentmatch import DEEPSEEK_API_KEY
+
+# Upstream errors worth another attempt
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# Result published to the callers waiting on a leader that was interrupted
+_ABANDONED = object()
+
+
+class LLMUnavailableError(Exception):
+    """The LLM could not answer: circuit open or upstream failure"""
+
+
+class RateLimiter:
+    """
+    Token buckets on requests and tokens per minute (0 disables a limit)
+
+    Callers reserve capacity and sleep for the returned delay, so the bucket
+    can go negative and waiting callers are served in reservation order.
+    """
+
+    def __init__(self, requests_per_minute: float = 0,
+                 tokens_per_minute: float = 0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request of some tokens, seconds to wait before it"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed, self._updated = now - self._updated, now
+            delay = 0.0
+            if self.requests_per_minute > 0:
+                self._requests = min(
+                    self.requests_per_minute,
+                    self._requests + elapsed * self.requests_per_minute / 60)
+                self._requests -= 1
+                delay = max(delay,
+                            -self._requests * 60 / self.requests_per_minute)
+            if self.tokens_per_minute > 0:
+                self._tokens = min(
+                    self.tokens_per_minute,
+                    self._tokens + elapsed * self.tokens_per_minute / 60)
+                # A request above the whole budget waits for a full bucket
+                self._tokens -= min(tokens, self.tokens_per_minute)
+                delay = max(delay, -self._tokens * 60 / self.tokens_per_minute)
+            return delay
+
+    def acquire(self, tokens: int):
+        """Block until a request of some tokens may be sent"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: int):
+        """Wait until a request of some tokens may be sent"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Stop calling upstream while it is failing
+
+    The circuit opens when at least min_requests of the last window_size
+    attempts were recorded and their failure rate reaches failure_rate.
+    After cooldown_seconds one probe is let through (half open): its success
+    closes the circuit, its failure opens it again. A probe without outcome
+    is replaced after another cooldown.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_requests: int = 5,
+        window_size: int = 20,
+        cooldown_seconds: float = 30,
+    ):
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.cooldown_seconds = cooldown_seconds
+        self._outcomes = deque(maxlen=window_size)
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half_open'"""
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                return 'open'
+            return 'half_open'
+
+    def allow(self) -> bool:
+        """Whether an upstream attempt may be made now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.cooldown_seconds:
+                return False
+            if self._probe_started is not None and \
+                    now - self._probe_started < self.cooldown_seconds:
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self):
+        """Record a successful attempt"""
+        with self._lock:
+            if self._opened_at is not None:
+                self._opened_at, self._probe_started = None, None
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        """Record a failed attempt"""
+        with self._lock:
+            if self._opened_at is not None:
+                # Failed probe
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_requests and \
+                    failures >= self.failure_rate * len(self._outcomes):
+                print(f"LLM circuit opened after {failures}/"
+                      f"{len(self._outcomes)} failed requests")
+                self._opened_at = time.monotonic()
+
+
+class LLMResponseCache:
+    """
+    sqlite cache of LLM responses on local disk
+
+    Entries expire after ttl_seconds; once the stored responses exceed
+    max_bytes the least recently used ones are evicted. Eviction runs every
+    EVICT_EVERY writes so a put stays cheap. One connection is shared by all
+    threads behind a lock.
+    """
+
+    EVICT_EVERY = 64
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )''')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS llm_cache_accessed '
+                'ON llm_cache (accessed)')
+            self._evict()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response of a key, None when missing or expired"""
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT response, created FROM llm_cache WHERE key = ?',
+                (key, )).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._connection.execute('DELETE FROM llm_cache WHERE key = ?',
+                                         (key, ))
+                return None
+            self._connection.execute(
+                'UPDATE llm_cache SET accessed = ? WHERE key = ?', (now, key))
+            return row[0]
+
+    def set(self, key: str, model: str, response: str):
+        """Store a response"""
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO llm_cache '
+                '(key, model, response, size, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, model, response, len(response.encode('utf-8')), now,
+                 now))
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict()
+
+    def clear(self):
+        """Drop all cached responses"""
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM llm_cache')
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and stored response bytes"""
+        with self._lock:
+            count, size = self._connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache'
+            ).fetchone()
+        return {'entries': count, 'bytes': size}
+
+    def _evict(self):
+        """Drop expired entries, then LRU ones above max_bytes (lock held)"""
+        self._connection.execute('DELETE FROM llm_cache WHERE created < ?',
+                                 (time.time() - self.ttl_seconds, ))
+        total = self._connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM llm_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess, evicted = total - self.max_bytes, []
+        for key, size in self._connection.execute(
+                'SELECT key, size FROM llm_cache ORDER BY accessed'):
+            if excess <= 0:
+                break
+            evicted.append((key, ))
+            excess -= size
+        self._connection.executemany('DELETE FROM llm_cache WHERE key = ?',
+                                     evicted)
+
+
+class LLMClient:
+    """
+    Chat completion client shared by all LLM calls
+
+    Responses are cached (when a cache is given) by model, temperature,
+    output cap and a hash of the whitespace-normalized messages. Identical
+    requests in flight at the same time, from threads or coroutines, share
+    one upstream call (single-flight). When the leading caller is cancelled
+    or interrupted, a waiting caller makes the call instead.
+
+    Upstream calls are rate limited and guarded by a circuit breaker. An
+    attempt slower than hedge_after_seconds (0 disables hedging) gets a
+    second identical request, the first answer wins. Transient errors are
+    retried up to max_retries times with exponential backoff. Calls raise
+    LLMUnavailableError when the circuit is open or all attempts failed.
+    """
+
+    def __init__(
+        self,
+        api_key: str = DEEPSEEK_API_KEY,
+        base_url: str = "https://api.deepseek.com",
+        cache: LLMResponseCache = None,
+        rate_limiter: RateLimiter = None,
+        circuit_breaker: CircuitBreaker = None,
+        request_timeout: float = 60,
+        max_retries: int = 2,
+        retry_backoff_seconds: float = 0.5,
+        hedge_after_seconds: float = 0,
+        hedge_workers: int = 16,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=hedge_workers, thread_name_prefix='llm-hedge') \
+            if hedge_after_seconds > 0 else None
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # One connection pool for all synchronous calls, and one per event
+        # loop for awaited calls (an async pool is bound to its loop)
+        self._sync_client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "deepseek-chat",
+        max_tokens: int = 1000,
+        temperature: float = 0.2,
+        **options,
+    ) -> str:
+        """Response text of a chat completion"""
+        key = self.cache_key(messages, model, max_tokens, temperature, options)
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            return cached
+
+        while True:
+            future, leader = self._join_flight(key)
+            if leader:
+                break
+            content = future.result()
+            if content is not _ABANDONED:
+                return content
+
+        request = dict(model=model,
+                       messages=messages,
+                       max_tokens=max_tokens,
+                       temperature=temperature,
+                       **options)
+        try:
+            content = self._with_retries(request)
+        except Exception as e:
+            self._finish_flight(key, future, error=e)
+            raise
+        except BaseException:
+            # KeyboardInterrupt, SystemExit: a waiting caller takes over
+            self._finish_flight(key, future, result=_ABANDONED)
+            raise
+
+        self._store(key, model, content)
+        self._finish_flight(key, future, result=content)
+        return content
+
+    async def complete_async(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "deepseek-chat",
+        max_tokens: int = 1000,
+        temperature: float = 0.2,
+        **options,
+    ) -> str:
+        """Response text of a chat completion, awaited"""
+        key = self.cache_key(messages, model, max_tokens, temperature, options)
+        # sqlite reads and writes block, keep them off the event loop
+        cached = await asyncio.to_thread(self.cache.get, key) \
+            if self.cache is not None else None
+        if cached is not None:
+            return cached
+
+        while True:
+            future, leader = self._join_flight(key)
+            if leader:
+                break
+            content = await asyncio.wrap_future(future)
+            if content is not _ABANDONED:
+                return content
+
+        request = dict(model=model,
+                       messages=messages,
+                       max_tokens=max_tokens,
+                       temperature=temperature,
+                       **options)
+        try:
+            content = await self._with_retries_async(request)
+        except Exception as e:
+            self._finish_flight(key, future, error=e)
+            raise
+        except BaseException:
+            # Cancelled request or hedge: a waiting caller takes over
+            self._finish_flight(key, future, result=_ABANDONED)
+            raise
+
+        try:
+            if self.cache is not None:
+                await asyncio.to_thread(self._store, key, model, content)
+        finally:
+            self._finish_flight(key, future, result=content)
+        return content
+
+    def _with_retries(self, request: Dict[str, Any]) -> str:
+        """Run hedged attempts until one succeeds or retries are spent"""
+        for attempt in range(self.max_retries + 1):
+            if not self.circuit_breaker.allow():
+                raise LLMUnavailableError("LLM circuit is open")
+            try:
+                return self._hedged(request)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise LLMUnavailableError(
+                        f"LLM request failed: {e}") from e
+                print(f"LLM request failed ({e}), retrying")
+                time.sleep(self.retry_backoff_seconds * 2**attempt)
+            except openai.OpenAIError as e:
+                raise LLMUnavailableError(f"LLM request failed: {e}") from e
+
+    async def _with_retries_async(self, request: Dict[str, Any]) -> str:
+        """Run hedged attempts until one succeeds or retries are spent"""
+        for attempt in range(self.max_retries + 1):
+            if not self.circuit_breaker.allow():
+                raise LLMUnavailableError("LLM circuit is open")
+            try:
+                return await self._hedged_async(request)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise LLMUnavailableError(
+                        f"LLM request failed: {e}") from e
+                print(f"LLM request failed ({e}), retrying")
+                await asyncio.sleep(self.retry_backoff_seconds * 2**attempt)
+            except openai.OpenAIError as e:
+                raise LLMUnavailableError(f"LLM request failed: {e}") from e
+
+    def _hedged(self, request: Dict[str, Any]) -> str:
+        """One attempt, duplicated when the first request is slow"""
+        if self._hedge_executor is None:
+            return self._send(request)
+
+        primary = self._hedge_executor.submit(self._send, request)
+        try:
+            return primary.result(timeout=self.hedge_after_seconds)
+        except FutureTimeoutError:
+            pass
+        hedge = self._hedge_executor.submit(self._send, request)
+
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _hedged_async(self, request: Dict[str, Any]) -> str:
+        """One attempt, duplicated when the first request is slow"""
+        primary = asyncio.ensure_future(self._send_async(request))
+        if self.hedge_after_seconds <= 0:
+            return await primary
+
+        done, _ = await asyncio.wait({primary},
+                                     timeout=self.hedge_after_seconds)
+        if done:
+            return primary.result()
+        hedge = asyncio.ensure_future(self._send_async(request))
+
+        pending, error = {primary, hedge}, None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _client(self):
+        """
+        Shared synchronous OpenAI client (thread-safe); a client per call
+        kept its connection pool alive until garbage collected
+        """
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = openai.OpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    timeout=self.request_timeout,
+                    max_retries=0)
+            return self._sync_client
+
+    def _async_client(self):
+        """Shared asynchronous OpenAI client of the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = openai.AsyncOpenAI(api_key=self.api_key,
+                                            base_url=self.base_url,
+                                            timeout=self.request_timeout,
+                                            max_retries=0)
+                self._async_clients[loop] = client
+            return client
+
+    def _send(self, request: Dict[str, Any]) -> str:
+        """One rate limited upstream request"""
+        self.rate_limiter.acquire(self._estimate_tokens(request))
+        try:
+            response = self._client().chat.completions.create(**request)
+        except RETRYABLE_ERRORS:
+            self.circuit_breaker.record_failure()
+            raise
+        except openai.OpenAIError:
+            # The upstream answered, the request itself was rejected
+            self.circuit_breaker.record_success()
+            raise
+        self.circuit_breaker.record_success()
+        return response.choices[0].message.content
+
+    async def _send_async(self, request: Dict[str, Any]) -> str:
+        """One rate limited upstream request, awaited"""
+        await self.rate_limiter.acquire_async(self._estimate_tokens(request))
+        try:
+            response = await self._async_client().chat.completions.create(
+                **request)
+        except RETRYABLE_ERRORS:
+            self.circuit_breaker.record_failure()
+            raise
+        except openai.OpenAIError:
+            self.circuit_breaker.record_success()
+            raise
+        self.circuit_breaker.record_success()
+        return response.choices[0].message.content
+
+    @staticmethod
+    def _estimate_tokens(request: Dict[str, Any]) -> int:
+        """Prompt (about 4 characters a token) and output tokens of a request"""
+        prompt_characters = sum(
+            len(message['content']) for message in request['messages'])
+        return prompt_characters // 4 + request['max_tokens']
+
+    @staticmethod
+    def cache_key(
+        messages: List[Dict[str, str]],
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        options: Dict[str, Any] = None,
+    ) -> str:
+        """Hash of a request, prompts compared with normalized whitespace"""
+        normalized = [{
+            'role': message['role'],
+            'content': re.sub(r'\s+', ' ', message['content']).strip()
+        } for message in messages]
+        payload = json.dumps(
+            {
+                'model': model,
+                'temperature': temperature,
+                'max_tokens': max_tokens,
+                'options': options or {},
+                'messages': normalized,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _store(self, key: str, model: str, content: Optional[str]):
+        """Cache a response, cache failures never fail the call"""
+        if self.cache is None or content is None:
+            return
+        try:
+            self.cache.set(key, model, content)
+        except sqlite3.Error as e:
+            print(f"Error caching LLM response: {e}")
+
+    def _join_flight(self, key: str) -> Tuple[Future, bool]:
+        """Future of the in-flight call of a key, and whether we lead it"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            # A cancelled waiter must not cancel the future of the others
+            future.set_running_or_notify_cancel()
+            self._in_flight[key] = future
+            return future, True
+
+    def _finish_flight(self, key: str, future: Future, result=None,
+                       error: BaseException = None):
+        """Publish the leader's outcome to the waiting callers"""
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
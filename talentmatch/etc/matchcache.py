@@ -0,0 +1,208 @@
+"""
+In-memory cache of whole match results, with request coalescing
+"""
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+import numpy as np
+
+# Result published to the callers waiting on a leader that was interrupted
+_ABANDONED = object()
+
+
+class CachedMatch(NamedTuple):
+    """A cached match result and the ETag identifying it"""
+    result: Dict[str, Any]
+    etag: str
+    size: int
+    expires_at: float
+
+
+def estimate_size(value) -> int:
+    """Rough memory size of a result (strings, bytes and arrays dominate)"""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value) + 48
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, dict):
+        return 64 + sum(
+            estimate_size(key) + estimate_size(item)
+            for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return 56 + sum(estimate_size(item) for item in value)
+    return 32
+
+
+class MatchResultCache:
+    """
+    Match results by request key, least recently used evicted
+
+    Entries expire after ttl_seconds and the cache holds at most max_entries
+    results of max_bytes (estimated) in total. Identical requests arriving
+    while one is computed wait for its result instead of computing it again.
+    Each computed result gets a new ETag, so a tag never names two results
+    (the tags also differ across restarts). When the caller computing a
+    result is cancelled or interrupted, a waiting caller computes it instead
+    of failing with the leader's cancellation.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 128 * 1024 * 1024,
+        ttl_seconds: float = 600,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, CachedMatch]' = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._bytes = 0
+        self._salt = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+
+    def get(self, key: str) -> Optional[CachedMatch]:
+        """Live entry of a key, None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Dict[str, Any]],
+    ) -> Tuple[CachedMatch, bool]:
+        """Entry of a key, computed when missing, and whether it was cached"""
+        while True:
+            entry = self._hit(key)
+            if entry is not None:
+                return entry, True
+            future, leader = self._join_flight(key)
+            if leader:
+                break
+            entry = future.result()
+            if entry is not _ABANDONED:
+                return entry, True
+
+        try:
+            entry = self._store(key, compute())
+        except Exception as e:
+            self._finish_flight(key, future, error=e)
+            raise
+        except BaseException:
+            # KeyboardInterrupt, SystemExit: a waiting caller takes over
+            self._finish_flight(key, future, result=_ABANDONED)
+            raise
+        self._finish_flight(key, future, result=entry)
+        return entry, False
+
+    async def get_or_compute_async(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[CachedMatch, bool]:
+        """Entry of a key, awaited, see get_or_compute"""
+        while True:
+            entry = self._hit(key)
+            if entry is not None:
+                return entry, True
+            future, leader = self._join_flight(key)
+            if leader:
+                break
+            entry = await asyncio.wrap_future(future)
+            if entry is not _ABANDONED:
+                return entry, True
+
+        try:
+            entry = self._store(key, await compute())
+        except Exception as e:
+            self._finish_flight(key, future, error=e)
+            raise
+        except BaseException:
+            # Cancelled request: a waiting caller takes over
+            self._finish_flight(key, future, result=_ABANDONED)
+            raise
+        self._finish_flight(key, future, result=entry)
+        return entry, False
+
+    def _hit(self, key: str) -> Optional[CachedMatch]:
+        """get() counting the hit or miss"""
+        entry = self.get(key)
+        with self._lock:
+            self._stats['hits' if entry is not None else 'misses'] += 1
+        return entry
+
+    def _store(self, key: str, result: Dict[str, Any]) -> CachedMatch:
+        """Cache a computed result, unless it is larger than the whole cache"""
+        etag = hashlib.sha256(
+            f"{self._salt}:{key}:{time.time()}".encode('utf-8')).hexdigest()[:32]
+        entry = CachedMatch(result, etag, estimate_size(result),
+                            time.time() + self.ttl_seconds)
+        if entry.size > self.max_bytes:
+            return entry
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or \
+                    self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+        return entry
+
+    def _remove(self, key: str):
+        """Drop an entry (lock must be held)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _join_flight(self, key: str) -> Tuple[Future, bool]:
+        """Future of the in-flight computation of a key, and whether we lead it"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return future, False
+            future = Future()
+            # A cancelled waiter must not cancel the future of the others
+            future.set_running_or_notify_cancel()
+            self._in_flight[key] = future
+            return future, True
+
+    def _finish_flight(self, key: str, future: Future, result=None,
+                       error: BaseException = None):
+        """Publish the leader's outcome to the waiting callers"""
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, estimated size and hit counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                **self._stats,
+            }
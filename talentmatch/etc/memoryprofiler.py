@@ -0,0 +1,189 @@
+"""
+Memory diagnostics of a running server: RSS, tracemalloc allocation diffs,
+object counts by type and numpy / torch buffer sizes
+"""
+from typing import Any, Dict, List, Optional
+from collections import Counter
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+import numpy as np
+
+# Allocations of the profiler itself are left out of the diffs
+_IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>',
+                  '<frozen importlib._bootstrap_external>', '<unknown>')
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process, None when it cannot be read"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # not on Windows
+        return None
+    # Peak rather than current RSS, in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryProfiler:
+    """
+    Memory reports of the current process
+
+    With trace_frames > 0, start() turns on tracemalloc and each report
+    lists the top allocation sites by growth since the previous report (the
+    first one diffs against start()). Tracing costs memory and CPU, so it is
+    only started when memory diagnostics are enabled. Object counts and
+    buffer sizes walk the gc-tracked objects and are only computed on
+    request.
+    """
+
+    def __init__(self, trace_frames: int = 10, top_n: int = 25):
+        self.trace_frames = trace_frames
+        self.top_n = top_n
+        self.started_at = time.time()
+        self.start_rss = rss_bytes()
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._object_counts: Counter = Counter()
+        # One report at a time, each diffs against the previous one
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start allocation tracing and take the baseline snapshot"""
+        if self.trace_frames <= 0:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+        with self._lock:
+            self._snapshot = self._take_snapshot()
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, filename) for filename in _IGNORED_FILES
+        ])
+
+    def report(
+        self,
+        top_n: int = None,
+        objects: bool = False,
+        buffers: bool = False,
+        collect: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Memory report, with collect a full gc collection first
+        :return: {'rss_bytes', 'rss_growth_bytes', 'uptime_seconds',
+                  'gc': {...}, 'tracemalloc': {...} when tracing,
+                  'objects': [...] with objects, 'buffers': {...} with buffers}
+        """
+        top_n = self.top_n if top_n is None else top_n
+        with self._lock:
+            collected = gc.collect() if collect else None
+            rss = rss_bytes()
+            report = {
+                'rss_bytes': rss,
+                'rss_growth_bytes': rss - self.start_rss
+                if rss is not None and self.start_rss is not None else None,
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'gc': {
+                    'collected': collected,
+                    'counts': gc.get_count(),
+                    'garbage': len(gc.garbage),
+                },
+            }
+            if tracemalloc.is_tracing():
+                report['tracemalloc'] = self._allocation_diff(top_n)
+            if objects:
+                report['objects'] = self._object_diff(top_n)
+            if buffers:
+                report['buffers'] = self._buffer_sizes()
+        return report
+
+    def _allocation_diff(self, top_n: int) -> Dict[str, Any]:
+        """Top allocation sites by growth since the previous snapshot"""
+        current, peak = tracemalloc.get_traced_memory()
+        diff = {
+            'traced_bytes': current,
+            'peak_traced_bytes': peak,
+            'overhead_bytes': tracemalloc.get_tracemalloc_memory(),
+            'top': [],
+        }
+        if top_n <= 0:
+            return diff
+
+        snapshot = self._take_snapshot()
+        if self._snapshot is not None:
+            stats = snapshot.compare_to(self._snapshot, 'traceback')
+        else:
+            stats = snapshot.statistics('traceback')
+        self._snapshot = snapshot
+        diff['top'] = [{
+            'size_diff': getattr(stat, 'size_diff', stat.size),
+            'size': stat.size,
+            'count_diff': getattr(stat, 'count_diff', stat.count),
+            'count': stat.count,
+            # Innermost frame last, as in Python tracebacks
+            'traceback': [f"{frame.filename}:{frame.lineno}"
+                          for frame in stat.traceback],
+        } for stat in sorted(stats,
+                             key=lambda stat: getattr(stat, 'size_diff',
+                                                      stat.size),
+                             reverse=True)[:top_n]]
+        return diff
+
+    def _object_diff(self, top_n: int) -> List[Dict[str, Any]]:
+        """gc-tracked object counts by type, most grown since the last call"""
+        counts = Counter(type(obj).__qualname__ for obj in gc.get_objects())
+        previous, self._object_counts = self._object_counts, counts
+        return [{
+            'type': name,
+            'count': count,
+            'count_diff': count - previous.get(name, 0),
+        } for name, count in sorted(
+            counts.items(),
+            key=lambda item: (item[1] - previous.get(item[0], 0), item[1]),
+            reverse=True)[:max(top_n, 1)]]
+
+    @staticmethod
+    def _buffer_sizes() -> Dict[str, Any]:
+        """
+        Bytes held by numpy arrays and torch tensors
+
+        Arrays and tensors are not gc-tracked, they are found through the
+        containers referencing them. Views are counted once with their base
+        array, tensors sharing a storage once.
+        """
+        torch = sys.modules.get('torch')
+        arrays, tensors = {}, {}
+        for obj in gc.get_objects():
+            for referent in gc.get_referents(obj):
+                if isinstance(referent, np.ndarray):
+                    while isinstance(referent.base, np.ndarray):
+                        referent = referent.base
+                    arrays[id(referent)] = referent.nbytes
+                elif torch is not None and isinstance(referent, torch.Tensor):
+                    storage = referent.untyped_storage()
+                    tensors[(storage.device.type, storage.data_ptr())] = \
+                        storage.nbytes()
+
+        buffers = {
+            'numpy_arrays': len(arrays),
+            'numpy_bytes': sum(arrays.values()),
+        }
+        if torch is not None:
+            buffers['torch_tensors'] = len(tensors)
+            buffers['torch_bytes'] = sum(tensors.values())
+            if torch.cuda.is_available():
+                buffers['torch_cuda_allocated_bytes'] = \
+                    torch.cuda.memory_allocated()
+                buffers['torch_cuda_reserved_bytes'] = \
+                    torch.cuda.memory_reserved()
+        return buffers
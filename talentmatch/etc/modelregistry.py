@@ -0,0 +1,94 @@
+"""
+Registry of the loaded embedding models
+"""
+from typing import Any, Callable, Dict, List
+import threading
+from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+from talentmatch.etc.rwlock import ReadWriteLock
+
+
+class EmbeddingModelRegistry:
+    """
+    Embedding models loaded side by side, keyed by fingerprint
+
+    One model is active: it embeds new candidates and job descriptions
+    matched against the stored pool. Other models stay loaded while a
+    migration re-embeds the pool with them, or while in-flight requests
+    still use them.
+
+    Ingest holds cutover_lock for reading from embedding to storing a batch,
+    switching the active model holds it for writing, so a batch is never
+    stored with vectors of the model it was not embedded with.
+    """
+
+    def __init__(
+        self,
+        processor_factory: Callable[[str], EmbeddingProcessor] = EmbeddingProcessor,
+    ):
+        self.processor_factory = processor_factory
+        self.cutover_lock = ReadWriteLock()
+        self._processors: Dict[str, EmbeddingProcessor] = {}
+        self._active: str = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> EmbeddingProcessor:
+        """Processor of the active model"""
+        with self._lock:
+            if self._active is None:
+                raise ValueError("No embedding model loaded")
+            return self._processors[self._active]
+
+    def load(self, model_name: str) -> EmbeddingProcessor:
+        """
+        Load a model (once), the first loaded model becomes active
+        """
+        with self._lock:
+            for processor in self._processors.values():
+                if processor.model_name == model_name:
+                    return processor
+
+        # Loading takes seconds, do not block lookups meanwhile
+        processor = self.processor_factory(model_name)
+        with self._lock:
+            processor = self._processors.setdefault(processor.fingerprint,
+                                                    processor)
+            if self._active is None:
+                self._active = processor.fingerprint
+        return processor
+
+    def get(self, fingerprint: str) -> EmbeddingProcessor:
+        """Processor of a loaded model"""
+        with self._lock:
+            processor = self._processors.get(fingerprint)
+        if processor is None:
+            raise ValueError(f"Embedding model {fingerprint!r} is not loaded")
+        return processor
+
+    def activate(self, fingerprint: str):
+        """Make a loaded model the active one"""
+        with self._lock:
+            if fingerprint not in self._processors:
+                raise ValueError(
+                    f"Embedding model {fingerprint!r} is not loaded")
+            self._active = fingerprint
+
+    def unload(self, fingerprint: str):
+        """
+        Forget a model that is not active, requests still holding its
+        processor keep it alive until they are done
+        """
+        with self._lock:
+            if fingerprint == self._active:
+                raise ValueError("The active embedding model cannot be unloaded")
+            self._processors.pop(fingerprint, None)
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Loaded models, for API responses"""
+        with self._lock:
+            return [{
+                'fingerprint': fingerprint,
+                'model_name': processor.model_name,
+                'dimension': processor.dimension,
+                'active': fingerprint == self._active,
+            } for fingerprint, processor in self._processors.items()]
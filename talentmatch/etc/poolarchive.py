@@ -0,0 +1,166 @@
+"""
+Columnar archive of the candidate pool
+
+A tar stream holding manifest.json followed by chunks of candidates, each
+chunk-NNNNN/ directory holding candidates.jsonl (one record per line),
+embeddings.npy (float32 rows in the same order) and optionally
+signatures.npy (uint32 MinHash signatures). Both writing and reading are
+streamed chunk by chunk, so neither side holds more than one chunk.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from io import BytesIO
+import json
+import tarfile
+import time
+import numpy as np
+
+ARCHIVE_FORMAT = 'talentmatch-pool'
+ARCHIVE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+# Candidate attributes kept in the JSONL records ('resume' is optional)
+RECORD_FIELDS = ('id', 'name', 'summary', 'resume_text', 'resume_name',
+                 'content_hash', 'fields', 'location', 'tags')
+
+
+class PoolArchiveChunk(NamedTuple):
+    """Candidate records of a chunk with their embedding and signature rows"""
+    records: List[Dict[str, Any]]
+    embeddings: np.ndarray
+    signatures: Optional[np.ndarray]
+
+
+class _StreamBuffer:
+    """Write-only file object collecting the bytes written since drain()"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self._parts = b''.join(self._parts), []
+        return data
+
+
+def _add_member(archive: tarfile.TarFile, name: str, data: bytes):
+    """Add an in-memory file to a tar archive"""
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    archive.addfile(info, BytesIO(data))
+
+
+def _npy_bytes(array: np.ndarray) -> bytes:
+    """Serialize an array in .npy format"""
+    buffer = BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def write_pool_archive(
+    manifest: Dict[str, Any],
+    chunks: Iterable[PoolArchiveChunk],
+) -> Iterator[bytes]:
+    """Serialize a manifest and candidate chunks, yields the archive bytes"""
+    buffer = _StreamBuffer()
+    manifest = dict(manifest, format=ARCHIVE_FORMAT, version=ARCHIVE_VERSION)
+    with tarfile.open(fileobj=buffer, mode='w|') as archive:
+        _add_member(archive, MANIFEST_NAME,
+                    json.dumps(manifest, indent=2).encode('utf-8'))
+        yield buffer.drain()
+
+        for index, chunk in enumerate(chunks):
+            prefix = f'chunk-{index:05d}'
+            _add_member(
+                archive, f'{prefix}/candidates.jsonl', b''.join(
+                    json.dumps(record, ensure_ascii=False).encode('utf-8') +
+                    b'\n' for record in chunk.records))
+            _add_member(archive, f'{prefix}/embeddings.npy',
+                        _npy_bytes(np.asarray(chunk.embeddings,
+                                              dtype=np.float32)))
+            if chunk.signatures is not None:
+                _add_member(archive, f'{prefix}/signatures.npy',
+                            _npy_bytes(chunk.signatures))
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _read_chunk(name: str, parts: Dict[str, bytes]) -> PoolArchiveChunk:
+    """Decode the members of a chunk"""
+    if 'candidates.jsonl' not in parts or 'embeddings.npy' not in parts:
+        raise ValueError(f"Archive chunk {name} is incomplete")
+    try:
+        records = [
+            json.loads(line)
+            for line in parts['candidates.jsonl'].splitlines() if line.strip()
+        ]
+        embeddings = np.load(BytesIO(parts['embeddings.npy']),
+                             allow_pickle=False)
+        signatures = np.load(BytesIO(parts['signatures.npy']),
+                             allow_pickle=False) \
+            if 'signatures.npy' in parts else None
+    except ValueError as e:
+        raise ValueError(f"Archive chunk {name} is malformed: {e}") from e
+
+    if len(embeddings) != len(records) or \
+            (signatures is not None and len(signatures) != len(records)):
+        raise ValueError(
+            f"Archive chunk {name} has {len(records)} records but "
+            f"{len(embeddings)} embeddings")
+    return PoolArchiveChunk(records, embeddings.astype(np.float32, copy=False),
+                            signatures)
+
+
+def read_pool_archive(
+    fileobj,
+    max_member_size: int = 1024 * 1024 * 1024,
+) -> Tuple[Dict[str, Any], Iterator[PoolArchiveChunk]]:
+    """
+    Read an archive from a (non-seekable) stream, gzip compressed or not
+    :return: (manifest, iterator of chunks)
+    """
+    try:
+        archive = tarfile.open(fileobj=fileobj, mode='r|*')
+        member = archive.next()
+    except tarfile.TarError as e:
+        raise ValueError(f"Not a candidate archive: {e}") from e
+    if member is None or member.name != MANIFEST_NAME:
+        raise ValueError(f"Archive must start with {MANIFEST_NAME}")
+    try:
+        manifest = json.loads(archive.extractfile(member).read())
+    except ValueError as e:
+        raise ValueError(f"Invalid {MANIFEST_NAME}: {e}") from e
+    if manifest.get('format') != ARCHIVE_FORMAT or \
+            manifest.get('version') != ARCHIVE_VERSION:
+        raise ValueError(
+            f"Unsupported archive format {manifest.get('format')!r} "
+            f"version {manifest.get('version')!r}")
+
+    def chunks() -> Iterator[PoolArchiveChunk]:
+        current, parts = None, {}
+        try:
+            # Iterating the archive would go back to the manifest
+            for member in iter(archive.next, None):
+                if not member.isfile():
+                    continue
+                if member.size > max_member_size:
+                    raise ValueError(
+                        f"Archive member {member.name} exceeds "
+                        f"{max_member_size} bytes")
+                prefix, _, name = member.name.rpartition('/')
+                if prefix != current and parts:
+                    yield _read_chunk(current, parts)
+                    parts = {}
+                current = prefix
+                parts[name] = archive.extractfile(member).read()
+            if parts:
+                yield _read_chunk(current, parts)
+        except tarfile.TarError as e:
+            raise ValueError(f"Corrupt candidate archive: {e}") from e
+        finally:
+            archive.close()
+
+    return manifest, chunks()
@@ -0,0 +1,94 @@
+"""
+Dimensionality reduction of embeddings for shortlist scoring
+"""
+from typing import Optional
+import numpy as np
+
+REDUCTION_METHODS = ('none', 'pca', 'prefix')
+
+
+class EmbeddingProjection:
+    """
+    Projection of embeddings onto fewer dimensions
+
+    Projected rows are L2-normalized, so their dot products are cosine
+    similarities in the reduced space.
+    """
+
+    method = None
+
+    def __init__(self, dimensions: int):
+        if dimensions <= 0:
+            raise ValueError("Reduced dimensions must be positive")
+        self.dimensions = dimensions
+
+    def fit(self, embeddings: np.ndarray) -> 'EmbeddingProjection':
+        """Fit the projection on a sample of embeddings"""
+        return self
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        """Project embeddings (one or several rows), normalized float32 rows"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        projected = self._project(embeddings.reshape(-1, embeddings.shape[-1]))
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        return projected / np.maximum(norms, 1e-12)
+
+    def _project(self, embeddings: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class PCAProjection(EmbeddingProjection):
+    """Principal components of the stored corpus"""
+
+    method = 'pca'
+
+    def __init__(self, dimensions: int):
+        super().__init__(dimensions)
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+
+    def fit(self, embeddings: np.ndarray) -> 'PCAProjection':
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(embeddings) < self.dimensions or \
+                embeddings.shape[1] < self.dimensions:
+            raise ValueError(
+                f"PCA to {self.dimensions} dimensions needs at least as many "
+                f"embeddings and embedding dimensions to fit")
+        self.mean = embeddings.mean(axis=0)
+        # Rows of vt are the principal axes, by decreasing variance
+        _, _, vt = np.linalg.svd(embeddings - self.mean, full_matrices=False)
+        self.components = np.ascontiguousarray(
+            vt[:self.dimensions].T.astype(np.float32))
+        return self
+
+    def _project(self, embeddings: np.ndarray) -> np.ndarray:
+        if self.components is None:
+            raise ValueError("PCA projection is not fitted")
+        return (embeddings - self.mean) @ self.components
+
+
+class PrefixProjection(EmbeddingProjection):
+    """
+    Matryoshka truncation: the leading dimensions of the embedding
+
+    Only meaningful for models trained with a Matryoshka loss, whose prefixes
+    are embeddings on their own. Needs no fitting.
+    """
+
+    method = 'prefix'
+
+    def _project(self, embeddings: np.ndarray) -> np.ndarray:
+        return embeddings[:, :self.dimensions]
+
+
+def create_projection(method: str,
+                      dimensions: int) -> Optional[EmbeddingProjection]:
+    """Projection of a reduction method, None for 'none'"""
+    if method == 'pca':
+        return PCAProjection(dimensions)
+    if method == 'prefix':
+        return PrefixProjection(dimensions)
+    if method in (None, '', 'none'):
+        return None
+    raise ValueError(f"Unknown embedding reduction {method!r}, expected one "
+                     f"of {', '.join(REDUCTION_METHODS)}")
@@ -0,0 +1,194 @@
+"""
+Token-budgeted prompt construction for the candidate summary calls
+"""
+from typing import Dict, List
+import numpy as np
+from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+
+SUMMARY_INSTRUCTIONS = (
+    "You evaluate candidates for the job below. For each resume excerpt you "
+    "receive, answer in plain text (no markdown) with a short summary of the "
+    "candidate's qualifications and whether they match the job requirements."
+)
+BATCH_SUMMARY_INSTRUCTIONS = (
+    "You evaluate candidates for the job below. The user message lists "
+    "several resume excerpts, each under a '### Candidate <id>' heading. "
+    "For each candidate write a short plain text summary (no markdown) of "
+    "their qualifications and whether they match the job requirements. "
+    "Answer with a JSON object only, following this schema: "
+    '{"summaries": {"<candidate id>": "<summary>", ...}} '
+    "with one entry for every candidate id."
+)
+
+
+class SummaryPromptBuilder:
+    """
+    Build summary prompts within a token budget
+
+    The job description part is built once per request and sent as the same
+    system message to every candidate (a shared prefix). Resumes longer than
+    their budget are cut into word chunks, the chunks most similar to the job
+    embedding are kept, in their original order. Tokens are counted with the
+    local embedding model tokenizer, a close enough proxy for the budget of
+    the remote model.
+
+    Summaries are requested in batches of up to batch_size candidates, one
+    JSON answer keyed by candidate id per batch. A batch is closed early when
+    its excerpts would exceed batch_token_budget or its answer
+    max_batch_output_tokens. A batch_size of 1 disables batching.
+    """
+
+    def __init__(
+        self,
+        embedding_processor: EmbeddingProcessor,
+        job_token_budget: int = 600,
+        resume_token_budget: int = 1200,
+        max_output_tokens: int = 400,
+        chunk_words: int = 80,
+        batch_size: int = 8,
+        batch_token_budget: int = 6000,
+        max_batch_output_tokens: int = 8000,
+    ):
+        self.embedding_processor = embedding_processor
+        self.job_token_budget = job_token_budget
+        self.resume_token_budget = resume_token_budget
+        self.max_output_tokens = max_output_tokens
+        self.chunk_words = chunk_words
+        self.batch_size = batch_size
+        self.batch_token_budget = batch_token_budget
+        self.max_batch_output_tokens = max_batch_output_tokens
+
+    def job_preamble(
+        self,
+        job_description: str,
+        instructions: str = SUMMARY_INSTRUCTIONS,
+    ) -> str:
+        """Instructions and job description, shared by all candidates"""
+        job_description = self.embedding_processor.truncate_to_tokens(
+            job_description.strip(), self.job_token_budget)
+        return f"{instructions}\n\nJob Description:\n{job_description}"
+
+    def build_summary_batches(
+        self,
+        job_description: str,
+        job_embedding: np.ndarray,
+        candidate_ids: List[str],
+        resume_texts: List[str],
+        embedding_processor: EmbeddingProcessor = None,
+    ) -> List[Dict]:
+        """
+        Batched summary calls covering the resumes in order. Each batch has
+        the candidate 'ids', the 'messages' and 'max_tokens' of its call, and
+        the per-candidate 'fallback' messages (a batch of one is a plain
+        summary call: its messages are its fallback). embedding_processor is
+        the model of the job embedding, when not the builder one.
+        """
+        excerpts = self.select_excerpts(job_embedding, resume_texts,
+                                        embedding_processor)
+        single_preamble = self.job_preamble(job_description)
+        batch_preamble = self.job_preamble(job_description,
+                                           BATCH_SUMMARY_INSTRUCTIONS)
+        token_counts = self.embedding_processor.count_tokens(excerpts)
+        max_candidates = max(
+            1,
+            min(self.batch_size,
+                self.max_batch_output_tokens // self.max_output_tokens))
+
+        groups, group, used = [], [], 0
+        for candidate_id, excerpt, tokens in zip(candidate_ids, excerpts,
+                                                 token_counts):
+            # Ids key the JSON answer, so they must be unique within a batch
+            if group and (len(group) >= max_candidates or
+                          used + tokens > self.batch_token_budget or
+                          candidate_id in (item[0] for item in group)):
+                groups.append(group)
+                group, used = [], 0
+            group.append((candidate_id, excerpt))
+            used += tokens
+        if group:
+            groups.append(group)
+
+        batches = []
+        for group in groups:
+            fallback = [
+                self._single_messages(single_preamble, excerpt)
+                for _, excerpt in group
+            ]
+            if len(group) == 1:
+                messages, max_tokens = fallback[0], self.max_output_tokens
+            else:
+                messages = [{
+                    "role": "system",
+                    "content": batch_preamble
+                }, {
+                    "role": "user",
+                    "content": '\n\n'.join(
+                        f"### Candidate {candidate_id}\n{excerpt}"
+                        for candidate_id, excerpt in group)
+                }]
+                max_tokens = self.max_output_tokens * len(group)
+            batches.append({
+                'ids': [candidate_id for candidate_id, _ in group],
+                'messages': messages,
+                'max_tokens': max_tokens,
+                'fallback': fallback,
+            })
+        return batches
+
+    @staticmethod
+    def _single_messages(preamble: str, excerpt: str) -> List[Dict[str, str]]:
+        """Chat messages of the summary call of one resume"""
+        return [{
+            "role": "system",
+            "content": preamble
+        }, {
+            "role": "user",
+            "content": f"Candidate Resume:\n{excerpt}"
+        }]
+
+    def select_excerpts(
+        self,
+        job_embedding: np.ndarray,
+        resume_texts: List[str],
+        embedding_processor: EmbeddingProcessor = None,
+    ) -> List[str]:
+        """
+        Fit each resume into the resume token budget, keeping its chunks most
+        similar to the job. Chunks of all resumes are embedded in one batch,
+        by embedding_processor when given (the model of job_embedding).
+        """
+        token_counts = self.embedding_processor.count_tokens(resume_texts)
+        excerpts = list(resume_texts)
+
+        chunks, owners = [], []
+        for position, (text, tokens) in enumerate(zip(resume_texts,
+                                                      token_counts)):
+            if tokens <= self.resume_token_budget:
+                continue
+            words = text.split()
+            for start in range(0, len(words), self.chunk_words):
+                chunks.append(' '.join(words[start:start + self.chunk_words]))
+                owners.append(position)
+        if not chunks:
+            return excerpts
+
+        chunk_tokens = self.embedding_processor.count_tokens(chunks)
+        embedding_processor = embedding_processor or self.embedding_processor
+        similarities = embedding_processor.calculate_similarities(
+            job_embedding,
+            embedding_processor.generate_embeddings(chunks),
+        )
+
+        owners = np.asarray(owners)
+        for position in np.unique(owners):
+            indexes = np.flatnonzero(owners == position)
+            selected, used = [], 0
+            for index in indexes[np.argsort(-similarities[indexes],
+                                            kind='stable')]:
+                if used + chunk_tokens[index] > self.resume_token_budget:
+                    continue
+                selected.append(index)
+                used += chunk_tokens[index]
+            excerpts[position] = ' ... '.join(
+                chunks[index] for index in sorted(selected))
+        return excerpts
@@ -1,19 +1,50 @@
 from typing import List, Dict
+from concurrent.futures import Executor
+import asyncio
+import json
 import numpy as np
 import base64
 import tempfile, subprocess, re
-import openai
 from pathlib import Path
-from talentmatch import OPENAI_API_KEY
-from talentmatch import DEEPSEEK_API_KEY
 from talentmatch.utils import escape_latex_chars, clean_latex_response
 from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+from talentmatch.etc.lexicalindex import BM25Index, reciprocal_rank_fusion
+from talentmatch.etc.reranker import CrossEncoderReranker
+from talentmatch.etc.promptbuilder import SummaryPromptBuilder
+from talentmatch.etc.llmclient import LLMClient, LLMUnavailableError
+from talentmatch.etc.fieldextractor import FieldExtractor
+
+RETRIEVAL_MODES = ('semantic', 'hybrid')
 
 
 class RecommendationEngine:
 
-    def __init__(self, embedding_processor: EmbeddingProcessor):
+    # Hybrid retrieval: lexical matches kept for semantic re-ranking
+    HYBRID_SHORTLIST_FACTOR = 10
+    HYBRID_MIN_SHORTLIST = 50
+    # Reduced-dimension scoring: candidates kept for full-dimension re-ranking
+    REDUCED_SHORTLIST_FACTOR = 20
+    REDUCED_MIN_SHORTLIST = 200
+    # Reciprocal rank fusion constant
+    RRF_K = 60
+
+    def __init__(
+        self,
+        embedding_processor: EmbeddingProcessor,
+        reranker: CrossEncoderReranker = None,
+        prompt_builder: SummaryPromptBuilder = None,
+        llm_client: LLMClient = None,
+        field_extractor: FieldExtractor = None,
+    ):
         self.embedding_processor = embedding_processor
+        # Cached, single-flight chat completions
+        self.llm_client = llm_client or LLMClient()
+        # Structured fields behind the heuristic summaries
+        self.field_extractor = field_extractor or FieldExtractor()
+        # Optional cross-encoder stage run on the bi-encoder shortlist
+        self.reranker = reranker
+        self.prompt_builder = prompt_builder or SummaryPromptBuilder(
+            embedding_processor)
 
     def find_top_candidates(
         self,
@@ -21,69 +52,350 @@ class RecommendationEngine:
         candidates: List[Dict],
         top_k: int = 10,
         min_similarity: float = 0.1,
+        retrieval: str = 'semantic',
+        lexical_scores: Dict[str, float] = None,
+        rerank: bool = False,
+        embedding_processor: EmbeddingProcessor = None,
+        job_embedding: np.ndarray = None,
+        summarize: bool = True,
     ) -> List[Dict]:
-        """Find the most matching candidates"""
+        """
+        Find the most matching candidates
+
+        In 'hybrid' retrieval mode the candidates are first shortlisted by BM25
+        over their resume texts (lexical_scores may carry precomputed scores
+        from a stored index), the shortlist is ranked semantically and both
+        rankings are merged with reciprocal rank fusion.
+
+        With rerank (and a reranker configured) the best candidates are
+        re-ordered by the cross-encoder before the top k get their summary.
+
+        embedding_processor is the model of the candidate embeddings (the
+        engine model by default), the job description is embedded with it
+        unless its job_embedding is given. Without summarize the returned
+        candidates get no LLM summary.
+        """
         if not candidates:
             return []
+        embedding_processor = embedding_processor or self.embedding_processor
+
+        if retrieval == 'hybrid':
+            candidates, lexical_scores = self._lexical_prefilter(
+                job_description, candidates, top_k, lexical_scores)
+        else:
+            lexical_scores = None
 
         # Generate job description embedding
-        job_embedding = self.embedding_processor.generate_embedding(
-            job_description)
+        if job_embedding is None:
+            job_embedding = embedding_processor.generate_embedding(
+                job_description)
 
         ideal_candidate = self._query_openai_for_ideal_candidate(
             job_description)
 
-        ideal_candidate_embedding = self.embedding_processor.generate_embedding(
-            ideal_candidate[:max([len(x["resume_text"]) for x in candidates])])
+        ideal_candidate_embedding = embedding_processor.generate_embedding(
+            self._truncate_ideal_candidate(ideal_candidate, candidates))
 
-        optimal_similarity = self.embedding_processor.calculate_similarity(
+        optimal_similarity = embedding_processor.calculate_similarity(
             job_embedding, ideal_candidate_embedding)
 
-        # Calculate similarity for each candidate
-        candidate_scores = []
+        rerank = rerank and self.reranker is not None
+        top_candidates = self._select_top_candidates(
+            job_embedding,
+            optimal_similarity,
+            candidates,
+            self._shortlist_size(top_k, rerank),
+            min_similarity,
+            lexical_scores,
+        )
+        if rerank:
+            top_candidates = self.reranker.rerank(job_description,
+                                                  top_candidates)[:top_k]
 
-        for candidate in candidates:
-            if 'embedding' not in candidate:
-                continue
-
-            # Convert embedding back to numpy array
-            candidate_embedding = np.array(candidate['embedding'])
-
-            # Calculate similarity
-            similarity = self.embedding_processor.calculate_similarity(
-                job_embedding,
-                candidate_embedding,
-            ) / optimal_similarity
-
-            if True or (similarity >= min_similarity):
-                # Generate annotated resume using OpenAI and LaTeX
-                # annotated_resume_base64 = self._generate_annotated_resume(
-                #     job_description, candidate)
-
-                summary = self._query_openai_for_summary(
-                    job_description, candidate["resume_text"])
-
-                candidate_scores.append(
-                    {
-                        'id': candidate['id'],
-                        'name': candidate['name'],
-                        'similarity_score': similarity,
-                        # 'summary': candidate.get('summary', ''),
-                        "summary": summary,
-                        # 'annotated_resume': annotated_resume_base64,
-                        'resume_text': candidate["resume_text"],
-                        'resume': candidate.get('resume', ''),
-                        'resume_name': candidate.get('resume_name', ''),
-                    }, )
-
-        # Sort by similarity
-        candidate_scores.sort(
-            key=lambda x: x['similarity_score'],
+        if not summarize:
+            return top_candidates
+
+        # Only the returned candidates get an LLM summary
+        summaries = self.summarize_candidates(job_description, job_embedding,
+                                              top_candidates,
+                                              embedding_processor)
+        for candidate_score, summary in zip(top_candidates, summaries):
+            candidate_score['summary'] = summary
+
+        return top_candidates
+
+    def summarize_candidates(
+        self,
+        job_description: str,
+        job_embedding: np.ndarray,
+        candidates: List[Dict],
+        embedding_processor: EmbeddingProcessor = None,
+    ) -> List[str]:
+        """
+        Summaries of candidates ({'id', 'resume_text', ...}) against a job, in
+        batched LLM calls, heuristic ones when the LLM is unavailable
+        """
+        summary_batches = self.prompt_builder.build_summary_batches(
+            job_description,
+            job_embedding,
+            [str(candidate['id']) for candidate in candidates],
+            [candidate['resume_text'] for candidate in candidates],
+            embedding_processor or self.embedding_processor,
+        )
+        return [
+            summary for batch, group in zip(
+                summary_batches, self._batch_groups(summary_batches,
+                                                    candidates))
+            for summary in self._summarize_batch(job_description, batch, group)
+        ]
+
+    async def find_top_candidates_async(
+        self,
+        job_description: str,
+        candidates: List[Dict],
+        top_k: int = 10,
+        min_similarity: float = 0.1,
+        retrieval: str = 'semantic',
+        lexical_scores: Dict[str, float] = None,
+        rerank: bool = False,
+        executor: Executor = None,
+        embedding_processor: EmbeddingProcessor = None,
+        job_embedding: np.ndarray = None,
+        summarize: bool = True,
+    ) -> List[Dict]:
+        """
+        Find the most matching candidates without blocking the event loop
+
+        Embeddings are computed in the executor while the LLM calls are
+        awaited, the summary batches of the returned candidates run
+        concurrently.
+        Retrieval modes, re-ranking, the embedding processor, the job
+        embedding and summarize are the same as in find_top_candidates.
+        """
+        if not candidates:
+            return []
+        embedding_processor = embedding_processor or self.embedding_processor
+
+        if retrieval == 'hybrid':
+            candidates, lexical_scores = self._lexical_prefilter(
+                job_description, candidates, top_k, lexical_scores)
+        else:
+            lexical_scores = None
+
+        loop = asyncio.get_running_loop()
+
+        # Embed the job description while the ideal candidate is generated
+        job_embedding_future = loop.run_in_executor(
+            executor,
+            embedding_processor.generate_embedding,
+            job_description,
+        ) if job_embedding is None else None
+        ideal_candidate = await self._query_openai_for_ideal_candidate_async(
+            job_description)
+        if job_embedding_future is not None:
+            job_embedding = await job_embedding_future
+
+        ideal_candidate_embedding = await loop.run_in_executor(
+            executor,
+            embedding_processor.generate_embedding,
+            self._truncate_ideal_candidate(ideal_candidate, candidates),
+        )
+
+        optimal_similarity = embedding_processor.calculate_similarity(
+            job_embedding, ideal_candidate_embedding)
+
+        rerank = rerank and self.reranker is not None
+        top_candidates = self._select_top_candidates(
+            job_embedding,
+            optimal_similarity,
+            candidates,
+            self._shortlist_size(top_k, rerank),
+            min_similarity,
+            lexical_scores,
+        )
+        if rerank:
+            top_candidates = (await loop.run_in_executor(
+                executor,
+                self.reranker.rerank,
+                job_description,
+                top_candidates,
+            ))[:top_k]
+        if not summarize:
+            return top_candidates
+
+        summary_batches = await loop.run_in_executor(
+            executor,
+            self.prompt_builder.build_summary_batches,
+            job_description,
+            job_embedding,
+            [str(candidate_score['id']) for candidate_score in top_candidates],
+            [candidate_score['resume_text'] for candidate_score in top_candidates],
+            embedding_processor,
+        )
+        batch_summaries = await asyncio.gather(*[
+            self._summarize_batch_async(job_description, batch, group)
+            for batch, group in zip(
+                summary_batches,
+                self._batch_groups(summary_batches, top_candidates))
+        ])
+        summaries = [
+            summary for batch in batch_summaries for summary in batch
+        ]
+        for candidate_score, summary in zip(top_candidates, summaries):
+            candidate_score['summary'] = summary
+
+        return top_candidates
+
+    def _truncate_ideal_candidate(
+        self,
+        ideal_candidate: str,
+        candidates: List[Dict],
+    ) -> str:
+        """Cut the ideal candidate to the longest candidate resume"""
+        longest = max([len(x["resume_text"]) for x in candidates])
+        return ideal_candidate[:longest] if longest else ideal_candidate
+
+    def _shortlist_size(self, top_k: int, rerank: bool) -> int:
+        """Number of ranked candidates kept before the optional re-ranking"""
+        if not rerank:
+            return top_k
+        return max(top_k, self.reranker.shortlist_size)
+
+    def hybrid_shortlist_size(self, top_k: int) -> int:
+        """Number of lexical matches kept for semantic re-ranking"""
+        return max(top_k * self.HYBRID_SHORTLIST_FACTOR,
+                   self.HYBRID_MIN_SHORTLIST)
+
+    def ranking_size(self, top_k: int) -> int:
+        """
+        Most candidates the semantic ranking can keep for a request,
+        whether or not it re-ranks
+        """
+        if self.reranker is None:
+            return top_k
+        return self._shortlist_size(top_k, True)
+
+    def reduced_shortlist_size(self, top_k: int) -> int:
+        """
+        Number of candidates kept by reduced-dimension scoring for the full
+        dimension ranking
+        """
+        return max(self.ranking_size(top_k) * self.REDUCED_SHORTLIST_FACTOR,
+                   self.REDUCED_MIN_SHORTLIST)
+
+    def _lexical_prefilter(
+        self,
+        job_description: str,
+        candidates: List[Dict],
+        top_k: int,
+        lexical_scores: Dict[str, float] = None,
+    ):
+        """
+        Keep the best BM25 matches of the job description
+        :return: (shortlisted candidates, lexical scores by candidate id)
+        """
+        if lexical_scores is None:
+            index = BM25Index.from_documents(
+                (candidate['id'], candidate['resume_text'])
+                for candidate in candidates)
+            lexical_scores = dict(index.search(job_description))
+
+        matched = [
+            candidate for candidate in candidates
+            if candidate['id'] in lexical_scores
+        ]
+        if len(matched) < top_k:
+            # Too few lexical matches, keep semantic recall over everyone
+            return candidates, lexical_scores
+
+        matched.sort(key=lambda x: lexical_scores[x['id']], reverse=True)
+        return matched[:self.hybrid_shortlist_size(top_k)], lexical_scores
+
+    def _select_top_candidates(
+        self,
+        job_embedding: np.ndarray,
+        optimal_similarity: float,
+        candidates: List[Dict],
+        top_k: int,
+        min_similarity: float,
+        lexical_scores: Dict[str, float] = None,
+    ) -> List[Dict]:
+        """Semantic top k, fused with the lexical ranking when scores are given"""
+        if lexical_scores is None:
+            return self._rank_candidates(job_embedding, optimal_similarity,
+                                         candidates, top_k, min_similarity)
+
+        ranked = self._rank_candidates(job_embedding, optimal_similarity,
+                                       candidates, len(candidates),
+                                       min_similarity)
+        lexical_ranking = sorted(
+            (x['id'] for x in ranked if x['id'] in lexical_scores),
+            key=lambda candidate_id: lexical_scores[candidate_id],
             reverse=True,
         )
+        fusion_scores = reciprocal_rank_fusion(
+            [[x['id'] for x in ranked], lexical_ranking], self.RRF_K)
+
+        for candidate_score in ranked:
+            candidate_score['lexical_score'] = lexical_scores.get(
+                candidate_score['id'], 0.0)
+            candidate_score['fusion_score'] = fusion_scores[
+                candidate_score['id']]
+
+        ranked.sort(key=lambda x: x['fusion_score'], reverse=True)
+        return ranked[:top_k]
+
+    def _rank_candidates(
+        self,
+        job_embedding: np.ndarray,
+        optimal_similarity: float,
+        candidates: List[Dict],
+        top_k: int,
+        min_similarity: float,
+    ) -> List[Dict]:
+        """
+        Score candidates against the job and return the top k, best first
+
+        Similarities are computed in one matrix product, candidates below
+        min_similarity are dropped before the top k selection.
+        """
+        candidates = [
+            candidate for candidate in candidates
+            if candidate.get('embedding') is not None
+        ]
+        if not candidates or top_k <= 0:
+            return []
 
-        # Return top k candidates
-        return candidate_scores[:top_k]
+        embeddings = np.stack([
+            np.asarray(candidate['embedding'], dtype=np.float32)
+            for candidate in candidates
+        ])
+        similarities = self.embedding_processor.calculate_similarities(
+            job_embedding, embeddings) / optimal_similarity
+
+        selected = np.flatnonzero(similarities >= min_similarity)
+        if len(selected) > top_k:
+            selected = selected[np.argpartition(-similarities[selected],
+                                                top_k - 1)[:top_k]]
+        selected = selected[np.argsort(-similarities[selected],
+                                       kind='stable')]
+
+        # Generate annotated resume using OpenAI and LaTeX
+        # annotated_resume_base64 = self._generate_annotated_resume(
+        #     job_description, candidate)
+        return [{
+            'id': candidates[index]['id'],
+            'name': candidates[index]['name'],
+            'similarity_score': float(similarities[index]),
+            "summary": "",
+            # 'annotated_resume': annotated_resume_base64,
+            'resume_text': candidates[index]["resume_text"],
+            'resume': candidates[index].get('resume', ''),
+            'resume_name': candidates[index].get('resume_name', ''),
+            'fields': candidates[index].get('fields'),
+            'location': candidates[index].get('location', ''),
+            'tags': candidates[index].get('tags', []),
+        } for index in selected]
 
     def _query_openai_for_latex(
         self,
@@ -94,10 +406,6 @@ class RecommendationEngine:
         Query DeepSeek to generate LaTeX annotated resume
         """
         try:
-            # client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            client = openai.OpenAI(api_key=DEEPSEEK_API_KEY,
-                                   base_url="https://api.deepseek.com")
-
             # More strict prompts, emphasize output format
             prompt = f"""
             Create a professional LaTeX resume document. IMPORTANT: Your response must contain ONLY the LaTeX code, no explanations or markdown formatting.
@@ -122,9 +430,8 @@ class RecommendationEngine:
             Output only valid LaTeX code starting with \\documentclass and ending with \\end{{document}}.
             """
 
-            response = client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[{
+            latex_response = self.llm_client.complete(
+                [{
                     "role": "user",
                     "content": prompt
                 }],
@@ -132,8 +439,6 @@ class RecommendationEngine:
                 temperature=0.3,
             )
 
-            latex_response = response.choices[0].message.content
-
             # Clean returned LaTeX code
             cleaned_latex = clean_latex_response(latex_response)
 
@@ -144,44 +449,173 @@ class RecommendationEngine:
             # Use placeholder implementation as fallback
             return self._generate_placeholder_latex(candidate)
 
-    def _query_openai_for_summary(
+    @staticmethod
+    def _batch_groups(batches: List[Dict],
+                      candidates: List[Dict]) -> List[List[Dict]]:
+        """Candidates of each summary batch (batches cover them in order)"""
+        groups, start = [], 0
+        for batch in batches:
+            groups.append(candidates[start:start + len(batch['ids'])])
+            start += len(batch['ids'])
+        return groups
+
+    def _summarize_batch(
         self,
         job_description: str,
-        candidate: str,
-    ) -> str:
-        """
-        Query DeepSeek to generate LaTeX annotated resume
-        """
-        # client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        client = openai.OpenAI(api_key=DEEPSEEK_API_KEY,
-                               base_url="https://api.deepseek.com")
-
-        # More strict prompts, emphasize output format
-        prompt = f"""
-        Given the following job description and candidate resume, return a summary of the candidate's qualifications and whether they match the job requirements in plain text  in plain text in plain text in plain text in plain text.
+        batch: Dict,
+        candidates: List[Dict],
+    ) -> List[str]:
+        """Summaries of a batch, heuristic ones when the LLM is unavailable"""
+        try:
+            return self._query_openai_for_summary_batch(batch)
+        except LLMUnavailableError as e:
+            print(f"{e}, using heuristic summaries")
+            return self._heuristic_summaries(job_description, candidates)
 
-        Job Description:
-        {job_description}
+    async def _summarize_batch_async(
+        self,
+        job_description: str,
+        batch: Dict,
+        candidates: List[Dict],
+    ) -> List[str]:
+        """Summaries of a batch, awaited"""
+        try:
+            return await self._query_openai_for_summary_batch_async(batch)
+        except LLMUnavailableError as e:
+            print(f"{e}, using heuristic summaries")
+            return self._heuristic_summaries(job_description, candidates)
 
-        Candidate Resume (already LaTeX-escaped):
-        {candidate}
+    def _heuristic_summaries(
+        self,
+        job_description: str,
+        candidates: List[Dict],
+    ) -> List[str]:
+        """Local summaries from the structured fields of the candidates"""
+        job_skills = set(
+            self.field_extractor.extract_rules(job_description)['skills'])
+        summaries = []
+        for candidate in candidates:
+            fields = candidate.get('fields') or \
+                self.field_extractor.extract_rules(candidate['resume_text'])
+            profile = (fields['titles'] or ['Candidate'])[0].title()
+            if fields['years_experience']:
+                profile += f" with {fields['years_experience']:g} years of experience"
+            parts = [profile]
+            if fields['education'] not in (None, 'none'):
+                parts.append(f"Education: {fields['education']} degree")
+            if job_skills:
+                matched = sorted(job_skills.intersection(fields['skills']))
+                missing = sorted(job_skills.difference(fields['skills']))
+                parts.append(f"Matches {len(matched)} of {len(job_skills)} "
+                             f"job skills: {', '.join(matched) or 'none'}")
+                if missing:
+                    parts.append(f"Missing: {', '.join(missing)}")
+            elif fields['skills']:
+                parts.append(f"Skills: {', '.join(fields['skills'])}")
+            parts.append("Automatic summary, the LLM was unavailable")
+            summaries.append('. '.join(parts) + '.')
+        return summaries
+
+    def _query_openai_for_summary_batch(self, batch: Dict) -> List[str]:
+        """
+        Summaries of a summary batch, candidates missing from the batched
+        answer are summarized one by one
+        """
+        if len(batch['ids']) == 1:
+            return [self._query_openai_for_summary(batch['messages'])]
+
+        summaries = self._parse_batch_summaries(
+            self.llm_client.complete(
+                batch['messages'],
+                max_tokens=batch['max_tokens'],
+                temperature=0.2,
+                response_format={"type": "json_object"},
+            ), batch['ids'])
+        return [
+            summary if summary is not None else
+            self._query_openai_for_summary(messages)
+            for summary, messages in zip(summaries, batch['fallback'])
+        ]
 
+    async def _query_openai_for_summary_batch_async(
+            self, batch: Dict) -> List[str]:
+        """Summaries of a summary batch, awaited"""
+        if len(batch['ids']) == 1:
+            return [await self._query_openai_for_summary_async(
+                batch['messages'])]
+
+        summaries = self._parse_batch_summaries(
+            await self.llm_client.complete_async(
+                batch['messages'],
+                max_tokens=batch['max_tokens'],
+                temperature=0.2,
+                response_format={"type": "json_object"},
+            ), batch['ids'])
+        fallbacks = await asyncio.gather(*[
+            self._query_openai_for_summary_async(messages)
+            for summary, messages in zip(summaries, batch['fallback'])
+            if summary is None
+        ])
+        fallbacks = iter(fallbacks)
+        return [
+            summary if summary is not None else next(fallbacks)
+            for summary in summaries
+        ]
 
+    @staticmethod
+    def _parse_batch_summaries(response: str,
+                               candidate_ids: List[str]) -> List[str]:
+        """
+        Summaries of a batched answer in candidate order, None for the
+        candidates it lacks (or for all of them when it is not valid JSON)
         """
+        try:
+            summaries = json.loads(response or '')
+        except json.JSONDecodeError:
+            summaries = None
+        if isinstance(summaries, dict) and isinstance(
+                summaries.get('summaries'), dict):
+            summaries = summaries['summaries']
+        if not isinstance(summaries, dict):
+            print("Batched summary answer is not a JSON object, "
+                  "summarizing candidates one by one")
+            return [None] * len(candidate_ids)
+
+        results = []
+        for candidate_id in candidate_ids:
+            summary = summaries.get(candidate_id)
+            results.append(summary.strip() if isinstance(summary, str) and
+                           summary.strip() else None)
+        if None in results:
+            print(f"Batched summary answer lacks {results.count(None)}/"
+                  f"{len(candidate_ids)} candidates")
+        return results
 
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }],
-            max_tokens=4000,
+    def _query_openai_for_summary(
+        self,
+        messages: List[Dict[str, str]],
+    ) -> str:
+        """
+        Query DeepSeek for a candidate summary (messages from the prompt builder)
+        """
+        return self.llm_client.complete(
+            messages,
+            max_tokens=self.prompt_builder.max_output_tokens,
             temperature=0.2,
         )
 
-        latex_response = response.choices[0].message.content
-
-        return latex_response
+    async def _query_openai_for_summary_async(
+        self,
+        messages: List[Dict[str, str]],
+    ) -> str:
+        """
+        Query DeepSeek for a candidate summary without blocking the event loop
+        """
+        return await self.llm_client.complete_async(
+            messages,
+            max_tokens=self.prompt_builder.max_output_tokens,
+            temperature=0.2,
+        )
 
     def _query_openai_for_ideal_candidate(
         self,
@@ -189,11 +623,45 @@ class RecommendationEngine:
     ) -> str:
         """
         Query OpenAI to generate LaTeX annotated resume
+
+        Without the LLM the job description itself stands for the ideal
+        candidate.
         """
-        # client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        client = openai.OpenAI(api_key=DEEPSEEK_API_KEY,
-                               base_url="https://api.deepseek.com")
+        try:
+            return self.llm_client.complete(
+                [{
+                    "role": "user",
+                    "content": self._ideal_candidate_prompt(job_description)
+                }],
+                max_tokens=4000,
+                temperature=0.3,
+            )
+        except LLMUnavailableError as e:
+            print(f"{e}, using the job description as ideal candidate")
+            return job_description
 
+    async def _query_openai_for_ideal_candidate_async(
+        self,
+        job_description: str,
+    ) -> str:
+        """
+        Query DeepSeek for the ideal candidate without blocking the event loop
+        """
+        try:
+            return await self.llm_client.complete_async(
+                [{
+                    "role": "user",
+                    "content": self._ideal_candidate_prompt(job_description)
+                }],
+                max_tokens=4000,
+                temperature=0.3,
+            )
+        except LLMUnavailableError as e:
+            print(f"{e}, using the job description as ideal candidate")
+            return job_description
+
+    def _ideal_candidate_prompt(self, job_description: str) -> str:
+        """Build the ideal candidate prompt"""
         # More strict prompts, emphasize output format
         prompt = f"""
         In a pipeline where multiple candidates are being evaluated for a job position, it is useful to imagine the ideal candidate who perfectly fits the job requirements as the upper bound. Given the following job description, return a resume style description of the ideal candidate in plain text.
@@ -202,20 +670,7 @@ class RecommendationEngine:
         {job_description}
 
         """
-
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }],
-            max_tokens=4000,
-            temperature=0.3,
-        )
-
-        latex_response = response.choices[0].message.content
-
-        return latex_response
+        return prompt
 
     def _generate_annotated_resume(self, job_description: str,
                                    candidate: Dict) -> str:
@@ -242,7 +697,8 @@ class RecommendationEngine:
 
             # Step 2: Compile LaTeX to PDF
             pdf_path = self._compile_latex_to_pdf(latex_content,
-                                                  candidate['id'])
+                                                  candidate['id'],
+                                                  fallback_candidate=candidate)
 
             # Step 3: Convert PDF to base64
             if pdf_path and pdf_path.exists():
@@ -271,10 +727,6 @@ class RecommendationEngine:
         Query OpenAI to generate LaTeX annotated resume
         """
         try:
-            # client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            client = openai.OpenAI(api_key=DEEPSEEK_API_KEY,
-                                   base_url="https://api.deepseek.com")
-
             # More strict prompts, emphasize output format
             prompt = f"""
             Create a professional LaTeX resume document. IMPORTANT: Your response must contain ONLY the LaTeX code, no explanations or markdown formatting.
@@ -299,9 +751,8 @@ class RecommendationEngine:
             Output only valid LaTeX code starting with \\documentclass and ending with \\end{{document}}.
             """
 
-            response = client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[{
+            latex_response = self.llm_client.complete(
+                [{
                     "role": "user",
                     "content": prompt
                 }],
@@ -309,8 +760,6 @@ class RecommendationEngine:
                 temperature=0.3,
             )
 
-            latex_response = response.choices[0].message.content
-
             # Clean returned LaTeX code
             cleaned_latex = clean_latex_response(latex_response)
 
@@ -370,9 +819,14 @@ class RecommendationEngine:
         self,
         latex_content: str,
         candidate_id: str,
+        fallback_candidate: Dict = None,
     ) -> Path:
         """
         Compile LaTeX content to PDF using pdflatex
+
+        When compilation fails and fallback_candidate is given, the placeholder
+        LaTeX of that candidate is compiled once instead. The retry state is
+        carried by the arguments so concurrent calls never share it.
         """
         try:
             # Preprocess LaTeX content, remove possible issues
@@ -434,18 +888,15 @@ class RecommendationEngine:
                 print(f"Debug .tex file saved to: {debug_tex_path}")
 
                 # If OpenAI-generated LaTeX fails, try using placeholder
-                if not hasattr(self, '_tried_placeholder'):
+                if fallback_candidate is not None:
                     print(
                         f"Trying placeholder LaTeX for candidate {candidate_id}"
                     )
-                    self._tried_placeholder = True
                     placeholder_latex = self._generate_placeholder_latex(
-                        candidate)
-                    delattr(self, '_tried_placeholder')  # Clear flag
+                        fallback_candidate)
                     return self._compile_latex_to_pdf(placeholder_latex,
                                                       candidate_id)
                 else:
-                    delattr(self, '_tried_placeholder')  # Clear flag
                     return None
 
         except subprocess.TimeoutExpired:
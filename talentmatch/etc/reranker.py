@@ -0,0 +1,109 @@
+"""
+Cross-encoder re-ranking of the bi-encoder shortlist
+"""
+from typing import Dict, List
+import threading
+import time
+import numpy as np
+from sentence_transformers import CrossEncoder
+from talentmatch.utils import clean_text
+
+
+class CrossEncoderReranker:
+    """
+    Re-rank the best bi-encoder candidates with a local cross-encoder
+
+    Each resume is split into word chunks and scored as (job, chunk) pairs,
+    the candidate score is its best chunk. Only the top shortlist_size
+    candidates are scored, in batches on CPU, and scoring stops once the
+    latency budget is spent: the scored prefix is re-ordered and the rest
+    keeps its bi-encoder order behind it.
+    """
+
+    def __init__(
+        self,
+        model_name: str = 'cross-encoder/ms-marco-MiniLM-L-6-v2',
+        shortlist_size: int = 20,
+        latency_budget_ms: float = 500,
+        batch_size: int = 16,
+        chunk_words: int = 200,
+        max_chunks: int = 4,
+    ):
+        self.model_name = model_name
+        self.shortlist_size = shortlist_size
+        self.latency_budget_ms = latency_budget_ms
+        self.batch_size = batch_size
+        self.chunk_words = chunk_words
+        self.max_chunks = max_chunks
+        self._model = None
+        # Loading and predicting share the tokenizer, not safe concurrently
+        self._lock = threading.Lock()
+
+    def _get_model(self) -> CrossEncoder:
+        """Load the cross-encoder on first use (lock must be held)"""
+        if self._model is None:
+            self._model = CrossEncoder(self.model_name, device='cpu')
+        return self._model
+
+    def _chunks(self, text: str) -> List[str]:
+        """Split a resume into at most max_chunks word chunks"""
+        words = clean_text(text or '').split()
+        if not words:
+            return ['']
+        return [
+            ' '.join(words[start:start + self.chunk_words])
+            for start in range(0, len(words), self.chunk_words)
+        ][:self.max_chunks]
+
+    def rerank(self, job_description: str,
+               candidates: List[Dict]) -> List[Dict]:
+        """
+        Re-rank candidates (best bi-encoder score first), scored candidates
+        get a 'rerank_score'
+        """
+        shortlist = candidates[:self.shortlist_size]
+        if not shortlist:
+            return candidates
+
+        # Pairs are grouped per candidate so a batch never splits one
+        pairs, owners = [], []
+        for position, candidate in enumerate(shortlist):
+            for chunk in self._chunks(candidate['resume_text']):
+                pairs.append((job_description, chunk))
+                owners.append(position)
+        owners = np.asarray(owners)
+
+        started = time.perf_counter()
+        scores = np.full(len(pairs), -np.inf, dtype=np.float32)
+        scored_pairs = 0
+        with self._lock:
+            model = self._get_model()
+            while scored_pairs < len(pairs):
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if scored_pairs and elapsed_ms >= self.latency_budget_ms:
+                    break
+                end = min(scored_pairs + self.batch_size, len(pairs))
+                # Extend the batch to the last chunk of its candidate
+                while end < len(pairs) and owners[end] == owners[end - 1]:
+                    end += 1
+                scores[scored_pairs:end] = model.predict(
+                    pairs[scored_pairs:end],
+                    batch_size=self.batch_size,
+                    show_progress_bar=False,
+                )
+                scored_pairs = end
+
+        scored_count = int(owners[scored_pairs - 1]) + 1
+        candidate_scores = np.full(scored_count, -np.inf, dtype=np.float32)
+        np.maximum.at(candidate_scores, owners[:scored_pairs],
+                      scores[:scored_pairs])
+        for position in range(scored_count):
+            shortlist[position]['rerank_score'] = float(
+                candidate_scores[position])
+
+        order = np.argsort(-candidate_scores, kind='stable')
+        if scored_count < len(shortlist):
+            print(f"Re-ranking budget spent after {scored_count}/"
+                  f"{len(shortlist)} candidates")
+        return [shortlist[position] for position in order] + \
+            shortlist[scored_count:] + candidates[self.shortlist_size:]
@@ -0,0 +1,142 @@
+"""
+Content-addressed storage of resume PDFs
+"""
+from typing import Any, Dict, Iterable, Optional
+from pathlib import Path
+import hashlib
+import os
+import re
+import threading
+import time
+import uuid
+
+# sha256 names, and the uuid4 hex names of files written before
+_NAME_PATTERN = re.compile(r'^(?:[0-9a-f]{64}|[0-9a-f]{32})\.pdf$')
+_TEMP_SUFFIX = '.tmp'
+
+
+class ResumeFileStore:
+    """
+    Resume PDFs in a directory, named by the sha256 of their bytes
+
+    Saving a resume already stored writes nothing and only refreshes the
+    file modification time, which collect() uses as the last use: files not
+    referenced by stored candidates are removed once older than the
+    retention window. A file never changes under its name, so the name is a
+    strong ETag.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        # A file refreshed by save() is never removed by a concurrent collect()
+        self._files_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stats = {
+            'gc_runs': 0,
+            'removed_files': 0,
+            'reclaimed_bytes': 0,
+            'last_gc_at': None,
+            'last_gc_seconds': None,
+            'last_removed_files': 0,
+            'last_reclaimed_bytes': 0,
+        }
+
+    @staticmethod
+    def is_valid_name(name: str) -> bool:
+        """Whether a name can be a stored resume (no path traversal)"""
+        return bool(_NAME_PATTERN.match(name or ''))
+
+    @staticmethod
+    def etag(name: str) -> str:
+        """Strong ETag of a stored resume"""
+        return name[:-len('.pdf')]
+
+    def save(self, data: bytes) -> str:
+        """Store resume PDF bytes, returns the file name"""
+        name = f"{hashlib.sha256(data).hexdigest()}.pdf"
+        path = self.directory / name
+        with self._files_lock:
+            try:
+                os.utime(path)
+                return name
+            except FileNotFoundError:
+                pass
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Readers never see a partial file
+        temp_path = self.directory / f"{name}.{uuid.uuid4().hex}{_TEMP_SUFFIX}"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        with self._files_lock:
+            os.replace(temp_path, path)
+        return name
+
+    def path(self, name: str) -> Optional[Path]:
+        """Path of a stored resume, None when the name is invalid or missing"""
+        if not self.is_valid_name(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def collect(
+        self,
+        referenced: Iterable[str],
+        retention_seconds: float,
+    ) -> Dict[str, Any]:
+        """
+        Remove the resumes not in referenced and unused for longer than the
+        retention window (and temporary files left by interrupted writes)
+        :return: {'removed_files', 'reclaimed_bytes', 'kept_files',
+                  'kept_bytes', 'seconds'}
+        """
+        started = time.time()
+        referenced = set(referenced)
+        cutoff = started - retention_seconds
+        removed_files = reclaimed_bytes = kept_files = kept_bytes = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            entries = []
+
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            removable = entry.name.endswith(_TEMP_SUFFIX) or \
+                (self.is_valid_name(entry.name) and
+                 entry.name not in referenced)
+            try:
+                with self._files_lock:
+                    stat = os.stat(entry.path, follow_symlinks=False)
+                    removed = removable and stat.st_mtime < cutoff
+                    if removed:
+                        os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+            if removed:
+                removed_files += 1
+                reclaimed_bytes += stat.st_size
+            else:
+                kept_files += 1
+                kept_bytes += stat.st_size
+
+        result = {
+            'removed_files': removed_files,
+            'reclaimed_bytes': reclaimed_bytes,
+            'kept_files': kept_files,
+            'kept_bytes': kept_bytes,
+            'seconds': round(time.time() - started, 3),
+        }
+        with self._lock:
+            self._stats['gc_runs'] += 1
+            self._stats['removed_files'] += removed_files
+            self._stats['reclaimed_bytes'] += reclaimed_bytes
+            self._stats['last_gc_at'] = started
+            self._stats['last_gc_seconds'] = result['seconds']
+            self._stats['last_removed_files'] = removed_files
+            self._stats['last_reclaimed_bytes'] = reclaimed_bytes
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Garbage collection counters since startup"""
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,167 @@
+"""
+Local match explanations: resume sections most similar to the job requirements
+"""
+from typing import Any, Dict, List, Tuple
+from collections import OrderedDict
+import re
+import threading
+import numpy as np
+from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+from talentmatch.utils import resume_content_hash
+
+# Lines, and sentences within a line
+_SECTION_BOUNDARY = re.compile(r'\n+|(?<=[.!?;])\s+')
+_BULLET = re.compile(r'^[\s\-*•·▪●◦>]+')
+
+
+def split_sections(text: str, max_words: int = 40,
+                   min_words: int = 3) -> List[str]:
+    """
+    Split a text into sections: lines and sentences, shorter ones joined to
+    the next and longer ones cut every max_words words
+    """
+    sections, pending = [], []
+    for piece in _SECTION_BOUNDARY.split(text or ''):
+        words = _BULLET.sub('', piece).split()
+        if not words:
+            continue
+        pending.extend(words)
+        if len(pending) < min_words:
+            continue
+        for start in range(0, len(pending), max_words):
+            sections.append(' '.join(pending[start:start + max_words]))
+        pending = []
+    if pending:
+        sections.append(' '.join(pending))
+    return sections
+
+
+class SectionExplainer:
+    """
+    Explain matches by the resume sections closest to the job requirements
+
+    Resumes are split into sections whose normalized embeddings are cached
+    (float16, least recently used evicted) by model fingerprint and resume
+    content hash, so index() at ingest makes the match-time work one encode
+    of the job requirement sentences and one matrix product over the
+    sections of all recommended candidates. No LLM is involved.
+    """
+
+    def __init__(
+        self,
+        max_cache_entries: int = 2000,
+        max_sections: int = 64,
+        snippets: int = 3,
+    ):
+        self.max_cache_entries = max_cache_entries
+        self.max_sections = max_sections
+        self.snippets = snippets
+        self._cache: 'OrderedDict[Tuple[str, str], Tuple[List[str], np.ndarray]]' = \
+            OrderedDict()
+        self._lock = threading.Lock()
+
+    def cache_size(self) -> int:
+        """Get cached resume count"""
+        return len(self._cache)
+
+    @staticmethod
+    def _content_hash(candidate: Dict[str, Any]) -> str:
+        return candidate.get('content_hash') or \
+            resume_content_hash(candidate.get('resume_text') or '')
+
+    def index(self, candidates: List[Dict[str, Any]],
+              embedding_processor: EmbeddingProcessor):
+        """Embed and cache the sections of candidates ({'resume_text', ...})"""
+        self._sections(candidates, embedding_processor)
+
+    def _sections(
+        self,
+        candidates: List[Dict[str, Any]],
+        embedding_processor: EmbeddingProcessor,
+    ) -> List[Tuple[List[str], np.ndarray]]:
+        """(sections, embeddings) of candidates, missing ones in one encode"""
+        keys = [(embedding_processor.fingerprint, self._content_hash(candidate))
+                for candidate in candidates]
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+
+        missing = {}
+        for key, candidate in zip(keys, candidates):
+            if key not in found and key not in missing:
+                missing[key] = split_sections(
+                    candidate.get('resume_text') or '')[:self.max_sections]
+        texts = [section for sections in missing.values()
+                 for section in sections]
+        if texts:
+            embeddings = self._normalized(
+                embedding_processor.generate_embeddings(texts))
+            start = 0
+            for key, sections in missing.items():
+                found[key] = (sections, embeddings[start:start +
+                                                   len(sections)].astype(
+                                                       np.float16))
+                start += len(sections)
+        for key, sections in missing.items():
+            found.setdefault(
+                key, (sections,
+                      np.zeros((0, embedding_processor.dimension),
+                               dtype=np.float16)))
+
+        with self._lock:
+            for key in missing:
+                self._cache[key] = found[key]
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+        return [found[key] for key in keys]
+
+    @staticmethod
+    def _normalized(embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        return embeddings / np.maximum(
+            np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+    def explain(
+        self,
+        job_description: str,
+        candidates: List[Dict[str, Any]],
+        embedding_processor: EmbeddingProcessor,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Best supporting snippets of each candidate, best first:
+        [{'text', 'requirement', 'score'}]
+
+        A section scores its cosine similarity with the closest job
+        requirement sentence.
+        """
+        requirements = split_sections(job_description)
+        if not candidates or not requirements:
+            return [[] for _ in candidates]
+
+        requirement_embeddings = self._normalized(
+            embedding_processor.generate_embeddings(requirements))
+        sections = self._sections(candidates, embedding_processor)
+        matrix = np.concatenate([embeddings for _, embeddings in sections])
+        if not len(matrix):
+            return [[] for _ in candidates]
+
+        # One product for the sections of every candidate
+        scores = matrix.astype(np.float32) @ requirement_embeddings.T
+        best_requirements = scores.argmax(axis=1)
+        best_scores = scores.max(axis=1)
+
+        explanations, start = [], 0
+        for texts, _ in sections:
+            end = start + len(texts)
+            order = np.argsort(-best_scores[start:end],
+                               kind='stable')[:self.snippets]
+            explanations.append([{
+                'text': texts[index],
+                'requirement': requirements[best_requirements[start + index]],
+                'score': round(float(best_scores[start + index]), 4),
+            } for index in order])
+            start = end
+        return explanations
@@ -0,0 +1,366 @@
+"""
+Sharded embedding index, scored by worker processes with scatter-gather top-k
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from itertools import islice
+import heapq
+import multiprocessing
+import threading
+import zlib
+import numpy as np
+
+
+class ShardUnavailableError(Exception):
+    """A shard worker died or did not answer in time"""
+
+
+class EmbeddingShard:
+    """
+    Embeddings of one shard, normalized so dot products are cosine
+    similarities
+
+    Rows live in append-only slots, removed ones are tombstoned and the
+    matrix is compacted once half of it is tombstones.
+    """
+
+    _INITIAL_CAPACITY = 64
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, fingerprint: str = None):
+        """Drop all rows, the shard then holds embeddings of a model"""
+        self.fingerprint = fingerprint
+        self._ids: List[str] = []
+        self._slots: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._alive = np.zeros(self._INITIAL_CAPACITY, dtype=bool)
+
+    def add(self, candidate_ids: List[str], embeddings: np.ndarray):
+        """Add (or replace) the embeddings of candidates"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not len(candidate_ids):
+            return
+        embeddings = embeddings / np.maximum(
+            np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        self.remove(candidate_ids)
+
+        size = len(self._ids)
+        capacity = len(self._alive)
+        while capacity < size + len(candidate_ids):
+            capacity *= 2
+        if self._matrix is None:
+            self._matrix = np.zeros((capacity, embeddings.shape[1]),
+                                    dtype=np.float32)
+        elif embeddings.shape[1] != self._matrix.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {embeddings.shape[1]} does not match "
+                f"shard dimension {self._matrix.shape[1]}")
+        if capacity > len(self._alive):
+            matrix = np.zeros((capacity, self._matrix.shape[1]),
+                              dtype=np.float32)
+            matrix[:size] = self._matrix[:size]
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:size] = self._alive[:size]
+            self._matrix, self._alive = matrix, alive
+
+        self._matrix[size:size + len(candidate_ids)] = embeddings
+        self._alive[size:size + len(candidate_ids)] = True
+        for slot, candidate_id in enumerate(candidate_ids, size):
+            self._slots[candidate_id] = slot
+        self._ids.extend(candidate_ids)
+
+    def remove(self, candidate_ids: Iterable[str]):
+        """Tombstone the rows of candidates, unknown ids are ignored"""
+        for candidate_id in candidate_ids:
+            slot = self._slots.pop(candidate_id, None)
+            if slot is not None:
+                self._alive[slot] = False
+        if len(self._ids) >= self._INITIAL_CAPACITY and \
+                len(self._slots) * 2 <= len(self._ids):
+            self._compact()
+
+    def _compact(self):
+        """Drop tombstoned rows"""
+        live = np.flatnonzero(self._alive[:len(self._ids)])
+        capacity = max(self._INITIAL_CAPACITY, len(self._alive))
+        matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+        matrix[:len(live)] = self._matrix[live]
+        self._matrix = matrix
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:len(live)] = True
+        self._ids = [self._ids[slot] for slot in live]
+        self._slots = {
+            candidate_id: slot
+            for slot, candidate_id in enumerate(self._ids)
+        }
+
+    def count(self) -> int:
+        """Number of live rows"""
+        return len(self._slots)
+
+    def top_k(
+        self,
+        fingerprint: str,
+        embedding: np.ndarray,
+        k: int,
+        candidate_ids: List[str] = None,
+    ) -> List[Tuple[float, str]]:
+        """
+        The k rows most similar to an embedding (among candidate_ids when
+        given), as (similarity, id) sorted by similarity then id
+        """
+        if fingerprint != self.fingerprint:
+            raise ValueError(
+                f"Shard holds embeddings of {self.fingerprint!r}, not "
+                f"{fingerprint!r}")
+        if self._matrix is None or k <= 0:
+            return []
+
+        if candidate_ids is None:
+            slots = np.flatnonzero(self._alive[:len(self._ids)])
+        else:
+            slots = np.array([
+                self._slots[candidate_id] for candidate_id in candidate_ids
+                if candidate_id in self._slots
+            ], dtype=np.int64)
+        if not len(slots):
+            return []
+
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        # Unlike a BLAS product, einsum sums each row the same way whatever
+        # the number of rows, so scores do not depend on the sharding
+        similarities = np.einsum(
+            'ij,j->i', self._matrix[slots],
+            embedding / max(float(np.linalg.norm(embedding)), 1e-12))
+        if len(slots) > k:
+            # Keep every row tied with the k-th, ties are broken by id below
+            kth = np.partition(similarities, len(slots) - k)[len(slots) - k]
+            selected = np.flatnonzero(similarities >= kth)
+        else:
+            selected = np.arange(len(slots))
+        matches = [(float(similarities[index]), self._ids[slots[index]])
+                   for index in selected]
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return matches[:k]
+
+
+def _shard_worker(conn):
+    """Worker process loop: apply the operations received on conn in order"""
+    shard = EmbeddingShard()
+    while True:
+        try:
+            request_id, operation, args = conn.recv()
+        except (EOFError, OSError):
+            break
+        if operation == 'stop':
+            break
+        try:
+            result, error = getattr(shard, operation)(*args), None
+        except Exception as e:
+            result, error = None, e
+        if request_id is not None:
+            conn.send((request_id, error is None,
+                       result if error is None else error))
+        elif error is not None:
+            print(f"Shard {operation} failed: {error}")
+
+
+class _ShardClient:
+    """Connection to one shard worker, answers are matched to futures"""
+
+    def __init__(self, context, index: int):
+        self._conn, worker_conn = context.Pipe()
+        self.process = context.Process(
+            target=_shard_worker,
+            args=(worker_conn, ),
+            name=f'talentmatch-shard-{index}',
+            daemon=True,
+        )
+        self.process.start()
+        worker_conn.close()
+        # Sends may block on a full pipe, the reader must never wait for them
+        self._send_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._next_request = 0
+        self._closed = False
+        threading.Thread(target=self._read,
+                         name=f'shard-reader-{index}',
+                         daemon=True).start()
+
+    def send(self, operation: str, *args):
+        """Send an operation without waiting for it"""
+        with self._send_lock:
+            if self._closed:
+                raise ShardUnavailableError(f"{self.process.name} is closed")
+            try:
+                self._conn.send((None, operation, args))
+            except OSError as e:
+                raise ShardUnavailableError(
+                    f"{self.process.name} stopped") from e
+
+    def request(self, operation: str, *args) -> Future:
+        """Send an operation, the future gets its result"""
+        future = Future()
+        with self._pending_lock:
+            if self._closed:
+                raise ShardUnavailableError(f"{self.process.name} is closed")
+            self._next_request += 1
+            request_id = self._next_request
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                self._conn.send((request_id, operation, args))
+        except OSError as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            raise ShardUnavailableError(f"{self.process.name} stopped") from e
+        return future
+
+    def _read(self):
+        """Reader thread, resolves the futures of the answers"""
+        while True:
+            try:
+                request_id, ok, value = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._pending_lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+        with self._pending_lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(
+                ShardUnavailableError(f"{self.process.name} stopped"))
+
+    def close(self):
+        """Stop the worker"""
+        try:
+            self.send('stop')
+        except (ShardUnavailableError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._conn.close()
+
+
+class ShardedIndex:
+    """
+    Embedding index partitioned across local worker processes by id hash
+
+    Each worker holds the embedding matrix of its shard. A query is sent to
+    every shard, each one returns its local top k and the coordinator merges
+    the sorted lists with a heap, so scoring runs on all cores. Ties are
+    broken by id, so the result does not depend on the number of shards.
+
+    Operations reach each worker in the order they were sent: a query sent
+    after a write sees it.
+    """
+
+    def __init__(self, num_shards: int, timeout: float = 10,
+                 start_method: str = 'spawn'):
+        if num_shards <= 0:
+            raise ValueError("num_shards must be a positive integer")
+        # Forking a process that runs threads and torch is not safe
+        context = multiprocessing.get_context(start_method)
+        self.timeout = timeout
+        self._shards = [
+            _ShardClient(context, index) for index in range(num_shards)
+        ]
+
+    @property
+    def num_shards(self) -> int:
+        return len(self._shards)
+
+    def shard_of(self, candidate_id: str) -> int:
+        """Shard of a candidate, stable across processes and nodes"""
+        return zlib.crc32(candidate_id.encode('utf-8')) % len(self._shards)
+
+    def _partition(self, candidate_ids: Iterable[str]) -> List[List[int]]:
+        """Positions of the ids falling in each shard"""
+        positions = [[] for _ in self._shards]
+        for position, candidate_id in enumerate(candidate_ids):
+            positions[self.shard_of(candidate_id)].append(position)
+        return positions
+
+    def reset(self, fingerprint: str):
+        """Drop all embeddings, the shards then hold those of a model"""
+        for shard in self._shards:
+            shard.send('reset', fingerprint)
+
+    def add(self, candidate_ids: List[str], embeddings: np.ndarray):
+        """Add (or replace) the embeddings of candidates"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        for shard, positions in zip(self._shards,
+                                    self._partition(candidate_ids)):
+            if positions:
+                shard.send('add', [candidate_ids[position]
+                                   for position in positions],
+                           embeddings[positions])
+
+    def remove(self, candidate_ids: List[str]):
+        """Remove the embeddings of candidates"""
+        for shard, positions in zip(self._shards,
+                                    self._partition(candidate_ids)):
+            if positions:
+                shard.send('remove',
+                           [candidate_ids[position] for position in positions])
+
+    def count(self) -> int:
+        """Number of embeddings over all shards"""
+        return sum(self._gather('count'))
+
+    def top_k(
+        self,
+        fingerprint: str,
+        embedding: np.ndarray,
+        k: int,
+        candidate_ids: List[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        The k candidates most similar to an embedding (among candidate_ids
+        when given), as (id, similarity) best first
+
+        Raises ShardUnavailableError when a shard is down or too slow, and
+        ValueError when the shards hold embeddings of another model.
+        """
+        embedding = np.asarray(embedding, dtype=np.float32)
+        if candidate_ids is None:
+            shard_args = [(fingerprint, embedding, k)] * len(self._shards)
+        else:
+            shard_args = [(fingerprint, embedding, k,
+                           [candidate_ids[position] for position in positions])
+                          for positions in self._partition(candidate_ids)]
+
+        merged = heapq.merge(*self._gather('top_k', shard_args),
+                             key=lambda match: (-match[0], match[1]))
+        return [(candidate_id, similarity)
+                for similarity, candidate_id in islice(merged, k)]
+
+    def _gather(self, operation: str,
+                shard_args: List[Tuple[Any, ...]] = None) -> List[Any]:
+        """Send an operation to every shard, then collect the answers"""
+        futures = [
+            shard.request(operation, *(shard_args[index] if shard_args else ()))
+            for index, shard in enumerate(self._shards)
+        ]
+        try:
+            return [future.result(timeout=self.timeout) for future in futures]
+        except FutureTimeoutError as e:
+            raise ShardUnavailableError(
+                f"A shard did not answer within {self.timeout}s") from e
+
+    def close(self):
+        """Stop the shard workers"""
+        for shard in self._shards:
+            shard.close()
@@ -0,0 +1,187 @@
+"""
+Streaming ingestion of uploaded resume files
+
+Multipart bodies are decoded incrementally from the request stream, one file
+part is held in memory at a time (archives are spooled to disk once large) and
+zip/tar archives are expanded member by member, so uploads of thousands of
+resumes keep a flat memory profile.
+"""
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from io import BytesIO
+import os
+import tarfile
+import tempfile
+import uuid
+import zipfile
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NeedData
+from werkzeug.utils import secure_filename
+from talentmatch.utils import allowed_file, extract_text_from_bytes
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+STREAM_CHUNK_SIZE = 64 * 1024
+# Archives need random access (zip central directory), spool big ones to disk
+ARCHIVE_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+def check_content_length(size: Optional[int], max_content_length: int = None):
+    """Raise RequestEntityTooLarge when a body size exceeds the limit"""
+    if size is not None and max_content_length is not None and \
+            size > max_content_length:
+        raise RequestEntityTooLarge(
+            f"Request body exceeds {max_content_length} bytes")
+
+
+class MultipartFileReader:
+    """
+    Incremental (sans-io) reader of the file parts of a multipart body
+
+    Feed raw body chunks with feed(), completed file parts are returned as
+    (filename, file object) pairs positioned at the start. Regular files are
+    buffered in memory and limited to max_file_size, archives are spooled and
+    only limited by the request size, max_content_length when the server
+    does not enforce it. Non-file form fields are skipped.
+    """
+
+    def __init__(
+        self,
+        boundary: bytes,
+        field_name: str = 'files',
+        max_file_size: int = None,
+        max_files: int = None,
+        max_content_length: int = None,
+    ):
+        self._decoder = MultipartDecoder(boundary)
+        self.field_name = field_name
+        self.max_file_size = max_file_size
+        self.max_files = max_files
+        self.max_content_length = max_content_length
+        self.file_count = 0
+        self.received = 0
+        self._filename: Optional[str] = None
+        self._buffer: Optional[BinaryIO] = None
+        self._size_limit: Optional[int] = None
+
+    def feed(self, chunk: Optional[bytes]) -> List[Tuple[str, BinaryIO]]:
+        """Feed a body chunk (None at the end), return completed file parts"""
+        if chunk:
+            self.received += len(chunk)
+            check_content_length(self.received, self.max_content_length)
+        self._decoder.receive_data(chunk)
+        completed = []
+
+        while True:
+            event = self._decoder.next_event()
+            if isinstance(event, (NeedData, Epilogue)):
+                break
+
+            if isinstance(event, File):
+                if event.name == self.field_name and event.filename:
+                    self.file_count += 1
+                    if self.max_files is not None and \
+                            self.file_count > self.max_files:
+                        raise RequestEntityTooLarge(
+                            f"Too many files, at most {self.max_files} per request"
+                        )
+                    self._filename = event.filename
+                    if is_archive(event.filename):
+                        self._buffer = tempfile.SpooledTemporaryFile(
+                            max_size=ARCHIVE_SPOOL_SIZE)
+                        self._size_limit = None
+                    else:
+                        self._buffer = BytesIO()
+                        self._size_limit = self.max_file_size
+                else:
+                    self._filename, self._buffer = None, None
+            elif isinstance(event, Data):
+                if self._buffer is not None:
+                    self._buffer.write(event.data)
+                    if self._size_limit is not None and \
+                            self._buffer.tell() > self._size_limit:
+                        raise RequestEntityTooLarge(
+                            f"File {self._filename} exceeds {self._size_limit} bytes"
+                        )
+                    if not event.more_data:
+                        self._buffer.seek(0)
+                        completed.append((self._filename, self._buffer))
+                        self._filename, self._buffer = None, None
+
+        return completed
+
+
+def iter_multipart_files(
+    stream,
+    boundary: bytes,
+    field_name: str = 'files',
+    max_file_size: int = None,
+    max_files: int = None,
+) -> Iterator[Tuple[str, BinaryIO]]:
+    """Yield (filename, file object) for each file part of a request stream"""
+    reader = MultipartFileReader(boundary, field_name, max_file_size,
+                                 max_files)
+    while True:
+        chunk = stream.read(STREAM_CHUNK_SIZE)
+        yield from reader.feed(chunk or None)
+        if not chunk:
+            break
+
+
+def is_archive(filename: str) -> bool:
+    """Check whether a filename is a supported archive"""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def iter_archive_members(
+    filename: str,
+    fileobj: BinaryIO,
+    max_file_size: int = None,
+) -> Iterator[Tuple[str, bytes]]:
+    """Yield (member name, bytes) for each regular file of a zip/tar archive"""
+    with fileobj:
+        if filename.lower().endswith('.zip'):
+            with zipfile.ZipFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or (max_file_size is not None and
+                                         info.file_size > max_file_size):
+                        continue
+                    yield info.filename, archive.read(info)
+        else:
+            with tarfile.open(fileobj=fileobj, mode='r:*') as archive:
+                for member in archive:
+                    if not member.isfile() or (max_file_size is not None and
+                                               member.size > max_file_size):
+                        continue
+                    member_file = archive.extractfile(member)
+                    if member_file is not None:
+                        yield member.name, member_file.read()
+
+
+def iter_uploaded_candidates(
+    files: Iterable[Tuple[str, BinaryIO]],
+    allowed_extensions: set,
+    max_file_size: int = None,
+) -> Iterator[Dict]:
+    """
+    Turn uploaded (filename, file object) pairs into candidate data with
+    extracted resume text, expanding archives. Runs lazily, one document at
+    a time.
+    """
+    for filename, fileobj in files:
+        if is_archive(filename):
+            documents = iter_archive_members(filename, fileobj, max_file_size)
+        else:
+            with fileobj:
+                documents = [(filename, fileobj.read())]
+
+        for document_name, document in documents:
+            name = secure_filename(os.path.basename(document_name))
+            if not name or not allowed_file(name, allowed_extensions):
+                continue
+
+            resume_text = extract_text_from_bytes(name, document).strip()
+            if resume_text:
+                yield {
+                    'id': str(uuid.uuid4()),
+                    'name': os.path.splitext(name)[0],  # Use filename as name
+                    'resume_text': resume_text
+                }
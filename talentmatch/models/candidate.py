@@ -1,12 +1,24 @@
 """
 Candidate data model
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
 import uuid
+import numpy as np
+from talentmatch.etc.candidatefilter import CandidateFilter, normalize_metadata
+from talentmatch.etc.deduplicator import Deduplicator
+from talentmatch.etc.fieldextractor import EDUCATION_LEVELS, SENIORITY_LEVELS, SKILL_INDEX, SKILLS
+from talentmatch.etc.lexicalindex import BM25Index
+from talentmatch.etc.projection import EmbeddingProjection
+from talentmatch.etc.shardindex import ShardedIndex, ShardUnavailableError
+from talentmatch.etc.rwlock import ReadWriteLock
 
 
 class Candidate:
     """Candidate model class"""
+
+    __slots__ = ('id', 'name', 'resume', 'summary', 'embedding',
+                 'resume_text', 'resume_name', 'content_hash', 'fingerprint',
+                 'fields', 'location', 'tags')
     
     def __init__(self, name: str, resume: str, candidate_id: str = None):
         self.id = candidate_id or str(uuid.uuid4())
@@ -14,6 +26,13 @@ class Candidate:
         self.resume = resume
         self.summary = ""
         self.embedding = None
+        self.resume_text = ""
+        self.resume_name = ""
+        self.content_hash = None
+        self.fingerprint = None
+        self.fields = None
+        self.location = ""
+        self.tags = []
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary format"""
@@ -22,7 +41,13 @@ class Candidate:
             'name': self.name,
             'resume': self.resume,
             'summary': self.summary,
-            'embedding': self.embedding
+            'embedding': self.embedding,
+            'resume_text': self.resume_text,
+            'resume_name': self.resume_name,
+            'content_hash': self.content_hash,
+            'fields': self.fields,
+            'location': self.location,
+            'tags': self.tags
         }
     
     @classmethod
@@ -35,56 +60,792 @@ class Candidate:
         )
         candidate.summary = data.get('summary', '')
         candidate.embedding = data.get('embedding')
+        candidate.resume_text = data.get('resume_text', '')
+        candidate.resume_name = data.get('resume_name', '')
+        candidate.content_hash = data.get('content_hash')
+        candidate.fingerprint = data.get('fingerprint')
+        candidate.fields = data.get('fields')
+        candidate.location = data.get('location') or ''
+        candidate.tags = list(data.get('tags') or [])
         return candidate
 
 
+def _resized(column: np.ndarray, capacity: int, fill) -> np.ndarray:
+    """Copy of a column with capacity rows, new rows set to fill"""
+    resized = np.full((capacity, ) + column.shape[1:], fill, dtype=column.dtype)
+    rows = min(len(column), capacity)
+    resized[:rows] = column[:rows]
+    return resized
+
+
+class CandidateView(Sequence):
+    """Read-only view over a snapshot of stored candidates"""
+
+    __slots__ = ('_candidates', '_slots')
+
+    def __init__(self, candidates: List[Candidate], slots: np.ndarray):
+        self._candidates = candidates
+        self._slots = slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CandidateView(self._candidates, self._slots[index])
+        return self._candidates[self._slots[index]]
+
+
 class CandidateStorage:
-    """Candidate storage management"""
-    
-    def __init__(self):
+    """
+    Candidate storage management
+
+    Candidates live in append-only slots indexed by an id -> slot dict, so
+    lookups and deletes are O(1). Embeddings are kept in a float32 matrix
+    column (one row per slot) instead of on the candidate objects, deletes
+    only tombstone their slot and the columns are compacted lazily once
+    tombstones make up half of the slots. A BM25 inverted index over the
+    resume texts is kept in step with the slots for lexical search.
+
+    Structured resume fields (years of experience, education, seniority and
+    years per vocabulary skill), location and tags are kept in columns next
+    to the embeddings, so filters are evaluated as vectorized masks before
+    any similarity is computed.
+
+    The embedding matrix is tagged with the fingerprint of the model that
+    produced it. A second, staged namespace can be filled for another model
+    in the background (rows carry a filled flag, so an interrupted migration
+    resumes where it stopped) while reads keep using the active matrix, until
+    activate_namespace swaps them in one write.
+
+    An optional projection keeps a reduced copy of the active matrix (e.g.
+    128 PCA dimensions) in step with it, so matches can shortlist over the
+    reduced rows before reading the full ones.
+
+    With a sharded index, writes to the active matrix are mirrored to the
+    shard worker processes, which score matches in parallel.
+
+    All public methods are safe to call from several threads: reads share a
+    readers-writer lock, writes hold it exclusively. Views and embedding
+    matrices handed out are snapshots, later writes never mutate them.
+    """
+
+    _INITIAL_CAPACITY = 64
+    PREVIEW_LENGTH = 200
+
+    def __init__(
+        self,
+        deduplicator: Deduplicator = None,
+        embedding_fingerprint: str = None,
+        shard_index: ShardedIndex = None,
+    ):
+        self.deduplicator = deduplicator or Deduplicator()
+        # Model of the active embedding matrix
+        self.embedding_fingerprint = embedding_fingerprint
+        # Projection behind the reduced matrix, fitted on the active matrix
+        self.projection: Optional[EmbeddingProjection] = None
+        self.lexical_index = BM25Index()
+        # Optional worker processes holding a copy of the active matrix
+        self.shard_index = shard_index
+        self._lock = ReadWriteLock()
+        self._generation = 0
+        # Bumped by every write that can change a match result
+        self._revision = 0
+        self._reset()
+        self._mirror_reset()
+
+    def _reset(self):
+        """Drop all slots and columns"""
+        self._slots: Dict[str, int] = {}
         self._candidates: List[Candidate] = []
-    
-    def add_candidates(self, candidates: List[Candidate]) -> int:
-        """Add candidates"""
-        self._candidates.extend(candidates)
-        return len(candidates)
-    
-    def get_all(self) -> List[Candidate]:
-        """Get all candidates"""
-        return self._candidates.copy()
-    
+        self._previews: List[Dict[str, Any]] = []
+        self._sequence = np.zeros(self._INITIAL_CAPACITY, dtype=np.int64)
+        self._alive = np.zeros(self._INITIAL_CAPACITY, dtype=bool)
+        self._embeddings: Optional[np.ndarray] = None
+        self._reduced: Optional[np.ndarray] = None
+        # Bumped whenever rows move, see set_projection
+        self._generation += 1
+        self._revision += 1
+        # Staged embedding namespace of a migration, rows with a filled flag
+        self._staged_fingerprint: Optional[str] = None
+        self._staged_embeddings: Optional[np.ndarray] = None
+        self._staged_filled = np.zeros(self._INITIAL_CAPACITY, dtype=bool)
+        # Field columns, NaN / -1 when unknown, skill years NaN when absent
+        self._years_experience = np.full(self._INITIAL_CAPACITY, np.nan,
+                                         dtype=np.float32)
+        self._education = np.full(self._INITIAL_CAPACITY, -1, dtype=np.int8)
+        self._seniority = np.full(self._INITIAL_CAPACITY, -1, dtype=np.int8)
+        self._skill_years = np.full((self._INITIAL_CAPACITY, len(SKILLS)),
+                                    np.nan,
+                                    dtype=np.float32)
+        self._location = np.full(self._INITIAL_CAPACITY, '', dtype=object)
+        # Tag -> membership column, created on first use
+        self._tags: Dict[str, np.ndarray] = {}
+        self._size = 0
+        self._next_sequence = 1
+
+    def _ensure_capacity(self, size: int):
+        """Grow the columns (doubling) to hold at least size slots"""
+        capacity = len(self._alive)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+
+        self._sequence = _resized(self._sequence, capacity, 0)
+        self._alive = _resized(self._alive, capacity, False)
+        self._years_experience = _resized(self._years_experience, capacity,
+                                          np.nan)
+        self._education = _resized(self._education, capacity, -1)
+        self._seniority = _resized(self._seniority, capacity, -1)
+        self._skill_years = _resized(self._skill_years, capacity, np.nan)
+        self._location = _resized(self._location, capacity, '')
+        self._tags = {
+            tag: _resized(column, capacity, False)
+            for tag, column in self._tags.items()
+        }
+        if self._embeddings is not None:
+            self._embeddings = _resized(self._embeddings, capacity, 0)
+        if self._reduced is not None:
+            self._reduced = _resized(self._reduced, capacity, 0)
+        self._staged_filled = _resized(self._staged_filled, capacity, False)
+        if self._staged_embeddings is not None:
+            self._staged_embeddings = _resized(self._staged_embeddings,
+                                               capacity, 0)
+
+    def _store_embedding(self, slot: int, embedding):
+        """Write a candidate embedding into the matrix column"""
+        if embedding is None:
+            return
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if self._embeddings is None:
+            self._embeddings = np.zeros((len(self._alive), embedding.shape[0]),
+                                        dtype=np.float32)
+        elif embedding.shape[0] != self._embeddings.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {embedding.shape[0]} does not match "
+                f"stored dimension {self._embeddings.shape[1]}")
+        self._embeddings[slot] = embedding
+        if self.projection is not None:
+            if self._reduced is None:
+                self._reduced = np.zeros(
+                    (len(self._alive), self.projection.dimensions),
+                    dtype=np.float32)
+            self._reduced[slot] = self.projection.transform(embedding)[0]
+
+    def _store_metadata(self, slot: int, candidate: Candidate):
+        """Write the location and tags of a candidate into the columns"""
+        self._location[slot] = normalize_metadata(candidate.location)
+        for tag in candidate.tags:
+            tag = normalize_metadata(tag)
+            if tag not in self._tags:
+                self._tags[tag] = np.zeros(len(self._alive), dtype=bool)
+            self._tags[tag][slot] = True
+        self._store_fields(slot, candidate.fields)
+
+    def _store_fields(self, slot: int, fields: Optional[Dict[str, Any]]):
+        """Write the structured resume fields of a candidate into the columns"""
+        self._skill_years[slot] = np.nan
+        if not fields:
+            self._years_experience[slot] = np.nan
+            self._education[slot] = -1
+            self._seniority[slot] = -1
+            return
+
+        self._years_experience[slot] = fields.get('years_experience', np.nan)
+        self._education[slot] = EDUCATION_LEVELS.index(
+            fields['education']) if fields.get(
+                'education') in EDUCATION_LEVELS else -1
+        self._seniority[slot] = SENIORITY_LEVELS.index(
+            fields['seniority']) if fields.get(
+                'seniority') in SENIORITY_LEVELS else -1
+        for skill, years in (fields.get('skill_years') or {}).items():
+            index = SKILL_INDEX.get(skill)
+            if index is not None:
+                self._skill_years[slot, index] = years
+
+    def _make_preview(self, candidate: Candidate) -> Dict[str, Any]:
+        """Build the API preview of a candidate"""
+        text = candidate.resume_text or candidate.resume
+        return {
+            'id': candidate.id,
+            'name': candidate.name,
+            'summary': candidate.summary,
+            'fields': candidate.fields,
+            'location': candidate.location,
+            'tags': candidate.tags,
+            'resume_preview': text[:self.PREVIEW_LENGTH] + '...'
+            if len(text) > self.PREVIEW_LENGTH else text
+        }
+
+    def _compact(self):
+        """Drop tombstoned slots, keeping insertion order"""
+        live = np.flatnonzero(self._alive[:self._size])
+        if len(live) == self._size:
+            return
+
+        # Build new columns so views handed out earlier stay valid
+        self._candidates = [self._candidates[slot] for slot in live]
+        self._previews = [self._previews[slot] for slot in live]
+        capacity = max(self._INITIAL_CAPACITY, len(self._alive))
+        self._sequence = _resized(self._sequence[live], capacity, 0)
+        self._alive = _resized(np.ones(len(live), dtype=bool), capacity, False)
+        self._years_experience = _resized(self._years_experience[live],
+                                          capacity, np.nan)
+        self._education = _resized(self._education[live], capacity, -1)
+        self._seniority = _resized(self._seniority[live], capacity, -1)
+        self._skill_years = _resized(self._skill_years[live], capacity, np.nan)
+        self._location = _resized(self._location[live], capacity, '')
+        self._tags = {
+            tag: _resized(column[live], capacity, False)
+            for tag, column in self._tags.items() if column[live].any()
+        }
+        if self._embeddings is not None:
+            self._embeddings = _resized(self._embeddings[live], capacity, 0)
+        if self._reduced is not None:
+            self._reduced = _resized(self._reduced[live], capacity, 0)
+        self._generation += 1
+        self._staged_filled = _resized(self._staged_filled[live], capacity,
+                                       False)
+        if self._staged_embeddings is not None:
+            self._staged_embeddings = _resized(self._staged_embeddings[live],
+                                               capacity, 0)
+        self._size = len(live)
+        self._slots = {
+            candidate.id: slot
+            for slot, candidate in enumerate(self._candidates)
+        }
+
+    def _mirror(self, removed_ids: List[str], added_slots: List[int] = ()):
+        """Mirror removed and added rows to the shards (write lock held)"""
+        if self.shard_index is None:
+            return
+        try:
+            if removed_ids:
+                self.shard_index.remove(removed_ids)
+            if added_slots and self._embeddings is not None:
+                self.shard_index.add(
+                    [self._candidates[slot].id for slot in added_slots],
+                    self._embeddings[added_slots])
+        except ShardUnavailableError as e:
+            print(f"Sharded index out of sync: {e}")
+
+    def _mirror_reset(self):
+        """Reload the shards with the active matrix (write lock held)"""
+        if self.shard_index is None:
+            return
+        try:
+            self.shard_index.reset(self.embedding_fingerprint)
+        except ShardUnavailableError as e:
+            print(f"Sharded index out of sync: {e}")
+            return
+        self._mirror([], list(np.flatnonzero(self._alive[:self._size])))
+
+    def _maybe_compact(self):
+        """Compact once half of the slots are tombstones"""
+        if self._size >= self._INITIAL_CAPACITY and \
+                len(self._slots) * 2 <= self._size:
+            self._compact()
+
+    def _tombstone(self, candidate_id: str) -> Optional[Candidate]:
+        """Tombstone the slot of a candidate (write lock must be held)"""
+        slot = self._slots.pop(candidate_id, None)
+        if slot is None:
+            return None
+
+        self._alive[slot] = False
+        self._revision += 1
+        candidate = self._candidates[slot]
+        self.deduplicator.remove(candidate_id)
+        self.lexical_index.remove(candidate_id, candidate.resume_text)
+        return candidate
+
+    def add_candidates(
+        self,
+        candidates: List[Candidate],
+        embedding_fingerprint: str = None,
+        embeddings: np.ndarray = None,
+    ) -> int:
+        """
+        Add candidates, returns the number actually stored
+
+        The candidate embedding is moved into the storage matrix, use
+        get_embeddings() to read it back. Bulk loads may instead pass the
+        embeddings as a matrix (one row per candidate), whose rows are
+        copied straight into the storage matrix. embedding_fingerprint names
+        the model that produced the embeddings, it must be the active one.
+        """
+        if embeddings is not None and len(embeddings) != len(candidates):
+            raise ValueError(
+                f"Got {len(embeddings)} embeddings for {len(candidates)} "
+                f"candidates")
+        with self._lock.write_locked():
+            if embedding_fingerprint is not None and \
+                    embedding_fingerprint != self.embedding_fingerprint:
+                raise ValueError(
+                    f"Embeddings of model {embedding_fingerprint!r} cannot "
+                    f"be stored next to {self.embedding_fingerprint!r}")
+            return self._add_candidates(candidates, embeddings)
+
+    def _validated_embeddings(
+        self,
+        candidates: List[Candidate],
+        embeddings: np.ndarray = None,
+    ) -> List[Optional[np.ndarray]]:
+        """
+        float32 vectors of the candidates to add, raises ValueError before
+        anything is stored when a dimension does not match
+        """
+        vectors = [
+            None if embedding is None else np.asarray(
+                embedding, dtype=np.float32).reshape(-1)
+            for embedding in ((candidate.embedding for candidate in candidates)
+                              if embeddings is None else embeddings)
+        ]
+        dimension = self._embeddings.shape[1] \
+            if self._embeddings is not None else None
+        for vector in vectors:
+            if vector is None:
+                continue
+            if dimension is None:
+                dimension = vector.shape[0]
+            elif vector.shape[0] != dimension:
+                raise ValueError(
+                    f"Embedding dimension {vector.shape[0]} does not match "
+                    f"stored dimension {dimension}")
+        return vectors
+
+    def _add_candidates(self, candidates: List[Candidate],
+                        embeddings: np.ndarray = None) -> int:
+        """
+        Add candidates (write lock must be held)
+
+        A candidate duplicating another stored resume is skipped, and then
+        a stored candidate with its id is kept rather than replaced.
+        """
+        vectors = self._validated_embeddings(candidates, embeddings)
+        replaced_ids, added_slots = [], []
+
+        self._ensure_capacity(self._size + len(candidates))
+        try:
+            for candidate, vector in zip(candidates, vectors):
+                # A concurrent request may have stored the same resume meanwhile
+                if candidate.fingerprint is not None and \
+                        self.deduplicator.find_duplicate(
+                            candidate.fingerprint, exclude_id=candidate.id):
+                    continue
+                if self._tombstone(candidate.id) is not None:
+                    replaced_ids.append(candidate.id)
+                self._add_candidate(candidate, vector)
+                added_slots.append(self._size - 1)
+        finally:
+            if replaced_ids or added_slots:
+                self._revision += 1
+                self._mirror(replaced_ids, added_slots)
+        return len(added_slots)
+
+    def _add_candidate(self, candidate: Candidate,
+                       embedding: Optional[np.ndarray]):
+        """Store a candidate in the next slot (write lock must be held)"""
+        slot = self._size
+        self._store_embedding(slot, embedding)
+        self._staged_filled[slot] = False
+        self._store_metadata(slot, candidate)
+        candidate.embedding = None
+        self._candidates.append(candidate)
+        self._previews.append(self._make_preview(candidate))
+        self._sequence[slot] = self._next_sequence
+        self._alive[slot] = True
+        self._slots[candidate.id] = slot
+        self._next_sequence += 1
+        self._size += 1
+
+        if candidate.fingerprint is not None:
+            self.deduplicator.add(candidate.id, candidate.fingerprint)
+        self.lexical_index.add(candidate.id, candidate.resume_text)
+
+    def get_all(self) -> CandidateView:
+        """Get all candidates as a read-only view (no copy)"""
+        with self._lock.read_locked():
+            return CandidateView(
+                self._candidates,
+                np.flatnonzero(self._alive[:self._size]),
+            )
+
+    def snapshot_chunks(
+        self,
+        chunk_size: int,
+    ) -> Tuple[str, int, Iterator[Tuple[List[Candidate], np.ndarray]]]:
+        """
+        Snapshot of the live candidates for a bulk export
+        :return: (fingerprint of the embeddings, candidate count, iterator
+                  of (candidates, embedding rows) chunks)
+
+        The snapshot is taken at once, chunks are copied lazily without
+        holding the lock: rows below the snapshot size are never rewritten.
+        """
+        with self._lock.read_locked():
+            candidates = self._candidates
+            slots = np.flatnonzero(self._alive[:self._size])
+            embeddings = self._embeddings
+            fingerprint = self.embedding_fingerprint
+
+        def chunks():
+            for start in range(0, len(slots), chunk_size):
+                chunk = slots[start:start + chunk_size]
+                yield [candidates[slot] for slot in chunk], \
+                    embeddings[chunk] if embeddings is not None else \
+                    np.zeros((len(chunk), 0), dtype=np.float32)
+
+        return fingerprint, len(slots), chunks()
+
     def get_by_id(self, candidate_id: str) -> Candidate:
         """Get candidate by ID"""
-        for candidate in self._candidates:
-            if candidate.id == candidate_id:
-                return candidate
-        return None
-    
+        with self._lock.read_locked():
+            slot = self._slots.get(candidate_id)
+            if slot is None:
+                return None
+            return self._candidates[slot]
+
+    def get_embeddings(self, candidate_ids: Iterable[str] = None) -> np.ndarray:
+        """
+        Get the embedding matrix rows of the given candidates (all when None)
+        as a read-only array, in the requested order.
+        """
+        with self._lock.read_locked():
+            if self._embeddings is None:
+                return np.zeros((0, 0), dtype=np.float32)
+
+            if candidate_ids is None:
+                slots = np.flatnonzero(self._alive[:self._size])
+                if len(slots) == self._size:
+                    # Rows below _size are never rewritten in place
+                    embeddings = self._embeddings[:self._size]
+                    embeddings.flags.writeable = False
+                    return embeddings
+            else:
+                slots = [
+                    self._slots[candidate_id] for candidate_id in candidate_ids
+                ]
+            return self._embeddings[slots]
+
+    def get_many(
+        self,
+        candidate_ids: Iterable[str],
+    ) -> Tuple[List[Candidate], np.ndarray, str]:
+        """
+        Get candidates, their embedding rows and the fingerprint of the model
+        behind them in one consistent read, unknown ids are skipped
+        """
+        with self._lock.read_locked():
+            slots = [
+                self._slots[candidate_id] for candidate_id in candidate_ids
+                if candidate_id in self._slots
+            ]
+            candidates = [self._candidates[slot] for slot in slots]
+            if self._embeddings is None:
+                return candidates, np.zeros((len(slots), 0),
+                                            dtype=np.float32), \
+                    self.embedding_fingerprint
+            return candidates, self._embeddings[slots], \
+                self.embedding_fingerprint
+
+    def sample_embeddings(self, limit: int,
+                          seed: int = 0) -> Tuple[np.ndarray, str]:
+        """
+        Up to limit random live embedding rows and the fingerprint of their
+        model, to fit a projection on
+        """
+        with self._lock.read_locked():
+            slots = np.flatnonzero(self._alive[:self._size])
+            if self._embeddings is None or not len(slots):
+                return np.zeros((0, 0), dtype=np.float32), \
+                    self.embedding_fingerprint
+            if len(slots) > limit:
+                slots = np.sort(
+                    np.random.default_rng(seed).choice(slots, limit,
+                                                       replace=False))
+            return self._embeddings[slots], self.embedding_fingerprint
+
+    def set_projection(self, projection: Optional[EmbeddingProjection],
+                       fingerprint: str) -> bool:
+        """
+        Replace the projection and rebuild the reduced matrix (None drops
+        both), False when the active model is no longer the one the
+        projection was fitted for
+
+        The bulk of the rows is projected on a snapshot outside the write
+        lock, only rows added meanwhile are projected while holding it.
+        """
+        with self._lock.read_locked():
+            if fingerprint != self.embedding_fingerprint:
+                return False
+            embeddings = self._embeddings
+            size, generation = self._size, self._generation
+        # Rows below _size are never rewritten in place
+        reduced = None
+        if projection is not None and embeddings is not None:
+            reduced = np.zeros((len(embeddings), projection.dimensions),
+                               dtype=np.float32)
+            reduced[:size] = projection.transform(embeddings[:size])
+
+        with self._lock.write_locked():
+            if fingerprint != self.embedding_fingerprint:
+                return False
+            if projection is not None and self._embeddings is not None:
+                if reduced is None or generation != self._generation:
+                    size = 0
+                reduced = _resized(reduced, len(self._alive), 0) \
+                    if size else np.zeros(
+                        (len(self._alive), projection.dimensions),
+                        dtype=np.float32)
+                if self._size > size:
+                    reduced[size:self._size] = projection.transform(
+                        self._embeddings[size:self._size])
+            self.projection = projection
+            self._reduced = reduced
+            self._revision += 1
+            return True
+
+    def get_reduced(
+        self,
+        candidate_ids: Iterable[str] = None,
+    ) -> Optional[Tuple[List[str], np.ndarray, EmbeddingProjection, str]]:
+        """
+        Reduced embedding rows of the given candidates (all live ones when
+        None) in one consistent read, unknown ids are skipped
+        :return: (ids, reduced rows, projection, fingerprint), None without a
+                 projection
+        """
+        with self._lock.read_locked():
+            if self.projection is None or self._reduced is None:
+                return None
+            if candidate_ids is None:
+                slots = np.flatnonzero(self._alive[:self._size])
+            else:
+                slots = [
+                    self._slots[candidate_id] for candidate_id in candidate_ids
+                    if candidate_id in self._slots
+                ]
+            return [self._candidates[slot].id for slot in slots], \
+                self._reduced[slots], self.projection, \
+                self.embedding_fingerprint
+
+    def begin_namespace(self, fingerprint: str) -> bool:
+        """
+        Stage an embedding namespace for a model, keeps the rows already
+        filled when it is staged (returns True when resuming)
+        """
+        with self._lock.write_locked():
+            if fingerprint == self._staged_fingerprint:
+                return True
+            self._staged_fingerprint = fingerprint
+            self._staged_embeddings = None
+            self._staged_filled[:] = False
+            return False
+
+    def drop_namespace(self):
+        """Forget the staged embedding namespace"""
+        with self._lock.write_locked():
+            self._staged_fingerprint = None
+            self._staged_embeddings = None
+            self._staged_filled[:] = False
+
+    def pending_namespace_rows(
+        self,
+        fingerprint: str,
+        limit: int,
+        after_sequence: int = 0,
+    ) -> Tuple[List[str], List[str], List[int]]:
+        """
+        Live candidates inserted after a sequence that still miss a staged
+        embedding, as (ids, resume texts, sequences) in insertion order
+        """
+        with self._lock.read_locked():
+            if fingerprint != self._staged_fingerprint:
+                raise ValueError(
+                    f"Embedding namespace {fingerprint!r} is not staged")
+            start = int(
+                np.searchsorted(self._sequence[:self._size],
+                                after_sequence,
+                                side='right'))
+            pending = np.flatnonzero(
+                self._alive[start:self._size] &
+                ~self._staged_filled[start:self._size])[:limit] + start
+            candidates = [self._candidates[slot] for slot in pending]
+            return [candidate.id for candidate in candidates], \
+                [candidate.resume_text for candidate in candidates], \
+                [int(sequence) for sequence in self._sequence[pending]]
+
+    def store_namespace_embeddings(
+        self,
+        fingerprint: str,
+        sequences: List[int],
+        embeddings: np.ndarray,
+    ):
+        """
+        Fill staged rows, identified by insertion sequence so rows deleted
+        or replaced meanwhile are skipped
+        """
+        with self._lock.write_locked():
+            if fingerprint != self._staged_fingerprint:
+                raise ValueError(
+                    f"Embedding namespace {fingerprint!r} is not staged")
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            if self._staged_embeddings is None:
+                self._staged_embeddings = np.zeros(
+                    (len(self._alive), embeddings.shape[1]), dtype=np.float32)
+            slots = np.searchsorted(self._sequence[:self._size], sequences)
+            for slot, sequence, embedding in zip(slots, sequences,
+                                                 embeddings):
+                if slot < self._size and self._sequence[slot] == sequence \
+                        and self._alive[slot]:
+                    self._staged_embeddings[slot] = embedding
+                    self._staged_filled[slot] = True
+
+    def namespace_progress(self) -> Dict[str, Any]:
+        """Staged namespace and its filled share of the live candidates"""
+        with self._lock.read_locked():
+            alive = self._alive[:self._size]
+            return {
+                'fingerprint': self._staged_fingerprint,
+                'embedded': int((alive & self._staged_filled[:self._size]).sum())
+                if self._staged_fingerprint else 0,
+                'total': len(self._slots),
+            }
+
+    def activate_namespace(self, fingerprint: str) -> bool:
+        """
+        Swap the staged namespace in as the active embedding matrix, only
+        when every live candidate has a staged embedding
+        """
+        with self._lock.write_locked():
+            if fingerprint != self._staged_fingerprint:
+                raise ValueError(
+                    f"Embedding namespace {fingerprint!r} is not staged")
+            alive = self._alive[:self._size]
+            if (alive & ~self._staged_filled[:self._size]).any():
+                return False
+            # Rows of tombstones stay unfilled, their content is never read
+            self._embeddings = self._staged_embeddings
+            self.embedding_fingerprint = fingerprint
+            # The projection was fitted on the previous model
+            self.projection = None
+            self._reduced = None
+            self._staged_fingerprint = None
+            self._staged_embeddings = None
+            self._staged_filled[:] = False
+            self._revision += 1
+            self._mirror_reset()
+            return True
+
+    def _columns(self) -> Dict[str, Any]:
+        """Metadata columns of all slots (read lock must be held)"""
+        return {
+            'years_experience': self._years_experience[:self._size],
+            'education': self._education[:self._size],
+            'seniority': self._seniority[:self._size],
+            'skill_years': self._skill_years[:self._size],
+            'location': self._location[:self._size],
+            'tags': {
+                tag: column[:self._size]
+                for tag, column in self._tags.items()
+            },
+        }
+
+    def find_ids(self, candidate_filter: CandidateFilter = None) -> List[str]:
+        """Ids of the live candidates matching a filter, in insertion order"""
+        with self._lock.read_locked():
+            mask = self._alive[:self._size]
+            if candidate_filter is not None:
+                mask = mask & candidate_filter.mask(self._columns())
+            return [self._candidates[slot].id for slot in np.flatnonzero(mask)]
+
+    def search_lexical(
+        self,
+        query: str,
+        limit: int = None,
+    ) -> List[Tuple[str, float]]:
+        """BM25 search over the stored resume texts, (id, score) best first"""
+        with self._lock.read_locked():
+            return self.lexical_index.search(query, limit)
+
     def delete_by_id(self, candidate_id: str) -> Candidate:
         """Delete candidate by ID"""
-        for i, candidate in enumerate(self._candidates):
-            if candidate.id == candidate_id:
-                return self._candidates.pop(i)
-        return None
-    
+        with self._lock.write_locked():
+            candidate = self._tombstone(candidate_id)
+            if candidate is not None:
+                self._mirror([candidate_id])
+            self._maybe_compact()
+            return candidate
+
+    def delete_by_ids(self, candidate_ids: Iterable[str]) -> List[Candidate]:
+        """Delete several candidates by ID, unknown ids are ignored"""
+        with self._lock.write_locked():
+            deleted = []
+            for candidate_id in candidate_ids:
+                candidate = self._tombstone(candidate_id)
+                if candidate is not None:
+                    deleted.append(candidate)
+            self._mirror([candidate.id for candidate in deleted])
+            self._maybe_compact()
+            return deleted
+
     def clear_all(self) -> int:
         """Clear all candidates"""
-        count = len(self._candidates)
-        self._candidates.clear()
-        return count
-    
+        with self._lock.write_locked():
+            count = len(self._slots)
+            # A running migration keeps its (now empty) namespace
+            staged_fingerprint = self._staged_fingerprint
+            self._reset()
+            self._staged_fingerprint = staged_fingerprint
+            self.deduplicator.clear()
+            self.lexical_index.clear()
+            self._mirror_reset()
+            return count
+
     def count(self) -> int:
         """Get candidate count"""
-        return len(self._candidates)
-    
+        return len(self._slots)
+
+    @property
+    def revision(self) -> int:
+        """Write counter, changes whenever stored matches may change"""
+        return self._revision
+
     def get_info_list(self) -> List[Dict[str, Any]]:
         """Get candidate information list (for API response)"""
-        candidates_info = []
-        for candidate in self._candidates:
-            candidates_info.append({
-                'id': candidate.id,
-                'name': candidate.name,
-                'summary': candidate.summary,
-                'resume_preview': candidate.resume[:200] + '...' if len(candidate.resume) > 200 else candidate.resume
-            })
-        return candidates_info 
\ No newline at end of file
+        with self._lock.read_locked():
+            return [
+                self._previews[slot]
+                for slot in np.flatnonzero(self._alive[:self._size])
+            ]
+
+    def list_page(
+        self,
+        limit: int,
+        cursor: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Get a page of cached candidate previews in insertion order
+
+        The cursor is the insertion sequence of the last returned candidate,
+        so pages stay stable while candidates are added or deleted.
+        """
+        with self._lock.read_locked():
+            start = int(
+                np.searchsorted(self._sequence[:self._size],
+                                cursor,
+                                side='right'))
+            alive = np.flatnonzero(
+                self._alive[start:self._size])[:limit] + start
+
+            next_cursor = None
+            if len(alive) == limit and alive[-1] + 1 < self._size and \
+                    self._alive[alive[-1] + 1:self._size].any():
+                next_cursor = int(self._sequence[alive[-1]])
+
+            return {
+                'candidates': [self._previews[slot] for slot in alive],
+                'next_cursor': next_cursor
+            }
@@ -0,0 +1,79 @@
+"""
+Back up and restore the candidate pool of a running server
+
+    python -m talentmatch.pool export backup.tar [--resumes]
+    python -m talentmatch.pool import backup.tar
+
+The pool lives in the server process, so both commands stream the archive
+through /api/candidates/export and /api/candidates/import.
+"""
+import argparse
+import json
+import sys
+import time
+import requests
+
+DEFAULT_URL = 'http://localhost:7860'
+
+
+def export_pool(url: str, path: str, include_resumes: bool = False) -> int:
+    """Download the pool archive to a file, returns its size in bytes"""
+    size = 0
+    with requests.get(f'{url}/api/candidates/export',
+                      params={'resumes': '1'} if include_resumes else None,
+                      stream=True) as response:
+        response.raise_for_status()
+        with open(path, 'wb') as f:
+            for data in response.iter_content(chunk_size=1024 * 1024):
+                f.write(data)
+                size += len(data)
+    return size
+
+
+def import_pool(url: str, path: str) -> dict:
+    """Upload a pool archive from a file, returns the server summary"""
+    with open(path, 'rb') as f:
+        response = requests.post(
+            f'{url}/api/candidates/import',
+            data=f,
+            headers={'Content-Type': 'application/x-tar'},
+        )
+    if not response.ok:
+        raise RuntimeError(response.json().get('error', response.text))
+    return response.json()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m talentmatch.pool',
+        description='Export or import the candidate pool of a server')
+    parser.add_argument('--url', default=DEFAULT_URL,
+                        help=f'server URL (default {DEFAULT_URL})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help='download the pool')
+    export_parser.add_argument('path', help='archive file to write')
+    export_parser.add_argument('--resumes', action='store_true',
+                               help='include the resume PDFs')
+    import_parser = commands.add_parser('import', help='upload a pool')
+    import_parser.add_argument('path', help='archive file to read')
+    args = parser.parse_args(argv)
+
+    url = args.url.rstrip('/')
+    started = time.time()
+    try:
+        if args.command == 'export':
+            size = export_pool(url, args.path, args.resumes)
+            print(f"Exported {size / 1024 / 1024:.1f} MB to {args.path} "
+                  f"in {time.time() - started:.1f}s")
+        else:
+            result = import_pool(url, args.path)
+            print(json.dumps(result, indent=2))
+            print(f"Imported in {time.time() - started:.1f}s")
+    except (requests.RequestException, RuntimeError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
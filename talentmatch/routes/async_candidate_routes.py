@@ -0,0 +1,325 @@
+"""
+Candidate related routes for the async (Quart) serving mode
+"""
+from concurrent.futures import Executor
+import asyncio
+import io
+from quart import Blueprint, Request, Response, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+from talentmatch.services.candidate_service import CandidateService, PartialImportError
+from talentmatch.etc.uploadstream import (MultipartFileReader, check_content_length,
+                                          iter_uploaded_candidates)
+from talentmatch.routes.async_recommendation_routes import async_api_response
+from talentmatch.routes.candidate_routes import partial_import_error
+from talentmatch.routes.wireformat import parse_fields
+
+
+# Routes streaming their body, limited by their own setting rather than
+# MAX_CONTENT_LENGTH (MAX_UPLOAD_CONTENT_LENGTH, MAX_IMPORT_CONTENT_LENGTH)
+STREAMED_BODY_PATHS = ('/api/candidates/upload', '/api/candidates/import')
+
+
+class StreamedBodyRequest(Request):
+    """
+    Quart request without the app-wide body cap on the streamed body routes
+
+    Quart fixes the body limit when the request is created, before routing,
+    so the routes cannot raise it per request as the Flask ones do. They
+    count the bytes they read instead.
+    """
+
+    def __init__(self, method, scheme, path, *args, max_content_length=None,
+                 **kwargs):
+        if path in STREAMED_BODY_PATHS:
+            max_content_length = None
+        super().__init__(method, scheme, path, *args,
+                         max_content_length=max_content_length, **kwargs)
+
+
+class _QueuedBodyReader(io.RawIOBase):
+    """
+    Blocking file object over request body chunks queued by the event loop,
+    None ends the body and a queued exception is raised by the read
+    """
+
+    def __init__(self, chunks: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        self._chunks = chunks
+        self._loop = loop
+        self._pending = b''
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            if self._eof:
+                return 0
+            chunk = asyncio.run_coroutine_threadsafe(self._chunks.get(),
+                                                     self._loop).result()
+            if chunk is None:
+                self._eof = True
+                return 0
+            if isinstance(chunk, Exception):
+                self._eof = True
+                raise chunk
+            self._pending = chunk
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def create_async_candidate_routes(
+    candidate_service: CandidateService,
+    app_config,
+    executor: Executor = None,
+):
+    """Create candidate routes, mirrors create_candidate_routes"""
+    candidate_bp = Blueprint('candidates', __name__)
+
+    async def run_blocking(function, *args):
+        """Run a blocking call (PDF parsing, embedding, file I/O) in the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, function, *args)
+
+    @candidate_bp.route('/api/candidates', methods=['POST'])
+    async def add_candidates():
+        """Add candidate resumes"""
+        try:
+            data = await request.get_json()
+
+            if not data:
+                return jsonify({'error': 'No data provided'}), 400
+
+            candidates_data = data.get('candidates', [])
+
+            if not candidates_data:
+                return jsonify({'error': 'No candidates provided'}), 400
+
+            result = await run_blocking(
+                candidate_service.add_candidates_from_data, candidates_data)
+
+            return jsonify(result), 201
+
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f'Error processing candidates: {str(e)}'}), 500
+
+    @candidate_bp.route('/api/candidates/upload', methods=['POST'])
+    async def upload_candidates():
+        """
+        Add candidates via file upload
+
+        The body is decoded chunk by chunk on the event loop and completed
+        file parts are handed over a bounded queue to the executor, which
+        extracts and embeds them in batches. The body is limited to
+        MAX_UPLOAD_CONTENT_LENGTH (see StreamedBodyRequest).
+        """
+        try:
+            max_content_length = app_config['MAX_UPLOAD_CONTENT_LENGTH']
+            check_content_length(request.content_length, max_content_length)
+            boundary = request.mimetype_params.get('boundary')
+            if request.mimetype != 'multipart/form-data' or not boundary:
+                return jsonify({'error': 'No files provided'}), 400
+
+            reader = MultipartFileReader(
+                boundary.encode('latin-1'),
+                max_file_size=app_config['MAX_UPLOAD_FILE_SIZE'],
+                max_files=app_config['MAX_UPLOAD_FILES'],
+                max_content_length=max_content_length,
+            )
+            loop = asyncio.get_running_loop()
+            parts = asyncio.Queue(maxsize=app_config['UPLOAD_BATCH_SIZE'])
+
+            def drain_parts():
+                """Blocking iterator over the queued file parts (executor side)"""
+                while True:
+                    part = asyncio.run_coroutine_threadsafe(
+                        parts.get(), loop).result()
+                    if part is None:
+                        return
+                    yield part
+
+            async def read_parts():
+                """Feed the request body to the reader, queue completed files"""
+                try:
+                    async for chunk in request.body:
+                        for part in reader.feed(chunk):
+                            await parts.put(part)
+                    for part in reader.feed(None):
+                        await parts.put(part)
+                finally:
+                    await parts.put(None)
+
+            ingest = run_blocking(
+                candidate_service.add_candidates_from_stream,
+                iter_uploaded_candidates(
+                    drain_parts(),
+                    app_config['ALLOWED_EXTENSIONS'],
+                    max_file_size=app_config['MAX_UPLOAD_FILE_SIZE'],
+                ),
+                app_config['UPLOAD_BATCH_SIZE'],
+            )
+            reading = asyncio.ensure_future(read_parts())
+            try:
+                result = await ingest
+            finally:
+                # Unblocks the reader if ingestion stopped early
+                reading.cancel()
+                # A broken or oversized body takes precedence over its effects
+                if reading.done() and not reading.cancelled() and \
+                        reading.exception():
+                    raise reading.exception()
+
+            return jsonify(result), 201
+
+        except RequestEntityTooLarge as e:
+            return jsonify({'error': e.description}), 413
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f'Error uploading candidates: {str(e)}'}), 500
+
+    @candidate_bp.route('/api/candidates', methods=['GET'])
+    async def get_candidates():
+        """Get all candidate list (paginated with ?limit=&cursor=)"""
+        try:
+            limit = request.args.get('limit', type=int)
+            cursor = request.args.get('cursor', 0, type=int)
+            include_embeddings = request.args.get('embeddings', '').lower() in ('1', 'true')
+            result = candidate_service.get_all_candidates(limit, cursor,
+                                                          include_embeddings)
+            return async_api_response(result, 200,
+                                      parse_fields(request.args.get('fields')))
+
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f'Error retrieving candidates: {str(e)}'}), 500
+
+    @candidate_bp.route('/api/candidates/export', methods=['GET'])
+    async def export_candidates():
+        """
+        Export the pool as a streamed tar archive, the archive chunks are
+        serialized in the executor
+        """
+        try:
+            include_resumes = request.args.get('resumes', '').lower() in ('1', 'true')
+            archive = await run_blocking(candidate_service.export_candidates,
+                                         include_resumes)
+
+            async def stream():
+                while True:
+                    data = await run_blocking(next, archive, None)
+                    if data is None:
+                        return
+                    yield data
+
+            return Response(
+                stream(),
+                mimetype='application/x-tar',
+                headers={
+                    'Content-Disposition':
+                    'attachment; filename=talentmatch-candidates.tar'
+                })
+
+        except Exception as e:
+            return jsonify({'error': f'Error exporting candidates: {str(e)}'}), 500
+
+    @candidate_bp.route('/api/candidates/import', methods=['POST'])
+    async def import_candidates():
+        """
+        Import an archive made by /api/candidates/export
+
+        Body chunks are handed over a bounded queue to the executor, which
+        decodes and stores the archive chunk by chunk. The body is limited
+        to MAX_IMPORT_CONTENT_LENGTH (see StreamedBodyRequest).
+        """
+        try:
+            max_content_length = app_config['MAX_IMPORT_CONTENT_LENGTH']
+            check_content_length(request.content_length, max_content_length)
+            loop = asyncio.get_running_loop()
+            chunks = asyncio.Queue(maxsize=16)
+
+            async def read_body():
+                """
+                Queue the request body chunks, then None, or the error of a
+                broken or oversized body for the importer's read to raise
+                """
+                received = 0
+                try:
+                    async for chunk in request.body:
+                        received += len(chunk)
+                        check_content_length(received, max_content_length)
+                        await chunks.put(chunk)
+                except Exception as e:
+                    await chunks.put(e)
+                else:
+                    await chunks.put(None)
+
+            importing = run_blocking(
+                candidate_service.import_candidates,
+                io.BufferedReader(_QueuedBodyReader(chunks, loop)),
+            )
+            reading = asyncio.ensure_future(read_body())
+            try:
+                result = await importing
+            finally:
+                # Unblocks the reader if the import stopped early
+                reading.cancel()
+
+            return jsonify(result), 201
+
+        except PartialImportError as e:
+            body, status = partial_import_error(e)
+            return jsonify(body), status
+        except RequestEntityTooLarge as e:
+            return jsonify({'error': e.description}), 413
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f'Error importing candidates: {str(e)}'}), 500
+
+    @candidate_bp.route('/api/candidates', methods=['DELETE'])
+    async def clear_candidates():
+        """Clear all candidates"""
+        try:
+            result = candidate_service.clear_all_candidates()
+            return jsonify(result), 200
+
+        except Exception as e:
+            return jsonify({'error': f'Error clearing candidates: {str(e)}'}), 500
+
+    @candidate_bp.route('/api/candidates/delete', methods=['POST'])
+    async def delete_candidates():
+        """Delete several candidates by id list"""
+        try:
+            data = await request.get_json() or {}
+            candidate_ids = data.get('ids', [])
+
+            if not isinstance(candidate_ids, list):
+                return jsonify({'error': 'ids must be a list'}), 400
+
+            result = candidate_service.delete_candidates(candidate_ids)
+            return jsonify(result), 200
+
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f'Error deleting candidates: {str(e)}'}), 500
+
+    @candidate_bp.route('/api/candidates/<candidate_id>', methods=['DELETE'])
+    async def delete_candidate(candidate_id):
+        """Delete specific candidate"""
+        try:
+            result = candidate_service.delete_candidate(candidate_id)
+            return jsonify(result), 200
+
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            return jsonify({'error': f'Error deleting candidate: {str(e)}'}), 500
+
+    return candidate_bp
@@ -0,0 +1,36 @@
+"""
+Memory diagnostics routes for the async (Quart) serving mode
+"""
+from concurrent.futures import Executor
+import asyncio
+from quart import Blueprint, request, jsonify
+from talentmatch.services.diagnostics_service import DiagnosticsService
+from talentmatch.routes.diagnostics_routes import (check_admin_invitation_code,
+                                                   parse_memory_request)
+
+
+def create_async_diagnostics_routes(diagnostics_service: DiagnosticsService,
+                                    executor: Executor = None):
+    """Create memory diagnostics routes, mirrors create_diagnostics_routes"""
+    diagnostics_bp = Blueprint('diagnostics', __name__)
+
+    @diagnostics_bp.route('/api/admin/memory', methods=['GET', 'POST'])
+    async def memory_report():
+        """Memory report, snapshots and object walks run in the executor"""
+        body = (await request.get_json(silent=True) or {}) \
+            if request.method == 'POST' else {}
+        error = check_admin_invitation_code(request.headers, body)
+        if error:
+            return jsonify(error[0]), error[1]
+
+        try:
+            arguments = parse_memory_request(
+                body if request.method == 'POST' else request.args)
+            report = await asyncio.get_running_loop().run_in_executor(
+                executor,
+                lambda: diagnostics_service.memory_report(**arguments))
+            return jsonify(report), 200
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    return diagnostics_bp
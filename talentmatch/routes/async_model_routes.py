@@ -0,0 +1,44 @@
+"""
+Embedding model routes for the async (Quart) serving mode
+"""
+from quart import Blueprint, request, jsonify
+from talentmatch.services.model_service import ModelService
+from talentmatch.routes.recommendation_routes import check_invitation_code
+
+
+def create_async_model_routes(model_service: ModelService):
+    """Create embedding model routes, mirrors create_model_routes"""
+    model_bp = Blueprint('models', __name__)
+
+    @model_bp.route('/api/models', methods=['GET'])
+    async def list_models():
+        """Loaded embedding models and the migration status"""
+        return jsonify(model_service.list_models()), 200
+
+    @model_bp.route('/api/models/migration', methods=['POST'])
+    async def start_migration():
+        """Re-embed the stored candidates with another model in the background"""
+        data = await request.get_json(silent=True) or {}
+        error = check_invitation_code(data)
+        if error:
+            return jsonify(error[0]), error[1]
+
+        try:
+            return jsonify(model_service.start_migration(data.get('model'))), 202
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    @model_bp.route('/api/models/migration', methods=['GET'])
+    async def migration_status():
+        """Progress of the last migration"""
+        return jsonify({'migration': model_service.migration_status()}), 200
+
+    @model_bp.route('/api/models/migration', methods=['DELETE'])
+    async def cancel_migration():
+        """Stop the running migration, it can be resumed later"""
+        try:
+            return jsonify(model_service.cancel_migration()), 200
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 409
+
+    return model_bp
@@ -0,0 +1,83 @@
+"""
+Recommendation related routes for the async (Quart) serving mode
+"""
+from concurrent.futures import Executor
+from quart import Blueprint, Response, request, jsonify
+from talentmatch.services.recommendation_service import RecommendationService
+from talentmatch.routes.recommendation_routes import check_invitation_code, parse_match_request
+from talentmatch.routes.wireformat import MSGPACK_MIMETYPES, build_response_parts, decode_request_payload, etag_headers, parse_fields
+
+
+async def get_async_request_payload():
+    """Read the current Quart request body as JSON or MessagePack"""
+    if request.mimetype in MSGPACK_MIMETYPES:
+        return decode_request_payload(request.mimetype,
+                                      await request.get_data())
+    return await request.get_json()
+
+
+def async_api_response(payload, status=200, fields=None,
+                       etag=None) -> Response:
+    """Build a negotiated, projected and compressed Quart response"""
+    extra_headers = {}
+    if etag is not None:
+        extra_headers, not_modified = etag_headers(
+            etag, fields, request.accept_mimetypes, request.if_none_match)
+        if not_modified:
+            return Response('', status=304, headers=extra_headers)
+    body, headers = build_response_parts(
+        payload,
+        request.accept_mimetypes,
+        request.accept_encodings,
+        fields,
+    )
+    return Response(body, status=status,
+                    headers={**headers, **extra_headers})
+
+
+def create_async_recommendation_routes(
+    recommendation_service: RecommendationService,
+    app_config,
+    executor: Executor = None,
+):
+    """Create recommendation routes, mirrors create_recommendation_routes"""
+    recommendation_bp = Blueprint('recommendations', __name__)
+
+    @recommendation_bp.route('/api/verify-invitation', methods=['POST'])
+    async def verify_invitation():
+        """Verify invitation code"""
+        data = await request.get_json() or {}
+        invitation_error = check_invitation_code(data)
+        if invitation_error:
+            return jsonify(invitation_error[0]), invitation_error[1]
+
+        return jsonify({'valid': True}), 200
+
+    @recommendation_bp.route('/api/match', methods=['POST'])
+    async def match_candidates():
+        """Real-time candidate matching, LLM calls are awaited"""
+        try:
+            data = await get_async_request_payload()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        match_arguments, error = parse_match_request(data, app_config)
+        if error:
+            return jsonify(error[0]), error[1]
+
+        try:
+            result, etag, cached = \
+                await recommendation_service.match_candidates_cached_async(
+                    **match_arguments,
+                    executor=executor,
+                )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        fields = parse_fields(request.args.get('fields') or data.get('fields'))
+        response = async_api_response(result, 200, fields, etag)
+        if etag is not None:
+            response.headers['X-Match-Cache'] = 'hit' if cached else 'miss'
+        return response
+
+    return recommendation_bp
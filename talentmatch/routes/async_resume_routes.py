@@ -0,0 +1,57 @@
+"""
+Resume PDF routes for the async (Quart) serving mode
+"""
+from concurrent.futures import Executor
+import asyncio
+from quart import Blueprint, request, jsonify, send_file
+from talentmatch.services.resume_service import ResumeService
+from talentmatch.routes.recommendation_routes import check_invitation_code
+
+
+def create_async_resume_routes(resume_service: ResumeService, app_config,
+                               executor: Executor = None):
+    """Create resume PDF routes, mirrors create_resume_routes"""
+    resume_bp = Blueprint('resumes', __name__)
+
+    @resume_bp.route('/api/resumes/<name>', methods=['GET'])
+    # Links of the built frontend and of earlier responses
+    @resume_bp.route('/static/pdf/<name>', methods=['GET'])
+    async def get_resume(name):
+        """A resume PDF by its 'resume_name', cached as immutable"""
+        path = resume_service.resume_path(name)
+        if path is None:
+            return jsonify({'error': 'Resume not found'}), 404
+
+        response = await send_file(
+            path,
+            mimetype='application/pdf',
+            add_etags=False,
+            cache_timeout=app_config['RESUME_CACHE_MAX_AGE'],
+        )
+        response.set_etag(resume_service.resume_store.etag(name))
+        response.cache_control.immutable = True
+        await response.make_conditional(request, accept_ranges=True,
+                                        complete_length=path.stat().st_size)
+        return response
+
+    @resume_bp.route('/api/resumes/stats', methods=['GET'])
+    async def resume_stats():
+        """Garbage collection counters of the resume PDFs"""
+        return jsonify(resume_service.get_stats()), 200
+
+    @resume_bp.route('/api/resumes/gc', methods=['POST'])
+    async def collect_resumes():
+        """Remove the unreferenced resume PDFs now"""
+        data = await request.get_json(silent=True) or {}
+        error = check_invitation_code(data)
+        if error:
+            return jsonify(error[0]), error[1]
+
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                executor, resume_service.collect_garbage)
+            return jsonify(result), 200
+        except Exception as e:
+            return jsonify({'error': f'Error collecting resumes: {str(e)}'}), 500
+
+    return resume_bp
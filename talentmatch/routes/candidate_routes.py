@@ -1,12 +1,23 @@
 """
 Candidate related routes
 """
-from flask import Blueprint, request, jsonify
-from talentmatch.services.candidate_service import CandidateService
-from talentmatch.utils import allowed_file, extract_text_from_file, create_upload_folder
-import os
-import uuid
-from werkzeug.utils import secure_filename
+from typing import Any, Dict, Tuple
+from flask import Blueprint, Response, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+from talentmatch.services.candidate_service import CandidateService, PartialImportError
+from talentmatch.etc.uploadstream import iter_multipart_files, iter_uploaded_candidates
+from talentmatch.routes.wireformat import api_response, parse_fields
+
+
+def partial_import_error(error: PartialImportError) -> Tuple[Dict[str, Any], int]:
+    """Error body and status of an import stopped after storing candidates"""
+    if isinstance(error.error, RequestEntityTooLarge):
+        status = 413
+    elif isinstance(error.error, ValueError):
+        status = 400
+    else:
+        status = 500
+    return {'error': str(error), **error.result}, status
 
 
 def create_candidate_routes(candidate_service: CandidateService, app_config):
@@ -39,51 +50,43 @@ def create_candidate_routes(candidate_service: CandidateService, app_config):
     
     @candidate_bp.route('/api/candidates/upload', methods=['POST'])
     def upload_candidates():
-        """Add candidates via file upload"""
+        """
+        Add candidates via file upload
+
+        The multipart body is parsed straight from the request stream, files
+        (PDF/TXT, or zip/tar archives of them) are extracted one at a time and
+        embedded in batches of UPLOAD_BATCH_SIZE.
+        """
         try:
-            if 'files' not in request.files:
+            # Uploads may be much larger than regular API requests
+            request.max_content_length = app_config['MAX_UPLOAD_CONTENT_LENGTH']
+            
+            boundary = request.mimetype_params.get('boundary')
+            if request.mimetype != 'multipart/form-data' or not boundary:
                 return jsonify({'error': 'No files provided'}), 400
             
-            files = request.files.getlist('files')
-            
-            if not files or files[0].filename == '':
-                return jsonify({'error': 'No files selected'}), 400
-            
-            uploaded_candidates = []
-            
-            for file in files:
-                if file and allowed_file(file.filename, app_config['ALLOWED_EXTENSIONS']):
-                    # Safely save filename
-                    filename = secure_filename(file.filename)
-                    file_path = os.path.join(app_config['UPLOAD_FOLDER'], filename)
-                    
-                    # Save file
-                    file.save(file_path)
-                    
-                    # Extract text
-                    resume_text = extract_text_from_file(file_path)
-                    
-                    if resume_text.strip():
-                        # Create candidate object
-                        candidate = {
-                            'id': str(uuid.uuid4()),
-                            'name': os.path.splitext(filename)[0],  # Use filename as name
-                            'resume': resume_text
-                        }
-                        
-                        uploaded_candidates.append(candidate)
-                    
-                    # Delete temporary file
-                    os.remove(file_path)
-            
-            if not uploaded_candidates:
-                return jsonify({'error': 'No valid candidates found in uploaded files'}), 400
+            files = iter_multipart_files(
+                request.stream,
+                boundary.encode('latin-1'),
+                max_file_size=app_config['MAX_UPLOAD_FILE_SIZE'],
+                max_files=app_config['MAX_UPLOAD_FILES'],
+            )
+            uploaded_candidates = iter_uploaded_candidates(
+                files,
+                app_config['ALLOWED_EXTENSIONS'],
+                max_file_size=app_config['MAX_UPLOAD_FILE_SIZE'],
+            )
             
             # Use service layer for processing
-            result = candidate_service.add_candidates_from_files(uploaded_candidates)
+            result = candidate_service.add_candidates_from_stream(
+                uploaded_candidates,
+                batch_size=app_config['UPLOAD_BATCH_SIZE'],
+            )
             
             return jsonify(result), 201
             
+        except RequestEntityTooLarge as e:
+            return jsonify({'error': e.description}), 413
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
@@ -91,14 +94,68 @@ def create_candidate_routes(candidate_service: CandidateService, app_config):
     
     @candidate_bp.route('/api/candidates', methods=['GET'])
     def get_candidates():
-        """Get all candidate list"""
+        """
+        Get all candidate list (paginated with ?limit=&cursor=)
+
+        ?embeddings=1 adds the stored embeddings, ?fields=id,name projects
+        the records. JSON or MessagePack by Accept header, gzip/br by
+        Accept-Encoding.
+        """
         try:
-            result = candidate_service.get_all_candidates()
-            return jsonify(result), 200
+            limit = request.args.get('limit', type=int)
+            cursor = request.args.get('cursor', 0, type=int)
+            include_embeddings = request.args.get('embeddings', '').lower() in ('1', 'true')
+            result = candidate_service.get_all_candidates(limit, cursor,
+                                                          include_embeddings)
+            return api_response(result, 200,
+                                parse_fields(request.args.get('fields')))
             
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': f'Error retrieving candidates: {str(e)}'}), 500
     
+    @candidate_bp.route('/api/candidates/export', methods=['GET'])
+    def export_candidates():
+        """
+        Export the pool (records, embeddings and dedup signatures) as a
+        streamed tar archive, ?resumes=1 includes the resume PDFs
+        """
+        try:
+            include_resumes = request.args.get('resumes', '').lower() in ('1', 'true')
+            archive = candidate_service.export_candidates(include_resumes)
+            return Response(
+                archive,
+                mimetype='application/x-tar',
+                headers={
+                    'Content-Disposition':
+                    'attachment; filename=talentmatch-candidates.tar'
+                })
+            
+        except Exception as e:
+            return jsonify({'error': f'Error exporting candidates: {str(e)}'}), 500
+    
+    @candidate_bp.route('/api/candidates/import', methods=['POST'])
+    def import_candidates():
+        """
+        Import an archive made by /api/candidates/export, read in chunks
+        straight from the request body
+        """
+        try:
+            request.max_content_length = app_config['MAX_IMPORT_CONTENT_LENGTH']
+            result = candidate_service.import_candidates(request.stream)
+            return jsonify(result), 201
+            
+        except PartialImportError as e:
+            body, status = partial_import_error(e)
+            return jsonify(body), status
+        except RequestEntityTooLarge as e:
+            return jsonify({'error': e.description}), 413
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f'Error importing candidates: {str(e)}'}), 500
+    
     @candidate_bp.route('/api/candidates', methods=['DELETE'])
     def clear_candidates():
         """Clear all candidates"""
@@ -109,6 +166,24 @@ def create_candidate_routes(candidate_service: CandidateService, app_config):
         except Exception as e:
             return jsonify({'error': f'Error clearing candidates: {str(e)}'}), 500
     
+    @candidate_bp.route('/api/candidates/delete', methods=['POST'])
+    def delete_candidates():
+        """Delete several candidates by id list"""
+        try:
+            data = request.get_json() or {}
+            candidate_ids = data.get('ids', [])
+            
+            if not isinstance(candidate_ids, list):
+                return jsonify({'error': 'ids must be a list'}), 400
+            
+            result = candidate_service.delete_candidates(candidate_ids)
+            return jsonify(result), 200
+            
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f'Error deleting candidates: {str(e)}'}), 500
+    
     @candidate_bp.route('/api/candidates/<candidate_id>', methods=['DELETE'])
     def delete_candidate(candidate_id):
         """Delete specific candidate"""
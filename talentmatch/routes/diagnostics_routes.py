@@ -0,0 +1,73 @@
+"""
+Memory diagnostics routes (registered when MEMORY_DIAGNOSTICS_ENABLED)
+"""
+from flask import Blueprint, request, jsonify
+from talentmatch.services.diagnostics_service import DiagnosticsService
+from talentmatch.routes.recommendation_routes import check_invitation_code
+
+# URLs end up in access logs and proxies, the invitation code is sent here
+INVITATION_CODE_HEADER = 'X-Invitation-Code'
+
+
+def check_admin_invitation_code(headers, body):
+    """
+    Validate the invitation code of the X-Invitation-Code header or of the
+    JSON body, never of the query string
+    """
+    return check_invitation_code({
+        'invitation_code': headers.get(INVITATION_CODE_HEADER)
+        or body.get('invitation_code')
+    })
+
+
+def parse_memory_request(args):
+    """
+    Arguments of DiagnosticsService.memory_report from query parameters or
+    a JSON body
+    """
+    def flag(name):
+        value = args.get(name)
+        return value is True or str(value or '').lower() in ('1', 'true',
+                                                            'yes')
+
+    top = args.get('top')
+    try:
+        top_n = int(top) if top is not None else None
+    except (TypeError, ValueError):
+        raise ValueError("top must be an integer")
+    return {
+        'top_n': top_n,
+        'objects': flag('objects'),
+        'buffers': flag('buffers'),
+        'collect': flag('collect'),
+    }
+
+
+def create_diagnostics_routes(diagnostics_service: DiagnosticsService):
+    """Create memory diagnostics routes"""
+    diagnostics_bp = Blueprint('diagnostics', __name__)
+
+    @diagnostics_bp.route('/api/admin/memory', methods=['GET', 'POST'])
+    def memory_report():
+        """
+        RSS, top allocation growth since the previous call (?top=N, 0 skips
+        the snapshot), object counts by type (?objects=1), numpy / torch
+        buffer sizes (?buffers=1), after a gc collection with ?collect=1
+
+        A POST takes the same options and the invitation code in its JSON
+        body, a GET the code in the X-Invitation-Code header.
+        """
+        body = (request.get_json(silent=True) or {}) \
+            if request.method == 'POST' else {}
+        error = check_admin_invitation_code(request.headers, body)
+        if error:
+            return jsonify(error[0]), error[1]
+
+        try:
+            return jsonify(diagnostics_service.memory_report(
+                **parse_memory_request(
+                    body if request.method == 'POST' else request.args))), 200
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    return diagnostics_bp
@@ -1,11 +1,122 @@
 """
 Recommendation related routes
 """
+import math
 from flask import Blueprint, request, jsonify
 from talentmatch.services.recommendation_service import RecommendationService
+from talentmatch.etc.candidatefilter import CandidateFilter
+from talentmatch.etc.recommendengine import RETRIEVAL_MODES
+from talentmatch.routes.wireformat import api_response, get_request_payload, parse_fields
 from talentmatch import INVITATION_CODE
 
 
+def check_invitation_code(data):
+    """Validate the invitation code of a request, returns (error, status) or None"""
+    configured_codes = INVITATION_CODE
+    provided_code = (data.get('invitation_code') or '').strip()
+    if len(configured_codes) <= 0:
+        # Reject if invitation code not set, prevent bypass
+        return {'error': 'Invitation code not configured'}, 200
+    if provided_code not in configured_codes:
+        return {'error': 'Invalid or missing invitation code'}, 403
+    return None
+
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off', '')
+
+
+def parse_flag(data, name: str, default: bool = False) -> bool:
+    """
+    Boolean option of a payload: a JSON boolean, 0 / 1 or their string
+    forms ('true', 'false', ...) sent by form-style clients
+    """
+    value = data.get(name)
+    if value is None:
+        return bool(default)
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        if value.strip().lower() in TRUE_VALUES:
+            return True
+        if value.strip().lower() in FALSE_VALUES:
+            return False
+    raise ValueError(f"{name} must be a boolean")
+
+
+def parse_match_request(data, app_config):
+    """
+    Validate a /api/match payload
+    :return: (matching arguments, None) or (None, (error, status))
+    """
+    if not data:
+        return None, ({'error': 'No data provided'}, 400)
+
+    # Validate invitation code (if enabled in configuration)
+    invitation_error = check_invitation_code(data)
+    if invitation_error:
+        return None, invitation_error
+
+    job_description = data.get('job_description', '').strip()
+    candidates_data = data.get('candidates')
+    try:
+        use_stored_candidates = parse_flag(data, 'use_stored_candidates')
+        rerank = parse_flag(data, 'rerank', app_config['RERANK_ENABLED'])
+        summaries = parse_flag(data, 'summaries',
+                               app_config['LLM_SUMMARIES_ENABLED'])
+        explain = parse_flag(data, 'explain',
+                             app_config['EXPLANATIONS_ENABLED'])
+    except ValueError as e:
+        return None, ({'error': str(e)}, 400)
+
+    if not job_description:
+        return None, ({'error': 'Job description is required'}, 400)
+
+    if not candidates_data and not use_stored_candidates:
+        return None, ({'error': 'Candidates data is required'}, 400)
+
+    retrieval = data.get('retrieval', app_config['RETRIEVAL_MODE'])
+    if retrieval not in RETRIEVAL_MODES:
+        return None, ({
+            'error':
+            f"retrieval must be one of {', '.join(RETRIEVAL_MODES)}"
+        }, 400)
+
+    try:
+        candidate_filter = CandidateFilter.parse(data.get('filters'))
+    except ValueError as e:
+        return None, ({'error': str(e)}, 400)
+
+    # Get parameters
+    top_k = data.get('top_k', app_config['MAX_CANDIDATES'])
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k <= 0:
+        return None, ({'error': 'top_k must be a positive integer'}, 400)
+    min_similarity = data.get(
+        'min_similarity',
+        app_config['MIN_SIMILARITY_THRESHOLD'],
+    )
+    if isinstance(min_similarity, bool) or \
+            not isinstance(min_similarity, (int, float)) or \
+            not math.isfinite(min_similarity):
+        return None, ({'error': 'min_similarity must be a number'}, 400)
+
+    return {
+        'job_description': job_description,
+        'candidates_data': candidates_data,
+        'top_k': top_k,
+        'min_similarity': min_similarity,
+        'embedding_fingerprint': data.get('embedding_fingerprint'),
+        'retrieval': retrieval,
+        'use_stored_candidates': use_stored_candidates,
+        'candidate_filter': candidate_filter,
+        'rerank': rerank,
+        'summaries': summaries,
+        'explain': explain,
+    }, None
+
+
 def create_recommendation_routes(
     recommendation_service: RecommendationService,
     app_config,
@@ -86,47 +197,46 @@ def create_recommendation_routes(
 
     @recommendation_bp.route('/api/match', methods=['POST'])
     def match_candidates():
-        """Real-time candidate matching - specifically for frontend direct data input"""
+        """
+        Real-time candidate matching - specifically for frontend direct data input
+
+        Accepts JSON or MessagePack (raw PDF bytes allowed as 'resume'), the
+        response is negotiated the same way. Candidates may reference stored
+        candidates ({'ref': id}) or carry precomputed embeddings tagged with
+        'embedding_fingerprint', those skip PDF parsing and encoding.
+        'use_stored_candidates' matches all stored candidates instead, and
+        'retrieval': 'hybrid' adds a BM25 prefilter fused with the semantic
+        ranking. 'filters' restricts candidates by metadata (skills, years,
+        education, seniority, location, tags) before any scoring. 'fields'
+        (query string or body) projects the returned candidate records.
+        'rerank' re-orders the best candidates with a local cross-encoder.
+        'summaries': false skips the LLM summaries, 'explain' adds the resume
+        sections supporting each match. Results of repeated requests come
+        from the match cache with a weak ETag, If-None-Match then answers
+        304.
+        """
         # try:
-        data = request.get_json()
-
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-
-        # Validate invitation code (if enabled in configuration)
-        configured_codes = INVITATION_CODE
-        provided_code = (data.get('invitation_code') or '').strip()
-        if len(configured_codes) <= 0:
-            # Reject if invitation code not set, prevent bypass
-            return jsonify({'error': 'Invitation code not configured'}), 200
-        if provided_code not in configured_codes:
-            return jsonify({'error':
-                            'Invalid or missing invitation code'}), 403
-
-        job_description = data.get('job_description', '').strip()
-        candidates_data = data.get('candidates')
-
-        if not job_description:
-            return jsonify({'error': 'Job description is required'}), 400
-
-        if not candidates_data:
-            return jsonify({'error': 'Candidates data is required'}), 400
+        try:
+            data = get_request_payload()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        # Get parameters
-        top_k = data.get('top_k', app_config['MAX_CANDIDATES'])
-        min_similarity = data.get(
-            'min_similarity',
-            app_config['MIN_SIMILARITY_THRESHOLD'],
-        )
+        match_arguments, error = parse_match_request(data, app_config)
+        if error:
+            return jsonify(error[0]), error[1]
 
         # Use service layer for processing
-        result = recommendation_service.match_candidates_realtime(
-            job_description=job_description,
-            candidates_data=candidates_data,
-            top_k=top_k,
-            min_similarity=min_similarity,
-        )
-
-        return jsonify(result), 200
+        try:
+            result, etag, cached = \
+                recommendation_service.match_candidates_cached(
+                    **match_arguments)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        fields = parse_fields(request.args.get('fields') or data.get('fields'))
+        response = api_response(result, 200, fields, etag)
+        if etag is not None:
+            response.headers['X-Match-Cache'] = 'hit' if cached else 'miss'
+        return response
 
     return recommendation_bp
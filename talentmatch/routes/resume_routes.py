@@ -0,0 +1,54 @@
+"""
+Resume PDF routes
+"""
+from flask import Blueprint, request, jsonify, send_file
+from talentmatch.services.resume_service import ResumeService
+from talentmatch.routes.recommendation_routes import check_invitation_code
+
+
+def create_resume_routes(resume_service: ResumeService, app_config):
+    """Create resume PDF routes"""
+    resume_bp = Blueprint('resumes', __name__)
+
+    @resume_bp.route('/api/resumes/<name>', methods=['GET'])
+    # Links of the built frontend and of earlier responses
+    @resume_bp.route('/static/pdf/<name>', methods=['GET'])
+    def get_resume(name):
+        """
+        A resume PDF by its 'resume_name', with ETag/Last-Modified validation
+        and range requests; a name always holds the same bytes, so it is
+        cached as immutable
+        """
+        path = resume_service.resume_path(name)
+        if path is None:
+            return jsonify({'error': 'Resume not found'}), 404
+
+        response = send_file(
+            path,
+            mimetype='application/pdf',
+            conditional=True,
+            etag=resume_service.resume_store.etag(name),
+            max_age=app_config['RESUME_CACHE_MAX_AGE'],
+        )
+        response.cache_control.immutable = True
+        return response
+
+    @resume_bp.route('/api/resumes/stats', methods=['GET'])
+    def resume_stats():
+        """Garbage collection counters of the resume PDFs"""
+        return jsonify(resume_service.get_stats()), 200
+
+    @resume_bp.route('/api/resumes/gc', methods=['POST'])
+    def collect_resumes():
+        """Remove the unreferenced resume PDFs now"""
+        data = request.get_json(silent=True) or {}
+        error = check_invitation_code(data)
+        if error:
+            return jsonify(error[0]), error[1]
+
+        try:
+            return jsonify(resume_service.collect_garbage()), 200
+        except Exception as e:
+            return jsonify({'error': f'Error collecting resumes: {str(e)}'}), 500
+
+    return resume_bp
@@ -0,0 +1,192 @@
+"""
+API wire format: content negotiation (JSON / MessagePack), field projection
+and response compression
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+import gzip
+import hashlib
+import json
+import numpy as np
+from flask import Response, request
+from werkzeug.http import quote_etag
+try:
+    import msgpack
+except ImportError:  # optional, JSON only without it
+    msgpack = None
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+# Record lists of the API payloads that field projection applies to
+PROJECTED_KEYS = ('candidates', 'top_candidates')
+# Smaller bodies are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+def parse_fields(value) -> Optional[List[str]]:
+    """Parse a field projection (comma separated string or list)"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    fields = [field.strip() for field in value if field and field.strip()]
+    return fields or None
+
+
+def project_fields(payload: Dict[str, Any],
+                   fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Keep only the requested fields of each candidate record"""
+    if not fields:
+        return payload
+
+    projected = dict(payload)
+    for key in PROJECTED_KEYS:
+        records = payload.get(key)
+        if isinstance(records, list):
+            projected[key] = [{
+                field: record[field]
+                for field in fields if field in record
+            } for record in records]
+    return projected
+
+
+def negotiate_mimetype(accept_mimetypes) -> str:
+    """Pick the response mimetype from the Accept header"""
+    offered = [JSON_MIMETYPE]
+    if msgpack is not None:
+        offered.extend(MSGPACK_MIMETYPES)
+    return accept_mimetypes.best_match(offered, default=JSON_MIMETYPE)
+
+
+def _json_default(obj):
+    """JSON encoding of numpy values and raw bytes"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (bytes, bytearray)):
+        return base64.b64encode(obj).decode('ascii')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _msgpack_default(obj):
+    """MessagePack encoding of numpy values, vectors as raw little-endian float32"""
+    if isinstance(obj, np.ndarray):
+        return obj.astype('<f4', copy=False).tobytes()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
+def encode_payload(payload: Dict[str, Any], mimetype: str) -> bytes:
+    """Serialize a payload to the given mimetype"""
+    if mimetype in MSGPACK_MIMETYPES:
+        return msgpack.packb(payload,
+                             default=_msgpack_default,
+                             use_bin_type=True)
+    return json.dumps(payload,
+                      default=_json_default,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def compress_body(body: bytes,
+                  accept_encodings) -> Tuple[bytes, Optional[str]]:
+    """Compress a body with the best encoding accepted by the client"""
+    # An absent Accept-Encoding header must not enable compression
+    if len(body) < MIN_COMPRESS_SIZE or not accept_encodings:
+        return body, None
+
+    offered = ['gzip']
+    if brotli is not None:
+        offered.insert(0, 'br')
+    encoding = accept_encodings.best_match(offered)
+
+    if encoding == 'br':
+        return brotli.compress(body, quality=5), 'br'
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=5), 'gzip'
+    return body, None
+
+
+def build_response_parts(
+    payload: Dict[str, Any],
+    accept_mimetypes,
+    accept_encodings,
+    fields: Optional[List[str]] = None,
+) -> Tuple[bytes, Dict[str, str]]:
+    """Project, serialize and compress a payload, returns (body, headers)"""
+    mimetype = negotiate_mimetype(accept_mimetypes)
+    body = encode_payload(project_fields(payload, fields), mimetype)
+    body, encoding = compress_body(body, accept_encodings)
+
+    headers = {
+        'Content-Type': mimetype,
+        'Vary': 'Accept, Accept-Encoding',
+    }
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return body, headers
+
+
+def etag_headers(
+    etag: str,
+    fields: Optional[List[str]],
+    accept_mimetypes,
+    if_none_match,
+) -> Tuple[Dict[str, str], bool]:
+    """
+    Weak ETag headers of a cached payload as negotiated and projected, and
+    whether the client already holds it (If-None-Match)
+    """
+    variant = json.dumps([negotiate_mimetype(accept_mimetypes), fields])
+    etag = f"{etag}-{hashlib.sha256(variant.encode('utf-8')).hexdigest()[:8]}"
+    headers = {
+        'ETag': quote_etag(etag, weak=True),
+        'Vary': 'Accept, Accept-Encoding',
+    }
+    return headers, if_none_match.contains_weak(etag)
+
+
+def decode_request_payload(mimetype: str, data: bytes):
+    """Deserialize a JSON or MessagePack request body (None when empty)"""
+    if not data:
+        return None
+    if mimetype in MSGPACK_MIMETYPES:
+        if msgpack is None:
+            raise ValueError("MessagePack requests require the msgpack package")
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
+
+
+def get_request_payload():
+    """Read the current Flask request body as JSON or MessagePack"""
+    if request.mimetype in MSGPACK_MIMETYPES:
+        return decode_request_payload(request.mimetype, request.get_data())
+    return request.get_json()
+
+
+def api_response(payload: Dict[str, Any],
+                 status: int = 200,
+                 fields: Optional[List[str]] = None,
+                 etag: str = None) -> Response:
+    """
+    Build a negotiated, projected and compressed Flask response, with an
+    etag a 304 when the client already holds it
+    """
+    extra_headers = {}
+    if etag is not None:
+        extra_headers, not_modified = etag_headers(
+            etag, fields, request.accept_mimetypes, request.if_none_match)
+        if not_modified:
+            return Response(status=304, headers=extra_headers)
+    body, headers = build_response_parts(
+        payload,
+        request.accept_mimetypes,
+        request.accept_encodings,
+        fields,
+    )
+    return Response(body, status=status, headers={**headers, **extra_headers})
@@ -1,18 +1,102 @@
 """
 Candidate business logic service
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Sequence
+from itertools import islice
+import base64
+import threading
+import time
+import numpy as np
 from talentmatch.models.candidate import Candidate, CandidateStorage
-from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
-from talentmatch.utils import process_candidates
+from talentmatch.etc.modelregistry import EmbeddingModelRegistry
+from talentmatch.etc.deduplicator import Deduplicator, ResumeFingerprint
+from talentmatch.etc.fieldextractor import FieldExtractor
+from talentmatch.etc.projection import create_projection
+from talentmatch.etc.shardindex import ShardedIndex
+from talentmatch.etc.sectionexplainer import SectionExplainer
+from talentmatch.etc.poolarchive import (RECORD_FIELDS, PoolArchiveChunk, read_pool_archive,
+                                         write_pool_archive)
+from talentmatch.utils import process_candidates, resume_store, split_duplicates
+
+
+class PartialImportError(Exception):
+    """
+    Archive import stopped by an error after some batches were stored, the
+    result counts what the storage holds from the archive
+    """
+
+    def __init__(self, error: Exception, result: Dict[str, Any]):
+        super().__init__(
+            f"{error} ({result['imported_count']} candidates imported "
+            f"before the error)")
+        self.error = error
+        self.result = result
 
 
 class CandidateService:
     """Candidate service class"""
 
-    def __init__(self, embedding_processor: EmbeddingProcessor):
-        self.embedding_processor = embedding_processor
-        self.storage = CandidateStorage()
+    # Embeddings sampled to fit the reduction projection
+    PROJECTION_SAMPLE_SIZE = 10000
+    # Bulk import rows stored per storage write (and per embedding batch)
+    IMPORT_BATCH_SIZE = 1024
+
+    def __init__(
+        self,
+        model_registry: EmbeddingModelRegistry,
+        near_duplicate_threshold: float = 0.85,
+        field_extractor: FieldExtractor = None,
+        reduction: str = 'none',
+        reduced_dimensions: int = 128,
+        reduction_min_candidates: int = 2000,
+        shard_index: ShardedIndex = None,
+        section_explainer: SectionExplainer = None,
+    ):
+        self.model_registry = model_registry
+        self.field_extractor = field_extractor or FieldExtractor()
+        # Section embeddings of new resumes are cached for explanations
+        self.section_explainer = section_explainer
+        self.storage = CandidateStorage(
+            Deduplicator(threshold=near_duplicate_threshold),
+            embedding_fingerprint=model_registry.active.fingerprint,
+            shard_index=shard_index,
+        )
+        # Reduced embeddings for shortlist scoring, fitted once the pool is
+        # large enough and refitted each time it doubles
+        create_projection(reduction, reduced_dimensions)
+        self.reduction = reduction
+        self.reduced_dimensions = reduced_dimensions
+        self.reduction_min_candidates = reduction_min_candidates
+        self._projection_fitted_count = 0
+        self._projection_lock = threading.Lock()
+
+    def _process_and_store(
+        self,
+        candidates_data: List[Dict[str, Any]],
+    ):
+        """Process candidate data, skip duplicates and add the rest to storage"""
+        # The active model cannot change between embedding and storing
+        with self.model_registry.cutover_lock.read_locked():
+            embedding_processor = self.model_registry.active
+            processed_candidates, duplicates = split_duplicates(
+                process_candidates(
+                    embedding_processor,
+                    candidates_data,
+                    deduplicator=self.storage.deduplicator,
+                    field_extractor=self.field_extractor,
+                ))
+
+            added_count = self.storage.add_candidates(
+                [Candidate.from_dict(data) for data in processed_candidates],
+                embedding_fingerprint=embedding_processor.fingerprint,
+            )
+
+        # Match explanations then only embed the job requirements
+        if self.section_explainer is not None and processed_candidates:
+            self.section_explainer.index(processed_candidates,
+                                         embedding_processor)
+
+        return added_count, duplicates
 
     def add_candidates_from_data(
         self,
@@ -22,16 +106,15 @@ class CandidateService:
         if not candidates_data:
             raise ValueError("No candidates provided")
 
-        # Process candidate data
-        processed_candidates = process_candidates(self.embedding_processor,
-                                                  candidates_data)
-
-        # Add to storage
-        added_count = self.storage.add_candidates(processed_candidates)
+        # Process candidate data and add to storage
+        added_count, duplicates = self._process_and_store(candidates_data)
+        self.refresh_projection()
 
         return {
             'message': f'Successfully added {added_count} candidates',
             'added_count': added_count,
+            'duplicate_count': len(duplicates),
+            'duplicates': duplicates,
             'total_candidates': self.storage.count()
         }
 
@@ -41,31 +124,291 @@ class CandidateService:
         if not files_data:
             raise ValueError("No files provided")
 
-        # Process candidate data
-        processed_candidates = process_candidates(self.embedding_processor,
-                                                  files_data)
+        return self.add_candidates_from_stream(files_data)
 
-        if not processed_candidates:
-            raise ValueError("No valid candidates found in uploaded files")
+    def add_candidates_from_stream(
+        self,
+        candidates_data: Iterable[Dict[str, Any]],
+        batch_size: int = 32,
+    ) -> Dict[str, Any]:
+        """
+        Add candidates from a (lazy) stream of candidate data
 
-        # Add to storage
-        added_count = self.storage.add_candidates(processed_candidates)
+        The stream is consumed in bounded batches, each batch is deduplicated,
+        embedded and stored before the next one is extracted.
+        """
+        candidates_iter = iter(candidates_data)
+        added_count, duplicates, batch_count = 0, [], 0
+
+        while True:
+            batch = list(islice(candidates_iter, batch_size))
+            if not batch:
+                break
+            batch_added, batch_duplicates = self._process_and_store(batch)
+            added_count += batch_added
+            duplicates.extend(batch_duplicates)
+            batch_count += 1
+        self.refresh_projection()
+
+        if not added_count and not duplicates:
+            raise ValueError("No valid candidates found in uploaded files")
 
         return {
             'message': f'Successfully uploaded {added_count} candidates',
             'uploaded_count': added_count,
+            'duplicate_count': len(duplicates),
+            'duplicates': duplicates,
+            'batch_count': batch_count,
             'total_candidates': self.storage.count()
         }
 
-    def get_all_candidates(self) -> Dict[str, Any]:
-        """Get all candidates"""
-        candidates_info = self.storage.get_info_list()
-
+    def _deduplicator_params(self) -> Dict[str, Any]:
+        """Parameters the MinHash signatures depend on"""
+        deduplicator = self.storage.deduplicator
         return {
-            'total_candidates': self.storage.count(),
-            'candidates': candidates_info
+            'num_perm': deduplicator.num_perm,
+            'shingle_size': deduplicator.shingle_size,
+            'seed': deduplicator.seed,
+        }
+
+    def export_candidates(
+        self,
+        include_resumes: bool = False,
+        chunk_size: int = 10000,
+    ) -> Iterator[bytes]:
+        """
+        Export the pool as a columnar archive, streamed chunk by chunk
+
+        The candidates are snapshotted when called. Resume PDFs (base64) are
+        only included with include_resumes, the PDF files saved on disk stay
+        referenced by resume_name either way.
+        """
+        fingerprint, count, chunks = self.storage.snapshot_chunks(chunk_size)
+        manifest = {
+            'embedding_fingerprint': fingerprint,
+            'count': count,
+            'chunk_size': chunk_size,
+            'deduplicator': self._deduplicator_params(),
+            'exported_at': time.time(),
         }
 
+        def archive_chunks():
+            for candidates, embeddings in chunks:
+                records = []
+                for candidate in candidates:
+                    record = {
+                        field: getattr(candidate, field)
+                        for field in RECORD_FIELDS
+                    }
+                    if include_resumes:
+                        record['resume'] = candidate.resume \
+                            if isinstance(candidate.resume, str) else ''
+                    records.append(record)
+                signatures = None
+                if all(candidate.fingerprint is not None
+                       for candidate in candidates):
+                    signatures = np.stack([
+                        candidate.fingerprint.signature
+                        for candidate in candidates
+                    ]).astype(np.uint32)
+                yield PoolArchiveChunk(records, embeddings, signatures)
+
+        return write_pool_archive(manifest, archive_chunks())
+
+    def import_candidates(self, fileobj) -> Dict[str, Any]:
+        """
+        Import a columnar archive read from a stream, chunk by chunk
+
+        Embeddings are copied straight into the storage matrix when the
+        archive was made with the active model, otherwise the resume texts
+        are embedded again. Stored MinHash signatures are reused when the
+        deduplicator parameters match. Candidates duplicating stored ones
+        are skipped, candidates with a stored id replace them.
+
+        Batches of IMPORT_BATCH_SIZE records are validated before any of
+        them is stored. The import is not transactional: an archive broken
+        past its first batch raises PartialImportError, and the batches
+        stored before stay in the pool.
+        """
+        manifest, chunks = read_pool_archive(fileobj)
+        reuse_signatures = \
+            manifest.get('deduplicator') == self._deduplicator_params()
+        imported_count, record_count, reembedded_count = 0, 0, 0
+
+        def result(message: str) -> Dict[str, Any]:
+            return {
+                'message': message,
+                'imported_count': imported_count,
+                'skipped_count': record_count - imported_count,
+                'reembedded_count': reembedded_count,
+                'total_candidates': self.storage.count()
+            }
+
+        try:
+            for chunk in chunks:
+                for start in range(0, len(chunk.records),
+                                   self.IMPORT_BATCH_SIZE):
+                    end = start + self.IMPORT_BATCH_SIZE
+                    candidates = [
+                        self._imported_candidate(
+                            record, chunk.signatures[index]
+                            if reuse_signatures and
+                            chunk.signatures is not None else None)
+                        for index, record in enumerate(
+                            chunk.records[start:end], start)
+                    ]
+                    added_count, reembedded = self._store_imported(
+                        manifest.get('embedding_fingerprint'), candidates,
+                        chunk.embeddings[start:end])
+                    imported_count += added_count
+                    reembedded_count += reembedded
+                    record_count += len(candidates)
+        except Exception as e:
+            if not record_count:
+                raise
+            self.refresh_projection()
+            raise PartialImportError(e, result(
+                f'Import stopped after {imported_count} candidates')) from e
+
+        self.refresh_projection()
+        return result(f'Successfully imported {imported_count} candidates')
+
+    def _imported_candidate(self, record: Dict[str, Any],
+                            signature: np.ndarray = None) -> Candidate:
+        """Candidate of an archive record"""
+        if not isinstance(record, dict) or not record.get('id') or \
+                not isinstance(record.get('resume_text'), str):
+            raise ValueError("Archive records need an id and a resume_text")
+        candidate = Candidate.from_dict(
+            dict(record, name=record.get('name') or '',
+                 resume=record.get('resume') or '', embedding=None))
+        candidate.summary = candidate.summary or ''
+        candidate.resume_name = candidate.resume_name or ''
+        if candidate.resume:
+            # The file may not exist here, or was collected since the export
+            candidate.resume_name = resume_store.save(
+                base64.b64decode(candidate.resume))
+        if signature is not None and candidate.content_hash:
+            candidate.fingerprint = ResumeFingerprint(
+                candidate.content_hash, signature.astype(np.uint64))
+        else:
+            candidate.fingerprint = self.storage.deduplicator.fingerprint(
+                candidate.resume_text)
+            if candidate.fingerprint is not None:
+                candidate.content_hash = candidate.fingerprint.content_hash
+        if candidate.fields is None:
+            candidate.fields = self.field_extractor.extract(
+                candidate.resume_text, content_hash=candidate.content_hash)
+        return candidate
+
+    def _store_imported(self, fingerprint: str, candidates: List[Candidate],
+                        embeddings: np.ndarray):
+        """
+        Store imported candidates, embedding them again when the archive
+        model is not the active one
+        :return: (stored count, re-embedded count)
+        """
+        with self.model_registry.cutover_lock.read_locked():
+            embedding_processor = self.model_registry.active
+            reembedded = 0
+            if fingerprint != embedding_processor.fingerprint:
+                embeddings = embedding_processor.generate_embeddings(
+                    [candidate.resume_text for candidate in candidates])
+                reembedded = len(candidates)
+            elif embeddings.shape[1] != embedding_processor.dimension:
+                raise ValueError(
+                    f"Archive embeddings have {embeddings.shape[1]} "
+                    f"dimensions, the model has {embedding_processor.dimension}")
+            return self.storage.add_candidates(
+                candidates,
+                embedding_fingerprint=embedding_processor.fingerprint,
+                embeddings=embeddings,
+            ), reembedded
+
+    def refresh_projection(self, force: bool = False) -> bool:
+        """
+        Fit the reduction projection on the stored embeddings when the pool
+        reached the minimum size, or doubled since the last fit (or when
+        the active model dropped it), True when a projection was set
+
+        Only one fit runs at a time, concurrent calls return at once.
+        """
+        if self.reduction in (None, '', 'none'):
+            return False
+        count = self.storage.count()
+        if count < self.reduction_min_candidates:
+            return False
+        if not force and self.storage.projection is not None and \
+                count < 2 * self._projection_fitted_count:
+            return False
+        if not self._projection_lock.acquire(blocking=False):
+            return False
+
+        try:
+            embeddings, fingerprint = self.storage.sample_embeddings(
+                self.PROJECTION_SAMPLE_SIZE)
+            if embeddings.shape[1] <= self.reduced_dimensions:
+                return False
+            projection = create_projection(
+                self.reduction, self.reduced_dimensions).fit(embeddings)
+            if not self.storage.set_projection(projection, fingerprint):
+                return False
+            self._projection_fitted_count = count
+            print(f"Fitted {self.reduction} projection to "
+                  f"{self.reduced_dimensions} dimensions on {len(embeddings)} "
+                  f"of {count} candidates")
+            return True
+        finally:
+            self._projection_lock.release()
+
+    def get_all_candidates(
+        self,
+        limit: int = None,
+        cursor: int = 0,
+        include_embeddings: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Get all candidates, or one page of them when limit is given
+
+        With include_embeddings each record carries its stored embedding as a
+        float32 array (serialized by the wire format of the response).
+        """
+        if limit is None:
+            result = {
+                'total_candidates': self.storage.count(),
+                'candidates': self.storage.get_info_list()
+            }
+        else:
+            if limit <= 0:
+                raise ValueError("limit must be a positive integer")
+
+            page = self.storage.list_page(limit, cursor)
+            result = {
+                'total_candidates': self.storage.count(),
+                'candidates': page['candidates'],
+                'next_cursor': page['next_cursor']
+            }
+
+        if include_embeddings and result['candidates']:
+            candidates, embeddings, fingerprint = self.storage.get_many(
+                [preview['id'] for preview in result['candidates']])
+            embeddings = {
+                candidate.id: embedding
+                for candidate, embedding in zip(candidates, embeddings)
+            }
+            # Previews are cached by the storage, never mutate them. The
+            # vectors are read in one snapshot, candidates deleted since the
+            # page was listed are left out
+            result['candidates'] = [
+                dict(preview, embedding=embeddings[preview['id']])
+                for preview in result['candidates']
+                if preview['id'] in embeddings
+            ]
+            # Lets clients send the vectors back to /api/match as they are
+            result['embedding_fingerprint'] = fingerprint
+
+        return result
+
     def delete_candidate(self, candidate_id: str) -> Dict[str, Any]:
         """Delete specific candidate"""
         deleted_candidate = self.storage.delete_by_id(candidate_id)
@@ -82,6 +425,29 @@ class CandidateService:
             }
         }
 
+    def delete_candidates(self, candidate_ids: List[str]) -> Dict[str, Any]:
+        """Delete several candidates at once"""
+        if not candidate_ids:
+            raise ValueError("No candidate ids provided")
+
+        deleted_candidates = self.storage.delete_by_ids(candidate_ids)
+        deleted_ids = {candidate.id for candidate in deleted_candidates}
+
+        return {
+            'message':
+            f'Successfully deleted {len(deleted_candidates)} candidates',
+            'deleted_count': len(deleted_candidates),
+            'deleted_candidates': [{
+                'id': candidate.id,
+                'name': candidate.name
+            } for candidate in deleted_candidates],
+            'not_found': [
+                candidate_id for candidate_id in candidate_ids
+                if candidate_id not in deleted_ids
+            ],
+            'total_candidates': self.storage.count()
+        }
+
     def clear_all_candidates(self) -> Dict[str, Any]:
         """Clear all candidates"""
         count = self.storage.clear_all()
@@ -93,7 +459,7 @@ class CandidateService:
 
     def get_candidates_for_recommendation(self,
                                           use_stored: bool = True
-                                          ) -> List[Candidate]:
+                                          ) -> Sequence[Candidate]:
         """Get candidate list for recommendations"""
         if use_stored:
             candidates = self.storage.get_all()
@@ -0,0 +1,45 @@
+"""
+Memory diagnostics service
+"""
+from typing import Any, Callable, Dict
+from talentmatch.etc.memoryprofiler import MemoryProfiler
+
+
+class DiagnosticsService:
+    """
+    Memory reports of the server process
+
+    Next to the profiler report, components (name -> stats callable) report
+    the in-process caches and stores whose growth is bounded by
+    configuration, so their share of a growing RSS can be told apart.
+    """
+
+    def __init__(
+        self,
+        memory_profiler: MemoryProfiler,
+        components: Dict[str, Callable[[], Dict[str, Any]]] = None,
+    ):
+        self.memory_profiler = memory_profiler
+        self.components = components or {}
+
+    def memory_report(
+        self,
+        top_n: int = None,
+        objects: bool = False,
+        buffers: bool = False,
+        collect: bool = False,
+    ) -> Dict[str, Any]:
+        """Memory report, see MemoryProfiler.report"""
+        if top_n is not None and top_n < 0:
+            raise ValueError("top must not be negative")
+        report = self.memory_profiler.report(top_n=top_n,
+                                             objects=objects,
+                                             buffers=buffers,
+                                             collect=collect)
+        report['components'] = {}
+        for name, stats in self.components.items():
+            try:
+                report['components'][name] = stats()
+            except Exception as e:
+                report['components'][name] = {'error': str(e)}
+        return report
@@ -0,0 +1,194 @@
+"""
+Embedding model management service
+"""
+from typing import Any, Callable, Dict
+import threading
+import time
+from talentmatch.etc.modelregistry import EmbeddingModelRegistry
+from talentmatch.models.candidate import CandidateStorage
+
+
+class ModelService:
+    """
+    Embedding model registry and background re-embedding of the pool
+
+    A migration loads the target model next to the active one and re-embeds
+    the stored candidates in batches into a staged namespace of the storage.
+    The storage remembers which rows are done, so a cancelled or failed
+    migration started again resumes instead of starting over. Matches keep
+    reading the active embeddings meanwhile. Candidates added during the
+    migration are caught up, the last ones while ingest is paused by the
+    registry cut-over lock, then the namespace and the active model are
+    switched together. The previous model stays loaded for requests that
+    read the pool before the switch, it is unloaded when the next migration
+    starts.
+    """
+
+    def __init__(
+        self,
+        model_registry: EmbeddingModelRegistry,
+        candidate_storage: CandidateStorage,
+        batch_size: int = 64,
+        on_activate: Callable[[], Any] = None,
+    ):
+        self.model_registry = model_registry
+        self.candidate_storage = candidate_storage
+        self.batch_size = batch_size
+        # Called after a cut-over, e.g. to refit the embedding projection
+        self.on_activate = on_activate
+        self._migration: Dict[str, Any] = None
+        self._cancel = threading.Event()
+        self._thread: threading.Thread = None
+        self._lock = threading.Lock()
+
+    def list_models(self) -> Dict[str, Any]:
+        """Loaded models, the stored embeddings model and the migration"""
+        return {
+            'models': self.model_registry.describe(),
+            'active_fingerprint': self.model_registry.active.fingerprint,
+            'storage_fingerprint': self.candidate_storage.embedding_fingerprint,
+            'migration': self.migration_status(),
+        }
+
+    def start_migration(self, model_name: str) -> Dict[str, Any]:
+        """Start re-embedding the stored candidates with another model"""
+        if not model_name or not isinstance(model_name, str):
+            raise ValueError("model is required")
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                raise ValueError(
+                    f"A migration to {self._migration['model_name']} is "
+                    f"already running")
+            self._cancel.clear()
+            # Restarting an interrupted migration resumes from its checkpoint
+            previous = self._migration
+            checkpoint = previous['checkpoint'] if previous and \
+                previous['model_name'] == model_name and \
+                previous['state'] in ('cancelled', 'failed') else 0
+            self._migration = {
+                'model_name': model_name,
+                'fingerprint': None,
+                'state': 'loading',
+                'embedded': 0,
+                'checkpoint': checkpoint,
+                'error': None,
+                'started_at': time.time(),
+                'finished_at': None,
+            }
+            self._thread = threading.Thread(
+                target=self._run_migration,
+                args=(self._migration, ),
+                name='embedding-migration',
+                daemon=True,
+            )
+            self._thread.start()
+            return dict(self._migration)
+
+    def cancel_migration(self) -> Dict[str, Any]:
+        """
+        Stop the running migration after its current batch, the embeddings
+        computed so far are kept for a later resume
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                raise ValueError("No migration is running")
+            self._cancel.set()
+            return dict(self._migration)
+
+    def migration_status(self) -> Dict[str, Any]:
+        """State of the last migration, None when there was none"""
+        with self._lock:
+            if self._migration is None:
+                return None
+            status = dict(self._migration)
+        if status['state'] in ('running', 'cutover'):
+            progress = self.candidate_storage.namespace_progress()
+            status['embedded'] = progress['embedded']
+            status['total'] = progress['total']
+        return status
+
+    def _update(self, migration: Dict[str, Any], **changes):
+        """Update the migration status"""
+        with self._lock:
+            migration.update(changes)
+
+    def _run_migration(self, migration: Dict[str, Any]):
+        """Migration thread"""
+        try:
+            for model in self.model_registry.describe():
+                if not model['active'] and \
+                        model['model_name'] != migration['model_name']:
+                    self.model_registry.unload(model['fingerprint'])
+            processor = self.model_registry.load(migration['model_name'])
+            fingerprint = processor.fingerprint
+            self._update(migration, fingerprint=fingerprint)
+            if fingerprint == self.candidate_storage.embedding_fingerprint:
+                self.model_registry.activate(fingerprint)
+                self._update(migration, state='completed',
+                             finished_at=time.time())
+                return
+
+            resumed = self.candidate_storage.begin_namespace(fingerprint)
+            print(f"{'Resuming' if resumed else 'Starting'} embedding "
+                  f"migration to {fingerprint}")
+            self._update(migration, state='running')
+
+            # Checkpointed pass over the pool, then catch up with later adds
+            if not self._embed_pending(migration, processor,
+                                       migration['checkpoint']):
+                return
+            if not self._embed_pending(migration, processor):
+                return
+
+            self._update(migration, state='cutover')
+            with self.model_registry.cutover_lock.write_locked():
+                # Ingest is paused, only its last batches can be missing
+                if not self._embed_pending(migration, processor):
+                    return
+                if not self.candidate_storage.activate_namespace(fingerprint):
+                    raise RuntimeError("Staged embeddings are incomplete")
+                self.model_registry.activate(fingerprint)
+
+            print(f"Embedding migration to {fingerprint} completed")
+            self._update(migration, state='completed',
+                         finished_at=time.time())
+        except Exception as e:
+            print(f"Embedding migration failed: {e}")
+            self._update(migration, state='failed', error=str(e),
+                         finished_at=time.time())
+            return
+
+        if self.on_activate is not None:
+            try:
+                self.on_activate()
+            except Exception as e:
+                print(f"Embedding migration follow-up failed: {e}")
+
+    def _embed_pending(self, migration: Dict[str, Any], processor,
+                       after_sequence: int = 0) -> bool:
+        """
+        Embed the staged rows still missing after a sequence, in batches,
+        False when cancelled
+        """
+        fingerprint = processor.fingerprint
+        while True:
+            if self._cancel.is_set():
+                print(f"Embedding migration to {fingerprint} cancelled")
+                self._update(migration, state='cancelled',
+                             finished_at=time.time())
+                return False
+
+            _, texts, sequences = \
+                self.candidate_storage.pending_namespace_rows(
+                    fingerprint, self.batch_size, after_sequence)
+            if not sequences:
+                return True
+
+            self.candidate_storage.store_namespace_embeddings(
+                fingerprint, sequences, processor.generate_embeddings(texts))
+            after_sequence = sequences[-1]
+            with self._lock:
+                migration['embedded'] += len(sequences)
+                migration['checkpoint'] = max(migration['checkpoint'],
+                                              after_sequence)
@@ -1,9 +1,25 @@
 """
 Recommendation business logic service
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import Executor
+import asyncio
+import hashlib
+import json
+import uuid
+import numpy as np
 from talentmatch.etc.recommendengine import RecommendationEngine
-from talentmatch.utils import process_candidates
+from talentmatch.etc.candidatefilter import CandidateFilter
+from talentmatch.etc.candidatepipeline import CandidatePipeline
+from talentmatch.etc.deduplicator import Deduplicator
+from talentmatch.etc.fieldextractor import FieldExtractor
+from talentmatch.etc.matchcache import MatchResultCache
+from talentmatch.etc.embeddingprocessor import EmbeddingProcessor
+from talentmatch.etc.modelregistry import EmbeddingModelRegistry
+from talentmatch.etc.sectionexplainer import SectionExplainer
+from talentmatch.etc.shardindex import ShardUnavailableError
+from talentmatch.models.candidate import Candidate, CandidateStorage
+from talentmatch.utils import decode_embedding, process_candidates, split_duplicates
 
 
 class RecommendationService:
@@ -12,8 +28,27 @@ class RecommendationService:
     def __init__(
         self,
         recommendation_engine: RecommendationEngine,
+        candidate_storage: CandidateStorage = None,
+        field_extractor: FieldExtractor = None,
+        model_registry: EmbeddingModelRegistry = None,
+        pipeline_batch_size: int = 32,
+        pipeline_queue_size: int = 64,
+        section_explainer: SectionExplainer = None,
+        match_cache: MatchResultCache = None,
     ):
         self.recommendation_engine = recommendation_engine
+        # Stored candidates that match requests may reference by id
+        self.candidate_storage = candidate_storage
+        self.field_extractor = field_extractor or FieldExtractor()
+        # Without a registry the engine model embeds everything
+        self.model_registry = model_registry
+        # Submitted resumes are embedded and scored in batches of this size
+        self.pipeline_batch_size = pipeline_batch_size
+        self.pipeline_queue_size = pipeline_queue_size
+        # Local explanations of the returned candidates, None disables them
+        self.section_explainer = section_explainer
+        # Whole match results of repeated requests, None disables it
+        self.match_cache = match_cache
 
     # def get_recommendations(
     #     self,
@@ -61,55 +96,613 @@ class RecommendationService:
     #         'frontend' if not use_stored_candidates else 'stored'
     #     }
 
+    def match_candidates_cached(
+        self,
+        **match_arguments,
+    ) -> Tuple[Dict[str, Any], Optional[str], bool]:
+        """
+        match_candidates_realtime through the match cache
+        :return: (result, ETag or None without a cache, whether it was cached)
+
+        Identical requests computed concurrently are computed once.
+        """
+        if self.match_cache is None:
+            return self.match_candidates_realtime(**match_arguments), None, \
+                False
+        entry, cached = self.match_cache.get_or_compute(
+            self.match_cache_key(**match_arguments),
+            lambda: self.match_candidates_realtime(**match_arguments))
+        return entry.result, entry.etag, cached
+
+    async def match_candidates_cached_async(
+        self,
+        executor: Executor = None,
+        **match_arguments,
+    ) -> Tuple[Dict[str, Any], Optional[str], bool]:
+        """match_candidates_realtime_async through the match cache"""
+        if self.match_cache is None:
+            return await self.match_candidates_realtime_async(
+                **match_arguments, executor=executor), None, False
+        # Resumes may be megabytes, hash them off the event loop
+        key = await asyncio.get_running_loop().run_in_executor(
+            executor, lambda: self.match_cache_key(**match_arguments))
+        entry, cached = await self.match_cache.get_or_compute_async(
+            key, lambda: self.match_candidates_realtime_async(
+                **match_arguments, executor=executor))
+        return entry.result, entry.etag, cached
+
+    def match_cache_key(
+        self,
+        job_description: str,
+        candidates_data: List[Dict[str, Any]],
+        top_k: int = 5,
+        min_similarity: float = 0.5,
+        embedding_fingerprint: str = None,
+        retrieval: str = 'semantic',
+        use_stored_candidates: bool = False,
+        candidate_filter: CandidateFilter = None,
+        rerank: bool = False,
+        summaries: bool = True,
+        explain: bool = True,
+    ) -> str:
+        """
+        Cache key of a match request: hash of the job description, the
+        sorted content hashes of the candidates, the active model, the
+        matching options and, when stored candidates take part, the storage
+        revision
+        """
+        candidate_hashes = sorted(
+            self._candidate_hash(candidate)
+            for candidate in candidates_data or [])
+        uses_storage = use_stored_candidates or any(
+            'ref' in candidate for candidate in candidates_data or [])
+        key = json.dumps([
+            job_description,
+            candidate_hashes,
+            self._embedding_processor().fingerprint,
+            top_k,
+            min_similarity,
+            embedding_fingerprint,
+            retrieval,
+            use_stored_candidates,
+            sorted(map(repr, candidate_filter.conditions))
+            if candidate_filter is not None else None,
+            rerank,
+            summaries,
+            explain,
+            self.candidate_storage.revision
+            if uses_storage and self.candidate_storage is not None else None,
+        ], default=str)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _candidate_hash(candidate: Dict[str, Any]) -> str:
+        """Hash of a submitted candidate, raw resume bytes included"""
+        digest = hashlib.sha256()
+        for name in sorted(candidate):
+            value = candidate[name]
+            if isinstance(value, str):
+                value = value.encode('utf-8')
+            elif not isinstance(value, (bytes, bytearray)):
+                value = json.dumps(value, sort_keys=True,
+                                   default=str).encode('utf-8')
+            digest.update(f"{name}:{len(value)}:".encode('utf-8'))
+            digest.update(value)
+        return digest.hexdigest()
+
     def match_candidates_realtime(
         self,
         job_description: str,
         candidates_data: List[Dict[str, Any]],
         top_k: int = 5,
         min_similarity: float = 0.5,
+        embedding_fingerprint: str = None,
+        retrieval: str = 'semantic',
+        use_stored_candidates: bool = False,
+        candidate_filter: CandidateFilter = None,
+        rerank: bool = False,
+        summaries: bool = True,
+        explain: bool = True,
     ) -> Dict[str, Any]:
-        """Real-time candidate matching"""
-        if not job_description.strip():
-            raise ValueError("Job description is required")
+        """
+        Real-time candidate matching
 
-        if not candidates_data:
-            raise ValueError("Candidates data is required")
+        With use_stored_candidates the stored candidates are matched instead
+        of candidates_data, hybrid retrieval then prefilters them with the
+        storage BM25 index before any embedding is read. The candidate filter
+        is evaluated on metadata before any similarity is computed (and
+        before raw resumes are embedded). rerank re-orders the best
+        candidates with the cross-encoder before summarization. summaries
+        asks for LLM summaries, explain for the resume sections supporting
+        each match ('explanations').
+        """
+        self._validate_match_request(job_description, candidates_data,
+                                     use_stored_candidates)
 
-        # print(candidates_data)
-        # input()
+        prepared = self._prepare_candidates(job_description, candidates_data,
+                                            top_k, embedding_fingerprint,
+                                            retrieval, use_stored_candidates,
+                                            candidate_filter)
 
-        print(
-            f"Real-time matching: job description length={len(job_description)}, candidate count={len(candidates_data)}"
+        if not prepared['candidates']:
+            return self._empty_match_result(prepared['filtered_count'])
+
+        # Get recommendations
+        recommendations = self.recommendation_engine.find_top_candidates(
+            job_description=job_description,
+            candidates=prepared['candidates'],
+            top_k=top_k,
+            min_similarity=min_similarity,
+            retrieval=retrieval,
+            lexical_scores=prepared['lexical_scores'],
+            rerank=rerank,
+            embedding_processor=prepared['embedding_processor'],
+            job_embedding=prepared['job_embedding'],
+            summarize=summaries,
         )
+        if explain:
+            self._explain(job_description, recommendations,
+                          prepared['embedding_processor'])
+
+        return self._match_result(job_description, prepared, recommendations,
+                                  use_stored_candidates)
+
+    async def match_candidates_realtime_async(
+        self,
+        job_description: str,
+        candidates_data: List[Dict[str, Any]],
+        top_k: int = 5,
+        min_similarity: float = 0.5,
+        embedding_fingerprint: str = None,
+        retrieval: str = 'semantic',
+        use_stored_candidates: bool = False,
+        candidate_filter: CandidateFilter = None,
+        rerank: bool = False,
+        summaries: bool = True,
+        explain: bool = True,
+        executor: Executor = None,
+    ) -> Dict[str, Any]:
+        """Real-time candidate matching for the async serving mode"""
+        self._validate_match_request(job_description, candidates_data,
+                                     use_stored_candidates)
 
-        # Process candidate data
-        processed_candidates = process_candidates(
-            self.recommendation_engine.embedding_processor,
+        # PDF parsing, file writes and embeddings run in the executor
+        loop = asyncio.get_running_loop()
+        prepared = await loop.run_in_executor(
+            executor,
+            self._prepare_candidates,
+            job_description,
             candidates_data,
+            top_k,
+            embedding_fingerprint,
+            retrieval,
+            use_stored_candidates,
+            candidate_filter,
         )
 
-        if not processed_candidates:
-            return {
-                'message': 'No valid candidates found in the provided data',
-                'top_candidates': [],
-                'total_candidates': 0,
-                'processing_time': 'real-time',
-                'data_source': 'frontend'
-            }
+        if not prepared['candidates']:
+            return self._empty_match_result(prepared['filtered_count'])
 
-        # Get recommendations
-        recommendations = self.recommendation_engine.find_top_candidates(
+        recommendations = await self.recommendation_engine.find_top_candidates_async(
             job_description=job_description,
-            candidates=processed_candidates,
+            candidates=prepared['candidates'],
             top_k=top_k,
             min_similarity=min_similarity,
+            retrieval=retrieval,
+            lexical_scores=prepared['lexical_scores'],
+            rerank=rerank,
+            executor=executor,
+            embedding_processor=prepared['embedding_processor'],
+            job_embedding=prepared['job_embedding'],
+            summarize=summaries,
+        )
+        if explain:
+            await loop.run_in_executor(executor, self._explain,
+                                       job_description, recommendations,
+                                       prepared['embedding_processor'])
+
+        return self._match_result(job_description, prepared, recommendations,
+                                  use_stored_candidates)
+
+    def _explain(
+        self,
+        job_description: str,
+        recommendations: List[Dict[str, Any]],
+        embedding_processor: EmbeddingProcessor,
+    ):
+        """Add the supporting resume sections of each recommendation"""
+        if self.section_explainer is None:
+            return
+        explanations = self.section_explainer.explain(
+            job_description, recommendations, embedding_processor)
+        for recommendation, explanation in zip(recommendations, explanations):
+            recommendation['explanations'] = explanation
+
+    def _validate_match_request(
+        self,
+        job_description: str,
+        candidates_data: List[Dict[str, Any]],
+        use_stored_candidates: bool = False,
+    ):
+        """Validate a real-time matching request"""
+        if not job_description.strip():
+            raise ValueError("Job description is required")
+
+        if use_stored_candidates:
+            if self.candidate_storage is None or \
+                    not self.candidate_storage.count():
+                raise ValueError(
+                    "No candidates available for recommendation. Please add candidates first."
+                )
+            return
+
+        if not candidates_data:
+            raise ValueError("Candidates data is required")
+
+        print(
+            f"Real-time matching: job description length={len(job_description)}, candidate count={len(candidates_data)}"
         )
 
+    def _prepare_candidates(
+        self,
+        job_description: str,
+        candidates_data: List[Dict[str, Any]],
+        top_k: int,
+        embedding_fingerprint: str = None,
+        retrieval: str = 'semantic',
+        use_stored_candidates: bool = False,
+        candidate_filter: CandidateFilter = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the matching input of a request
+        :return: {'candidates', 'candidate_count', 'duplicates',
+                  'lexical_scores', 'filtered_count', 'embedding_processor',
+                  'job_embedding'}
+
+        The embedding processor is the model of the candidate embeddings, it
+        must also embed the job description. The job embedding is set when
+        preparing already computed it. candidate_count counts the candidates
+        matched, of which 'candidates' may only hold those the ranking can
+        return.
+        """
+        if use_stored_candidates:
+            candidates, candidate_count, lexical_scores, filtered_count, \
+                embedding_processor, job_embedding = \
+                self._prepare_stored_candidates(
+                    job_description, top_k, retrieval, candidate_filter)
+            duplicates = []
+        else:
+            candidates, candidate_count, duplicates, filtered_count, \
+                embedding_processor, job_embedding = self._process_candidates(
+                    candidates_data, embedding_fingerprint, candidate_filter,
+                    job_description, top_k, retrieval)
+            lexical_scores = None
+
+        return {
+            'candidates': candidates,
+            'candidate_count': candidate_count,
+            'duplicates': duplicates,
+            'lexical_scores': lexical_scores,
+            'filtered_count': filtered_count,
+            'embedding_processor': embedding_processor,
+            'job_embedding': job_embedding,
+        }
+
+    def _embedding_processor(self,
+                             fingerprint: str = None) -> EmbeddingProcessor:
+        """Processor of a model fingerprint, the active model when None"""
+        if self.model_registry is None:
+            return self.recommendation_engine.embedding_processor
+        if fingerprint is None:
+            return self.model_registry.active
+        return self.model_registry.get(fingerprint)
+
+    def _process_candidates(
+        self,
+        candidates_data: List[Dict[str, Any]],
+        embedding_fingerprint: str = None,
+        candidate_filter: CandidateFilter = None,
+        job_description: str = None,
+        top_k: int = None,
+        retrieval: str = 'semantic',
+    ):
+        """
+        Process candidate data, dropping resumes submitted more than once and
+        candidates rejected by the filter
+        :return: (candidates, candidate count, duplicates, filtered out count,
+                  embedding processor, job embedding or None)
+
+        Candidates may be given three ways, only raw resumes are parsed and
+        embedded:
+        - {'ref': <stored candidate id>}
+        - {'id', 'name', 'embedding', 'resume_text'} with an embedding computed
+          by the same model, tagged by 'embedding_fingerprint' on the candidate
+          or the request
+        - {'id', 'name', 'resume', 'info'} raw resume data
+
+        Stored candidates are read first, their model then embeds the rest.
+
+        With a job description and semantic retrieval, raw resumes stream
+        through a CandidatePipeline scored against the job embedding, only
+        those the ranking can return are kept (and get their PDF written).
+        Hybrid retrieval needs every resume text for BM25 and processes them
+        all at once.
+        """
+        stored, fingerprint = self._stored_candidates([
+            candidate['ref'] for candidate in candidates_data
+            if 'ref' in candidate
+        ])
+        embedding_processor = self._embedding_processor(fingerprint)
+        ready_candidates, raw_candidates = [], []
+
+        for candidate in candidates_data:
+            if 'ref' in candidate:
+                ready_candidates.append(stored[candidate['ref']])
+            elif candidate.get('embedding') is not None:
+                fingerprint = candidate.get('embedding_fingerprint',
+                                            embedding_fingerprint)
+                if fingerprint != embedding_processor.fingerprint:
+                    raise ValueError(
+                        f"Embedding fingerprint {fingerprint!r} of candidate "
+                        f"{candidate.get('id')} does not match the loaded "
+                        f"model {embedding_processor.fingerprint!r}")
+                resume_text = candidate.get('resume_text', '')
+                ready_candidates.append({
+                    'id': candidate.get('id', str(uuid.uuid4())),
+                    'name': candidate.get('name', ''),
+                    'resume_text': resume_text,
+                    'embedding': decode_embedding(
+                        candidate['embedding'],
+                        embedding_processor.dimension,
+                    ),
+                    'resume': candidate.get('resume', ''),
+                    'resume_name': candidate.get('resume_name', ''),
+                    'fields': self.field_extractor.extract(resume_text)
+                    if resume_text else None,
+                    'location': candidate.get('location') or '',
+                    'tags': list(candidate.get('tags') or []),
+                })
+            else:
+                raw_candidates.append(candidate)
+
+        filtered_count = 0
+        if candidate_filter is not None and ready_candidates:
+            mask = candidate_filter.mask_candidates(ready_candidates)
+            filtered_count += int(len(mask) - mask.sum())
+            ready_candidates = [
+                candidate
+                for candidate, keep in zip(ready_candidates, mask) if keep
+            ]
+
+        processed_candidates, duplicates = [], []
+        job_embedding = None
+        candidate_count = len(ready_candidates)
+        if raw_candidates and job_description is not None and \
+                retrieval == 'semantic':
+            job_embedding = embedding_processor.generate_embedding(
+                job_description)
+            pipeline = CandidatePipeline(
+                embedding_processor,
+                deduplicator=Deduplicator(),
+                field_extractor=self.field_extractor,
+                candidate_filter=candidate_filter,
+                batch_size=self.pipeline_batch_size,
+                queue_size=self.pipeline_queue_size,
+            )
+            processed_candidates = pipeline.top_candidates(
+                raw_candidates, job_embedding,
+                self.recommendation_engine.ranking_size(top_k))
+            duplicates = pipeline.duplicates
+            filtered_count += pipeline.filtered_count
+            candidate_count += pipeline.processed_count
+        elif raw_candidates:
+            processed_candidates, duplicates = split_duplicates(
+                process_candidates(
+                    embedding_processor,
+                    raw_candidates,
+                    deduplicator=Deduplicator(),
+                    field_extractor=self.field_extractor,
+                    candidate_filter=candidate_filter,
+                ))
+            # Rejected candidates are left out of the processed list
+            filtered_count += len(raw_candidates) - \
+                len(processed_candidates) - len(duplicates)
+            candidate_count += len(processed_candidates)
+
+        return ready_candidates + processed_candidates, candidate_count, \
+            duplicates, filtered_count, embedding_processor, job_embedding
+
+    def _prepare_stored_candidates(
+        self,
+        job_description: str,
+        top_k: int,
+        retrieval: str = 'semantic',
+        candidate_filter: CandidateFilter = None,
+    ):
+        """
+        Build matching input from the stored candidates
+        :return: (candidates, matched count, lexical scores by id or None,
+                  filtered out count, embedding processor, job embedding or
+                  None)
+
+        The filter is evaluated on the storage metadata columns first, in
+        hybrid mode only the BM25 shortlist of the remaining candidates is
+        read, unless it has fewer than top_k matches. Otherwise a sharded
+        index returns the candidates the ranking keeps, or when the storage
+        keeps reduced embeddings a large pool is shortlisted by them; only
+        the full embeddings of those candidates are read for the ranking.
+        The matched count is the filtered pool, not the shortlist.
+        """
+        storage = self.candidate_storage
+        allowed_ids = storage.find_ids(candidate_filter)
+        filtered_count = storage.count() - len(allowed_ids) \
+            if candidate_filter is not None else 0
+
+        candidate_ids, lexical_scores = allowed_ids, None
+        if retrieval == 'hybrid':
+            shortlist_size = self.recommendation_engine.hybrid_shortlist_size(
+                top_k)
+            if candidate_filter is None:
+                lexical_matches = storage.search_lexical(
+                    job_description, shortlist_size)
+            else:
+                allowed = set(allowed_ids)
+                lexical_matches = [
+                    match for match in storage.search_lexical(job_description)
+                    if match[0] in allowed
+                ][:shortlist_size]
+            lexical_scores = dict(lexical_matches)
+            if len(lexical_scores) >= top_k:
+                candidate_ids = list(lexical_scores)
+
+        job_embedding, reduced_fingerprint = None, None
+        if candidate_ids is allowed_ids:
+            shortlist = self._sharded_shortlist(
+                job_description, top_k, allowed_ids,
+                all_live=candidate_filter is None)
+            if shortlist is None:
+                shortlist = self._reduced_shortlist(
+                    job_description, top_k, allowed_ids,
+                    all_live=candidate_filter is None)
+            if shortlist is not None:
+                candidate_ids, job_embedding, reduced_fingerprint = shortlist
+
+        candidates, embeddings, fingerprint = storage.get_many(candidate_ids)
+        if fingerprint != reduced_fingerprint:
+            # The active model changed in between, embed the job again
+            job_embedding = None
+        return [
+            self._matching_input(candidate, embedding)
+            for candidate, embedding in zip(candidates, embeddings)
+        ], len(allowed_ids), lexical_scores, filtered_count, \
+            self._embedding_processor(fingerprint), job_embedding
+
+    def _sharded_shortlist(
+        self,
+        job_description: str,
+        top_k: int,
+        candidate_ids: List[str],
+        all_live: bool = False,
+    ):
+        """
+        Score stored candidates on the shards (all live candidates with
+        all_live), keeping the ones the ranking can return
+        :return: (ids best first, job embedding, fingerprint), None without
+                 a sharded index or when the shards fail
+        """
+        storage = self.candidate_storage
+        if storage.shard_index is None:
+            return None
+        limit = self.recommendation_engine.ranking_size(top_k)
+        if len(candidate_ids) <= limit:
+            return None
+
+        fingerprint = storage.embedding_fingerprint
+        embedding_processor = self._embedding_processor(fingerprint)
+        job_embedding = embedding_processor.generate_embedding(job_description)
+        try:
+            matches = storage.shard_index.top_k(
+                fingerprint, job_embedding, limit,
+                None if all_live else candidate_ids)
+        except (ShardUnavailableError, ValueError) as e:
+            # The storage still holds every embedding
+            print(f"Sharded scoring failed, scoring in process: {e}")
+            return None
+        return [candidate_id for candidate_id, _ in matches], job_embedding, \
+            fingerprint
+
+    def _reduced_shortlist(
+        self,
+        job_description: str,
+        top_k: int,
+        candidate_ids: List[str],
+        all_live: bool = False,
+    ):
+        """
+        Shortlist stored candidates by their reduced embeddings (all live
+        candidates with all_live)
+        :return: (shortlisted ids in storage order, job embedding,
+                  fingerprint), None when the candidates fit in the shortlist
+                  or the storage keeps no reduced embeddings
+        """
+        limit = self.recommendation_engine.reduced_shortlist_size(top_k)
+        if len(candidate_ids) <= limit:
+            return None
+        reduced = self.candidate_storage.get_reduced(
+            None if all_live else candidate_ids)
+        if reduced is None:
+            return None
+
+        ids, reduced_embeddings, projection, fingerprint = reduced
+        embedding_processor = self._embedding_processor(fingerprint)
+        job_embedding = embedding_processor.generate_embedding(job_description)
+        selected = embedding_processor.shortlist_reduced(
+            job_embedding, reduced_embeddings, projection, limit)
+        return [ids[index] for index in np.sort(selected)], job_embedding, \
+            fingerprint
+
+    def _stored_candidates(self, candidate_ids: List[str]):
+        """
+        Build matching inputs from stored candidates, reusing their embeddings
+        :return: (matching input by id, fingerprint of their model or None)
+        """
+        if not candidate_ids:
+            return {}, None
+        if self.candidate_storage is None:
+            raise ValueError(f"Stored candidate {candidate_ids[0]} not found")
+
+        candidates, embeddings, fingerprint = \
+            self.candidate_storage.get_many(candidate_ids)
+        stored = {
+            candidate.id: self._matching_input(candidate, embedding)
+            for candidate, embedding in zip(candidates, embeddings)
+        }
+        for candidate_id in candidate_ids:
+            if candidate_id not in stored:
+                raise ValueError(f"Stored candidate {candidate_id} not found")
+        return stored, fingerprint
+
+    def _matching_input(self, candidate: Candidate,
+                        embedding: np.ndarray) -> Dict[str, Any]:
+        """Matching input of a stored candidate"""
+        return {
+            'id': candidate.id,
+            'name': candidate.name,
+            'resume_text': candidate.resume_text,
+            'embedding': embedding,
+            'resume': candidate.resume,
+            'resume_name': candidate.resume_name,
+            'fields': candidate.fields,
+            'location': candidate.location,
+            'tags': candidate.tags,
+        }
+
+    def _empty_match_result(self, filtered_count: int = 0) -> Dict[str, Any]:
+        """Matching result when no candidate could be processed"""
+        return {
+            'message': 'No valid candidates found in the provided data',
+            'top_candidates': [],
+            'total_candidates': 0,
+            'filtered_count': filtered_count,
+            'processing_time': 'real-time',
+            'data_source': 'frontend'
+        }
+
+    def _match_result(
+        self,
+        job_description: str,
+        prepared: Dict[str, Any],
+        recommendations: List[Dict[str, Any]],
+        use_stored_candidates: bool = False,
+    ) -> Dict[str, Any]:
+        """Build the real-time matching result"""
         return {
             'job_description': job_description,
-            'total_candidates': len(processed_candidates),
+            'total_candidates': prepared['candidate_count'],
             'recommendations_count': len(recommendations),
+            'duplicates': prepared['duplicates'],
+            'filtered_count': prepared['filtered_count'],
             'top_candidates': recommendations,
             'processing_time': 'real-time',
-            'data_source': 'frontend'
+            'data_source': 'stored' if use_stored_candidates else 'frontend'
         }
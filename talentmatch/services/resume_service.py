@@ -0,0 +1,81 @@
+"""
+Resume PDF serving and garbage collection service
+"""
+from typing import Any, Dict, Optional
+from pathlib import Path
+import threading
+from talentmatch.etc.resumestore import ResumeFileStore
+from talentmatch.models.candidate import CandidateStorage
+
+
+class ResumeService:
+    """
+    Resume PDFs of candidates and matches
+
+    A background thread removes, every gc_interval_seconds, the PDFs no
+    stored candidate references once unused for retention_seconds (PDFs of
+    submitted resumes are only referenced by match responses).
+    """
+
+    def __init__(
+        self,
+        resume_store: ResumeFileStore,
+        candidate_storage: CandidateStorage,
+        retention_seconds: float = 7 * 24 * 3600,
+        gc_interval_seconds: float = 3600,
+    ):
+        self.resume_store = resume_store
+        self.candidate_storage = candidate_storage
+        self.retention_seconds = retention_seconds
+        self.gc_interval_seconds = gc_interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+        self._gc_lock = threading.Lock()
+
+    def start(self):
+        """Start the background garbage collection (unless disabled)"""
+        if self.gc_interval_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run,
+                                        name='resume-gc',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background garbage collection"""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.gc_interval_seconds):
+            try:
+                self.collect_garbage()
+            except Exception as e:
+                print(f"Resume garbage collection failed: {e}")
+
+    def resume_path(self, name: str) -> Optional[Path]:
+        """Path of a resume PDF, None when there is none by that name"""
+        return self.resume_store.path(name)
+
+    def collect_garbage(self) -> Dict[str, Any]:
+        """Remove the unreferenced resume PDFs past the retention window"""
+        with self._gc_lock:
+            referenced = {
+                candidate.resume_name
+                for candidate in self.candidate_storage.get_all()
+                if candidate.resume_name
+            }
+            result = self.resume_store.collect(referenced,
+                                               self.retention_seconds)
+        if result['removed_files']:
+            print(f"Resume GC removed {result['removed_files']} files, "
+                  f"{result['reclaimed_bytes'] / 1024 / 1024:.1f} MB "
+                  f"reclaimed in {result['seconds']}s")
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Garbage collection settings and counters"""
+        return {
+            'retention_seconds': self.retention_seconds,
+            'gc_interval_seconds': self.gc_interval_seconds,
+            **self.resume_store.stats(),
+        }
@@ -0,0 +1,293 @@
+"""
+Soak test of a running server: drive /api/match for hours and fail when the
+server RSS grows more than a threshold
+
+    python -m talentmatch.soak --invitation-code CODE --duration 14400 \
+        --max-rss-growth-mb 200 [--resumes resumes/] [--report soak.jsonl]
+
+The server RSS is read from /api/admin/memory (MEMORY_DIAGNOSTICS_ENABLED),
+or from /proc with --pid when the soak test runs on the server host. Growth
+is measured from the end of the warmup, once caches and lazily loaded models
+have settled; bounded caches (MATCH_CACHE_MAX_BYTES, ...) fill during it.
+"""
+from pathlib import Path
+import argparse
+import base64
+import json
+import random
+import sys
+import threading
+import time
+import requests
+
+DEFAULT_URL = 'http://localhost:7860'
+MB = 1024 * 1024
+
+_SKILLS = ('python', 'java', 'sql', 'docker', 'kubernetes', 'aws', 'react',
+           'typescript', 'spark', 'pytorch', 'excel', 'finance', 'marketing',
+           'sales', 'golang', 'terraform', 'airflow', 'tableau', 'figma')
+_TITLES = ('backend engineer', 'data scientist', 'frontend developer',
+           'devops engineer', 'sales manager', 'product designer',
+           'data engineer', 'financial analyst', 'machine learning engineer')
+
+
+def synthetic_resume(rng: random.Random) -> str:
+    """Plain text resume of a random candidate"""
+    skills = rng.sample(_SKILLS, 5)
+    return '\n'.join([
+        f"{rng.choice(_TITLES).title()} with {rng.randint(1, 15)} years of "
+        f"experience",
+        f"Skills: {', '.join(skills)}",
+        f"Built and operated {skills[0]} and {skills[1]} systems for "
+        f"{rng.randint(2, 50)} teams",
+        f"Led a migration to {skills[2]}, cutting costs by "
+        f"{rng.randint(5, 60)}%",
+        f"Education: {rng.choice(('BSc', 'MSc', 'PhD'))} in "
+        f"{rng.choice(('Computer Science', 'Economics', 'Design'))}",
+    ])
+
+
+def synthetic_job(rng: random.Random) -> str:
+    """Job description of a random role"""
+    return (f"We are hiring a {rng.choice(_TITLES)}.\n"
+            f"Required: {', '.join(rng.sample(_SKILLS, 3))}.\n"
+            f"At least {rng.randint(1, 10)} years of experience.")
+
+
+def load_candidates(directory: str = None, count: int = 20,
+                    seed: int = 0):
+    """Candidates of /api/match payloads, PDF/TXT resumes of a directory or synthetic ones"""
+    if not directory:
+        rng = random.Random(seed)
+        return [{
+            'id': f'soak-{index}',
+            'name': f'Candidate {index}',
+            'info': synthetic_resume(rng),
+        } for index in range(count)]
+
+    candidates = []
+    for path in sorted(Path(directory).rglob('*')):
+        if path.suffix.lower() == '.pdf':
+            candidates.append({
+                'id': path.stem,
+                'name': path.stem,
+                'resume': base64.b64encode(path.read_bytes()).decode('ascii'),
+            })
+        elif path.suffix.lower() == '.txt':
+            candidates.append({
+                'id': path.stem,
+                'name': path.stem,
+                'info': path.read_text(errors='replace'),
+            })
+    if not candidates:
+        raise RuntimeError(f"No PDF/TXT resumes in {directory}")
+    return candidates
+
+
+def process_rss(pid: int) -> int:
+    """Resident set size of a local process"""
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError(f"No VmRSS for process {pid}")
+
+
+class SoakTest:
+    """
+    Worker threads post /api/match until the deadline while the server
+    RSS is sampled every interval
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.url = args.url.rstrip('/')
+        self.candidates = load_candidates(args.resumes, args.candidates,
+                                          args.seed)
+        self.deadline = None
+        self.requests = 0
+        self.errors = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def memory(self, **params) -> dict:
+        """Server memory report (RSS only with --pid)"""
+        if self.args.pid:
+            return {'rss_bytes': process_rss(self.args.pid)}
+        response = requests.get(
+            f'{self.url}/api/admin/memory',
+            params=params,
+            headers={'X-Invitation-Code': self.args.invitation_code},
+            timeout=300,
+        )
+        if response.status_code == 404:
+            raise RuntimeError(
+                "/api/admin/memory not found, start the server with "
+                "MEMORY_DIAGNOSTICS_ENABLED=true or pass --pid")
+        response.raise_for_status()
+        return response.json()
+
+    def _worker(self, seed: int):
+        rng = random.Random(seed)
+        session = requests.Session()
+        jobs = [synthetic_job(rng) for _ in range(self.args.distinct_jobs)]
+        while not self._stop.is_set() and time.time() < self.deadline:
+            payload = {
+                'invitation_code': self.args.invitation_code,
+                # Distinct jobs miss the match cache, repeated ones hit it
+                'job_description': rng.choice(jobs) if jobs else
+                synthetic_job(rng),
+                'candidates': rng.sample(
+                    self.candidates,
+                    min(self.args.batch, len(self.candidates))),
+                'top_k': 5,
+            }
+            if self.args.no_summaries:
+                payload['summaries'] = False
+            try:
+                response = session.post(f'{self.url}/api/match',
+                                        json=payload,
+                                        timeout=self.args.timeout)
+                failed = not response.ok
+                error = f"HTTP {response.status_code}" if failed else None
+            except requests.RequestException as e:
+                failed, error = True, str(e)
+            with self._lock:
+                self.requests += 1
+                if failed:
+                    self.errors += 1
+                    self.last_error = error
+
+    def run(self) -> int:
+        args = self.args
+        self.memory(top=0)
+        started = time.time()
+        self.deadline = started + args.duration
+        workers = [
+            threading.Thread(target=self._worker,
+                             args=(args.seed + index,),
+                             daemon=True)
+            for index in range(args.concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+
+        report = open(args.report, 'a') if args.report else None
+        baseline_rss, max_growth, rss = None, 0, None
+        warmup_done = started + args.warmup
+        try:
+            while time.time() < self.deadline:
+                self._stop.wait(min(args.interval,
+                                    max(self.deadline - time.time(), 0)))
+                if baseline_rss is None and time.time() >= warmup_done:
+                    # Allocation and object diffs of the final report start here
+                    memory = self.memory(top=1, objects=1, collect=1)
+                    baseline_rss = memory['rss_bytes']
+                else:
+                    memory = self.memory(top=0, collect=1)
+                rss = memory['rss_bytes']
+                elapsed = time.time() - started
+                growth = rss - baseline_rss if baseline_rss is not None \
+                    else None
+                if growth is not None:
+                    max_growth = max(max_growth, growth)
+                with self._lock:
+                    sample = {
+                        'elapsed_seconds': round(elapsed, 1),
+                        'rss_mb': round(rss / MB, 1),
+                        'growth_mb': round(growth / MB, 1)
+                        if growth is not None else None,
+                        'requests': self.requests,
+                        'errors': self.errors,
+                    }
+                print(json.dumps(sample), flush=True)
+                if report:
+                    report.write(json.dumps(sample) + '\n')
+                    report.flush()
+        except KeyboardInterrupt:
+            print("Interrupted", file=sys.stderr)
+        finally:
+            self._stop.set()
+            for worker in workers:
+                worker.join()
+            if report:
+                report.close()
+
+        if baseline_rss is None:
+            print("Error: the test ended before the warmup, nothing measured",
+                  file=sys.stderr)
+            return 1
+        if self.requests and self.errors == self.requests:
+            print(f"Error: every request failed, last error: "
+                  f"{self.last_error}", file=sys.stderr)
+            return 1
+
+        # Growth of the last sample, peaks of a sawtooth are not a leak
+        growth = rss - baseline_rss
+        print(f"{self.requests} requests, {self.errors} errors in "
+              f"{time.time() - started:.0f}s. RSS {rss / MB:.1f} MB, growth "
+              f"{growth / MB:.1f} MB since the warmup (max "
+              f"{max_growth / MB:.1f} MB, threshold "
+              f"{args.max_rss_growth_mb} MB)")
+        if growth <= args.max_rss_growth_mb * MB:
+            return 0
+
+        print("FAILED: RSS growth over the threshold", file=sys.stderr)
+        if not args.pid:
+            memory = self.memory(top=args.top, objects=1, buffers=1)
+            print(json.dumps({
+                key: memory.get(key)
+                for key in ('tracemalloc', 'objects', 'buffers', 'components')
+            }, indent=2))
+        return 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m talentmatch.soak',
+        description='Drive /api/match and fail on server RSS growth')
+    parser.add_argument('--url', default=DEFAULT_URL,
+                        help=f'server URL (default {DEFAULT_URL})')
+    parser.add_argument('--invitation-code', default='',
+                        help='invitation code of the server')
+    parser.add_argument('--duration', type=float, default=3600,
+                        help='test duration in seconds (default 3600)')
+    parser.add_argument('--warmup', type=float, default=300,
+                        help='seconds before the RSS baseline (default 300)')
+    parser.add_argument('--interval', type=float, default=60,
+                        help='seconds between RSS samples (default 60)')
+    parser.add_argument('--max-rss-growth-mb', type=float, default=100,
+                        help='RSS growth failing the test (default 100)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='concurrent requests (default 4)')
+    parser.add_argument('--resumes',
+                        help='directory of PDF/TXT resumes (default synthetic)')
+    parser.add_argument('--candidates', type=int, default=20,
+                        help='synthetic candidates (default 20)')
+    parser.add_argument('--batch', type=int, default=10,
+                        help='candidates per request (default 10)')
+    parser.add_argument('--distinct-jobs', type=int, default=0,
+                        help='jobs per worker to repeat, 0 for a new job on '
+                        'every request (default 0)')
+    parser.add_argument('--no-summaries', action='store_true',
+                        help='skip the LLM summaries')
+    parser.add_argument('--timeout', type=float, default=300,
+                        help='request timeout in seconds (default 300)')
+    parser.add_argument('--pid', type=int,
+                        help='read the RSS of this local process instead')
+    parser.add_argument('--top', type=int, default=25,
+                        help='allocation sites reported on failure')
+    parser.add_argument('--report', help='append the samples to this file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        return SoakTest(args).run()
+    except (requests.RequestException, RuntimeError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
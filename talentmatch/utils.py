@@ -4,9 +4,15 @@ from werkzeug.datastructures import FileStorage
 from io import BytesIO
 from pypdf import PdfReader
 import base64
+import hashlib
+import numpy as np
 from typing import List, Dict
 import uuid
 from talentmatch import STATIC_DIR
+from talentmatch.etc.resumestore import ResumeFileStore
+
+# Resume PDFs, one store so saves and garbage collection see each other
+resume_store = ResumeFileStore(STATIC_DIR / 'pdf')
 
 
 def escape_latex_chars(text: str) -> str:
@@ -109,6 +115,41 @@ def clean_latex_response(latex_response: str) -> str:
     return latex_content.strip()
 
 
+def clean_text(text: str) -> str:
+    """Clean text, remove special characters and extra spaces"""
+    # Remove HTML tags
+    text = re.sub(r'<[^>]+>', '', text)
+    # Remove special characters, keep letters, numbers, spaces and basic punctuation
+    text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)]', '', text)
+    # Remove extra spaces
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def tokenize_text(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for lexical search, after the same
+    cleaning as the embedded text. Dotted and hyphenated terms (node.js,
+    ci-cd) stay whole.
+    """
+    return re.findall(r'\w+(?:[\.\-]\w+)*', clean_text(text).lower())
+
+
+def normalize_resume_text(text: str) -> str:
+    """Normalize resume text for content comparison (case, punctuation, spaces)"""
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def resume_content_hash(text: str, normalized: bool = False) -> str:
+    """Hash the normalized resume text"""
+    if not normalized:
+        text = normalize_resume_text(text)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
 def allowed_file(filename: str, allowed_extensions: set) -> bool:
     """Check if file extension is allowed"""
     return '.' in filename and \
@@ -175,6 +216,20 @@ def extract_text_from_pdf_base64(pdf_base64: str) -> str:
 
     try:
         pdf_bytes = base64.b64decode(pdf_base64)
+    except Exception as e:
+        print(f"Error decoding base64 PDF: {e}")
+        return ""
+
+    return extract_text_from_pdf_bytes(pdf_bytes)
+
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+    """
+    Extract text from raw PDF bytes
+    :param pdf_bytes: PDF file content
+    :return: Extracted text content
+    """
+    try:
         pdf_reader = PdfReader(BytesIO(pdf_bytes))
         text_parts = []
 
@@ -194,6 +249,13 @@ def extract_text_from_pdf_base64(pdf_base64: str) -> str:
         return ""
 
 
+def extract_text_from_bytes(filename: str, data: bytes) -> str:
+    """Extract text from an in-memory file, PDF or plain text by extension"""
+    if filename.lower().endswith('.pdf'):
+        return extract_text_from_pdf_bytes(data)
+    return data.decode('utf-8', errors='replace')
+
+
 def clean_latex_response(latex_response: str) -> str:
     """Clean LaTeX code returned by OpenAI"""
     # Remove leading explanation text
@@ -286,46 +348,182 @@ def _generate_summary(name: str, resume_text: str) -> str:
 def process_candidates(
     embedding_processor,
     candidates: List[Dict],
+    deduplicator=None,
+    field_extractor=None,
+    candidate_filter=None,
 ) -> List[Dict]:
-    """Process candidate list, generate embeddings for each candidate"""
+    """
+    Process candidate list, generate embeddings for each candidate
+
+    Candidates carry either a base64 PDF 'resume' or an already extracted
+    'resume_text'. Embeddings of the whole list are computed in one batched
+    encode call after extraction.
+
+    When a deduplicator is given, candidates duplicating an already known
+    resume (or an earlier one of the same batch) are returned without an
+    embedding and with a 'duplicate_of' entry, before any PDF is written or
+    embedding is computed for them.
+
+    When a field extractor is given, the structured resume fields of each
+    unique candidate are extracted (cached by content hash) into 'fields'.
+    A candidate filter is then evaluated on those fields and on the candidate
+    'location' and 'tags', candidates it rejects are left out of the result
+    without writing their PDF or computing their embedding.
+    """
     processed_candidates = []
+    to_embed = []
+    batch_deduplicator = deduplicator.copy_empty() if deduplicator else None
 
     for candidate in candidates:
-        # Extract candidate information
-        candidate_id = candidate.get('id', str(uuid.uuid4()))
-        name = candidate.get('name', f'Candidate_{candidate_id[:8]}')
-        info = candidate.get('info', '')
-        resume: str = candidate.get('resume', '')
-        # Save resume PDF to STATIC_DIR/pdf/randomname.pdf if resume exists
-        if (len(resume) > 0):
-            pdf_dir = STATIC_DIR / 'pdf'
-            create_upload_folder(pdf_dir)
-            pdf_filename = f"{uuid.uuid4().hex}.pdf"
-            pdf_path = pdf_dir / pdf_filename
-            with open(pdf_path, "wb") as f:
-                f.write(base64.b64decode(resume))
-            resume_name = pdf_path.name
-            resume_text = extract_text_from_pdf_base64(resume).strip()
-        else:
-            resume_text = ""
-            resume_name = ""
+        processed_candidate = prepare_candidate(
+            candidate, candidate_resume_text(candidate), deduplicator,
+            batch_deduplicator, field_extractor)
+        processed_candidates.append(processed_candidate)
+        if 'duplicate_of' not in processed_candidate:
+            to_embed.append(processed_candidate)
+
+    if candidate_filter is not None and to_embed:
+        kept = filter_candidates(candidate_filter, to_embed)
+        rejected = {id(candidate) for candidate in to_embed} - \
+            {id(candidate) for candidate in kept}
+        to_embed = kept
+        processed_candidates = [
+            x for x in processed_candidates if id(x) not in rejected
+        ]
+
+    save_resume_pdfs(to_embed)
+
+    # Generate embeddings in one batch
+    if to_embed:
+        embeddings = embedding_processor.generate_embeddings(
+            [candidate['resume_text'] for candidate in to_embed])
+        for candidate, embedding in zip(to_embed, embeddings):
+            # Convert to list for JSON serialization
+            candidate['embedding'] = embedding.tolist()
 
-        merge_text = info + "\n" + resume_text
+    return processed_candidates
 
-        # Generate embedding
-        embedding = embedding_processor.generate_embedding(merge_text)
 
-        processed_candidate = {
-            'id': candidate_id,
-            'name': name,
-            'resume_text': merge_text,
-            'embedding':
-            embedding.tolist(),  # Convert to list for JSON serialization
-            'summary': _generate_summary(name, resume_text),
-            'resume': resume,
-            'resume_name': resume_name
-        }
+def candidate_resume_text(candidate: Dict) -> str:
+    """Resume text of a submitted candidate, extracted from its PDF if needed"""
+    # Base64 string, or raw PDF bytes when sent as MessagePack
+    resume = candidate.get('resume', '')
+    if 'resume_text' in candidate:
+        return candidate['resume_text'].strip()
+    if isinstance(resume, bytes) and len(resume) > 0:
+        return extract_text_from_pdf_bytes(resume).strip()
+    if len(resume) > 0:
+        return extract_text_from_pdf_base64(resume).strip()
+    return ""
+
+
+def prepare_candidate(
+    candidate: Dict,
+    resume_text: str,
+    deduplicator=None,
+    batch_deduplicator=None,
+    field_extractor=None,
+) -> Dict:
+    """
+    Processed candidate without its embedding, or a 'duplicate_of' entry when
+    the deduplicator (or batch_deduplicator, which records the candidate
+    otherwise) already knows the resume. Resumes too short to fingerprint
+    are never duplicates.
+    """
+    # Extract candidate information
+    candidate_id = candidate.get('id', str(uuid.uuid4()))
+    name = candidate.get('name', f'Candidate_{candidate_id[:8]}')
+    info = candidate.get('info', '')
+    merge_text = info + "\n" + resume_text
+
+    fingerprint = None
+    if deduplicator is not None:
+        fingerprint = deduplicator.fingerprint(merge_text)
+    if fingerprint is not None:
+        duplicate = deduplicator.find_duplicate(fingerprint) or \
+            batch_deduplicator.find_duplicate(fingerprint)
+        if duplicate:
+            return {
+                'id': candidate_id,
+                'name': name,
+                'content_hash': fingerprint.content_hash,
+                'duplicate_of': duplicate,
+            }
+        batch_deduplicator.add(candidate_id, fingerprint)
+
+    processed_candidate = {
+        'id': candidate_id,
+        'name': name,
+        'resume_text': merge_text,
+        'summary': _generate_summary(name, resume_text),
+        'resume': candidate.get('resume', ''),
+        'resume_name': "",
+        'location': candidate.get('location') or '',
+        'tags': list(candidate.get('tags') or []),
+    }
+    if fingerprint is not None:
+        processed_candidate['content_hash'] = fingerprint.content_hash
+        processed_candidate['fingerprint'] = fingerprint
+    if field_extractor is not None:
+        processed_candidate['fields'] = field_extractor.extract(
+            merge_text,
+            content_hash=fingerprint.content_hash if fingerprint else None,
+        )
+    return processed_candidate
 
-        processed_candidates.append(processed_candidate)
 
-    return processed_candidates
+def filter_candidates(candidate_filter, candidates: List[Dict]) -> List[Dict]:
+    """Processed candidates kept by a candidate filter"""
+    mask = candidate_filter.mask_candidates(candidates)
+    return [candidate for candidate, keep in zip(candidates, mask) if keep]
+
+
+def save_resume_pdfs(candidates: List[Dict]):
+    """
+    Save resume PDFs to STATIC_DIR/pdf/<sha256>.pdf, sets 'resume_name'
+
+    A resume seen before reuses its file.
+    """
+    for candidate in candidates:
+        resume = candidate['resume']
+        if (len(resume) > 0):
+            candidate['resume_name'] = resume_store.save(
+                resume if isinstance(resume, bytes) else base64.
+                b64decode(resume))
+
+
+def decode_embedding(value, dimension: int = None) -> np.ndarray:
+    """
+    Decode a client supplied embedding: a list of floats, or raw little-endian
+    float32 bytes (MessagePack)
+    """
+    if isinstance(value, (bytes, bytearray)):
+        embedding = np.frombuffer(value, dtype='<f4').astype(np.float32)
+    elif isinstance(value, list):
+        embedding = np.asarray(value, dtype=np.float32)
+    else:
+        raise ValueError("Embedding must be a list of floats or float32 bytes")
+
+    if embedding.ndim != 1 or (dimension is not None and
+                               embedding.shape[0] != dimension):
+        raise ValueError(
+            f"Embedding must have {dimension} dimensions, got {embedding.shape}"
+        )
+    return embedding
+
+
+def split_duplicates(processed_candidates: List[Dict]):
+    """Split processed candidates into unique ones and detected duplicates"""
+    unique, duplicates = [], []
+    for candidate in processed_candidates:
+        if 'duplicate_of' in candidate:
+            duplicates.append({
+                'id': candidate['id'],
+                'name': candidate['name'],
+                'duplicate_of': candidate['duplicate_of']['id'],
+                'match': candidate['duplicate_of']['match'],
+                'similarity': candidate['duplicate_of']['similarity'],
+            })
+        else:
+            unique.append(candidate)
+    return unique, duplicates
@@ -0,0 +1,45 @@
+"""
+Shared test fixtures, no embedding model is downloaded
+"""
+import hashlib
+import os
+import threading
+import numpy as np
+import pytest
+
+# talentmatch reads its configuration on import
+os.environ.setdefault('INVITATION_CODE', 'test')
+
+from talentmatch.etc.embeddingprocessor import EmbeddingProcessor  # noqa: E402
+
+
+class HashEmbeddingProcessor(EmbeddingProcessor):
+    """
+    EmbeddingProcessor without a model: bag-of-words vectors hashed into a
+    fixed number of dimensions, so similar texts get similar vectors.
+    Tokens are counted by the processor's 4 characters per token fallback.
+    """
+
+    def __init__(self, model_name: str = 'hash', dimension: int = 64):
+        self.model = None
+        self.model_name = model_name
+        self.dimension = dimension
+        self.fingerprint = f"{model_name}:{dimension}"
+        self._encode_lock = threading.Lock()
+
+    def generate_embedding(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in self._clean_text(text).lower().split():
+            digest = hashlib.md5(word.encode('utf-8')).digest()
+            vector[int.from_bytes(digest[:4], 'little') % self.dimension] += 1
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def generate_embeddings(self, texts, batch_size: int = 32) -> np.ndarray:
+        return np.stack([self.generate_embedding(text) for text in texts]) \
+            if len(texts) else np.zeros((0, self.dimension), dtype=np.float32)
+
+
+@pytest.fixture
+def embedding_processor():
+    return HashEmbeddingProcessor()
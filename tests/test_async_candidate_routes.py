@@ -0,0 +1,111 @@
+"""
+Body limits of the streamed async (Quart) candidate routes
+"""
+import asyncio
+import pytest
+
+quart = pytest.importorskip('quart')
+
+from talentmatch.routes.async_candidate_routes import (  # noqa: E402
+    StreamedBodyRequest, create_async_candidate_routes)
+from talentmatch.services.candidate_service import (  # noqa: E402
+    PartialImportError)
+
+CONFIG = {
+    'MAX_CONTENT_LENGTH': 1024,
+    'MAX_IMPORT_CONTENT_LENGTH': 64 * 1024,
+    'MAX_UPLOAD_CONTENT_LENGTH': 64 * 1024,
+    'MAX_UPLOAD_FILE_SIZE': 64 * 1024,
+    'MAX_UPLOAD_FILES': 10,
+    'UPLOAD_BATCH_SIZE': 4,
+    'ALLOWED_EXTENSIONS': {'txt', 'pdf'},
+}
+
+
+class ByteCountingService:
+    """Candidate service stub consuming the streamed bodies"""
+
+    def import_candidates(self, stream):
+        data = stream.read()
+        if data.startswith(b'broken'):
+            raise PartialImportError(ValueError('broken record'),
+                                     {'imported_count': 2})
+        return {'imported_count': len(data)}
+
+    def add_candidates_from_stream(self, candidates, batch_size):
+        return {'added_count': sum(1 for _ in candidates)}
+
+
+def make_app():
+    app = quart.Quart(__name__)
+    app.config.update(CONFIG)
+    app.request_class = StreamedBodyRequest
+    app.register_blueprint(create_async_candidate_routes(
+        ByteCountingService(), app.config))
+    return app
+
+
+def multipart(size: int) -> tuple:
+    boundary = 'talentmatch-boundary'
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="files"; '
+            f'filename="resume.txt"\r\nContent-Type: text/plain\r\n\r\n'
+            ).encode() + b'python ' * (size // 7) + \
+        f'\r\n--{boundary}--\r\n'.encode()
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+def post(path: str, body: bytes, headers=None):
+    async def run():
+        client = make_app().test_client()
+        return await client.post(path, data=body, headers=headers or {})
+    return asyncio.run(run())
+
+
+def test_import_is_not_capped_by_max_content_length():
+    response = post('/api/candidates/import', b'x' * 32 * 1024)
+    assert response.status_code == 201
+    assert asyncio.run(response.get_json()) == {'imported_count': 32 * 1024}
+
+
+def test_import_over_its_own_limit_is_refused():
+    assert post('/api/candidates/import',
+                b'x' * 65 * 1024).status_code == 413
+
+
+def test_partial_import_reports_the_imported_count():
+    response = post('/api/candidates/import', b'broken archive')
+    assert response.status_code == 400
+    assert asyncio.run(response.get_json())['imported_count'] == 2
+
+
+def test_upload_is_limited_by_max_upload_content_length():
+    body, headers = multipart(32 * 1024)
+    assert post('/api/candidates/upload', body, headers).status_code == 201
+    body, headers = multipart(65 * 1024)
+    assert post('/api/candidates/upload', body, headers).status_code == 413
+
+
+def test_other_routes_keep_max_content_length():
+    app = make_app()
+
+    @app.route('/api/echo', methods=['POST'])
+    async def echo():
+        return {'size': len(await quart.request.get_data())}
+
+    async def run(size):
+        response = await app.test_client().post('/api/echo',
+                                                data=b'x' * size)
+        return response.status_code
+
+    assert asyncio.run(run(1024)) == 200
+    assert asyncio.run(run(2048)) == 413
+
+
+def test_chunked_bodies_are_counted():
+    from werkzeug.exceptions import RequestEntityTooLarge
+    from talentmatch.etc.uploadstream import MultipartFileReader
+
+    reader = MultipartFileReader(b'boundary', max_content_length=10)
+    reader.feed(b'--bound')
+    with pytest.raises(RequestEntityTooLarge):
+        reader.feed(b'ary\r\n')
@@ -0,0 +1,50 @@
+"""
+Offline batch scoring, duplicates across an interruption
+"""
+import random
+from talentmatch.batch import register_scored, score_batch
+from talentmatch.etc.deduplicator import Deduplicator
+from talentmatch.etc.fieldextractor import FieldExtractor
+
+WORDS = [f'skill{index}' for index in range(2000)]
+
+
+def resume(seed: int) -> str:
+    return ' '.join(random.Random(seed).sample(WORDS, 120))
+
+
+BATCHES = [
+    [('a.txt', (resume(1), None)), ('b.txt', (resume(2), None)),
+     # Near-duplicate of a.txt
+     ('c.txt', (resume(1) + ' skill1999', None)),
+     ('broken.pdf', ('', 'Could not read PDF'))],
+    [('d.txt', (resume(1), None)), ('e.txt', (resume(3), None)),
+     ('f.txt', (resume(2) + ' skill7', None))],
+]
+
+
+def duplicates(rows):
+    return {row['file']: row['duplicate_of'] for row in rows
+            if row['job'] == 'job'}
+
+
+def test_resumed_run_reports_the_same_duplicates(embedding_processor):
+    jobs = [('job', embedding_processor.generate_embedding('skill1 skill2'))]
+    field_extractor = FieldExtractor(use_llm=False)
+
+    deduplicator = Deduplicator()
+    uninterrupted = [
+        duplicates(score_batch(embedding_processor, deduplicator,
+                               field_extractor, jobs, batch))
+        for batch in BATCHES
+    ]
+
+    # The run stopped after the first batch
+    deduplicator = Deduplicator()
+    register_scored(deduplicator, BATCHES[0])
+    resumed = duplicates(score_batch(embedding_processor, deduplicator,
+                                     field_extractor, jobs, BATCHES[1]))
+
+    assert uninterrupted[0]['c.txt'] == 'a.txt'
+    assert resumed == uninterrupted[1] == {
+        'd.txt': 'a.txt', 'e.txt': None, 'f.txt': 'b.txt'}
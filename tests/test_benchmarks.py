@@ -0,0 +1,49 @@
+"""
+The benchmark scripts run end to end on tiny inputs
+"""
+from talentmatch.benchmarks.dataset import labelled_pool
+from talentmatch.benchmarks import reduction, retrieval, shortlist_cost
+from conftest import HashEmbeddingProcessor
+
+
+def test_labelled_pool_has_relevant_candidates():
+    candidates, jobs = labelled_pool(200, 10, seed=1)
+    assert len(candidates) == 200 and len(jobs) == 10
+    for job in jobs:
+        assert job.relevant()
+        assert set(job.grades.values()) <= {1, 2}
+
+
+def test_retrieval_benchmark(embedding_processor):
+    candidates, jobs = labelled_pool(300, 5)
+    results = retrieval.run_benchmark(embedding_processor, candidates, jobs,
+                                      top_k=5)
+    assert [result['mode'] for result in results] == ['semantic', 'hybrid']
+    for result in results:
+        assert 0 <= result['precision'] <= 1
+        assert 0 <= result['ndcg'] <= 1
+        assert result['p50_ms'] > 0
+
+
+def test_shortlist_cost_benchmark(embedding_processor):
+    candidates, jobs = labelled_pool(100, 2, filler=10)
+    rows = shortlist_cost.run_benchmark(embedding_processor, candidates, jobs,
+                                        sizes=[4, 12], batch_size=4)
+    calls = {(row['shortlist'], row['mode']): row['llm_calls'] for row in rows}
+    assert calls == {
+        (4, 'per_candidate'): 4, (4, 'batched'): 1, (4, 'batched_cached'): 0,
+        (12, 'per_candidate'): 12, (12, 'batched'): 3,
+        (12, 'batched_cached'): 0,
+    }
+
+
+def test_reduction_benchmark():
+    candidates, jobs = labelled_pool(400, 5)
+    rows = reduction.run_benchmark(HashEmbeddingProcessor(dimension=128),
+                                   candidates, jobs, dimensions=(16, 32),
+                                   top_k=5, limit=100, speed_rows=1000)
+    assert [(row['method'], row['dimensions']) for row in rows] == [
+        ('none', 128), ('pca', 16), ('pca', 32), ('prefix', 16),
+        ('prefix', 32)]
+    for row in rows:
+        assert 0 <= row['recall_reduced'] <= row['recall_rerank'] <= 1
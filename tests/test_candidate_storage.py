@@ -0,0 +1,162 @@
+"""
+CandidateStorage writes, and concurrent use of the candidate endpoints
+"""
+import random
+import threading
+import time
+import numpy as np
+import pytest
+from flask import Flask
+from talentmatch.models.candidate import Candidate, CandidateStorage
+from talentmatch.etc.deduplicator import Deduplicator
+from talentmatch.etc.modelregistry import EmbeddingModelRegistry
+from talentmatch.routes.candidate_routes import create_candidate_routes
+from talentmatch.services.candidate_service import CandidateService
+from conftest import HashEmbeddingProcessor
+
+VOCABULARY = [f'word{index}' for index in range(5000)]
+
+
+def resume(seed: int, words: int = 80) -> str:
+    return ' '.join(random.Random(seed).sample(VOCABULARY, words))
+
+
+def make_candidate(storage: CandidateStorage, candidate_id: str, text: str,
+                   embedding) -> Candidate:
+    candidate = Candidate(candidate_id, text, candidate_id=candidate_id)
+    candidate.resume_text = text
+    candidate.fingerprint = storage.deduplicator.fingerprint(text)
+    candidate.embedding = embedding
+    return candidate
+
+
+def test_replacement_duplicating_another_candidate_keeps_the_stored_one():
+    storage = CandidateStorage(Deduplicator())
+    storage.add_candidates([
+        make_candidate(storage, 'a', resume(1), np.ones(4)),
+        make_candidate(storage, 'b', resume(2), np.full(4, 2.0)),
+    ])
+
+    # 'a' resubmitted with the resume of 'b'
+    added = storage.add_candidates(
+        [make_candidate(storage, 'a', resume(2), np.full(4, 3.0))])
+
+    assert added == 0
+    assert storage.count() == 2
+    assert storage.get_by_id('a').resume_text == resume(1)
+    np.testing.assert_array_equal(storage.get_embeddings(['a'])[0],
+                                  np.ones(4))
+    assert [candidate_id for candidate_id, _ in
+            storage.search_lexical(resume(1), limit=1)] == ['a']
+
+
+def test_replacement_with_its_own_resume_is_stored():
+    storage = CandidateStorage(Deduplicator())
+    storage.add_candidates([make_candidate(storage, 'a', resume(1),
+                                           np.ones(4))])
+
+    added = storage.add_candidates(
+        [make_candidate(storage, 'a', resume(1) + ' word1', np.full(4, 3.0))])
+
+    assert added == 1
+    assert storage.count() == 1
+    np.testing.assert_array_equal(storage.get_embeddings(['a'])[0],
+                                  np.full(4, 3.0))
+
+
+def test_dimension_mismatch_leaves_the_storage_unchanged():
+    storage = CandidateStorage(Deduplicator())
+    storage.add_candidates([make_candidate(storage, 'a', resume(1),
+                                           np.ones(4))])
+    revision = storage.revision
+
+    with pytest.raises(ValueError):
+        storage.add_candidates([
+            make_candidate(storage, 'a', resume(3), np.full(4, 2.0)),
+            make_candidate(storage, 'c', resume(4), np.ones(5)),
+        ])
+
+    assert storage.revision == revision
+    assert storage.find_ids() == ['a']
+    assert storage.get_by_id('a').resume_text == resume(1)
+    assert storage.get_by_id('c') is None
+    assert storage.deduplicator.count() == 1
+    np.testing.assert_array_equal(storage.get_embeddings(), [np.ones(4)])
+
+
+def test_concurrent_endpoints(embedding_processor):
+    """
+    Threads add, list and delete candidates through the endpoints, every
+    listed embedding must be the one of the candidate it is listed with
+    """
+    registry = EmbeddingModelRegistry(lambda name: embedding_processor)
+    registry.load('hash')
+    service = CandidateService(registry)
+    app = Flask(__name__)
+    app.register_blueprint(create_candidate_routes(service, {}))
+
+    texts = {f'c{index}': resume(index) for index in range(200)}
+    expected = {
+        candidate_id: embedding_processor.generate_embedding(text + '\n')
+        for candidate_id, text in texts.items()
+    }
+    deadline = time.time() + 3
+    errors, counts = [], {'requests': 0}
+    lock = threading.Lock()
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        client = app.test_client()
+        requests = 0
+        try:
+            while time.time() < deadline:
+                ids = rng.sample(sorted(texts), 5)
+                action = rng.random()
+                if action < 0.4:
+                    response = client.post('/api/candidates', json={
+                        'candidates': [{'id': candidate_id,
+                                        'name': candidate_id,
+                                        'info': texts[candidate_id]}
+                                       for candidate_id in ids]})
+                    assert response.status_code == 201, response.json
+                elif action < 0.6:
+                    response = client.post('/api/candidates/delete',
+                                           json={'ids': ids})
+                    assert response.status_code == 200, response.json
+                else:
+                    response = client.get(
+                        '/api/candidates?limit=50&embeddings=1')
+                    assert response.status_code == 200, response.json
+                    for record in response.json['candidates']:
+                        np.testing.assert_allclose(
+                            record['embedding'], expected[record['id']],
+                            rtol=1e-6)
+                requests += 1
+        except BaseException as e:  # reported by the main thread
+            errors.append(e)
+        with lock:
+            counts['requests'] += requests
+
+    started = time.time()
+    threads = [threading.Thread(target=worker, args=(seed,))
+               for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+
+    assert not errors, errors[0]
+    print(f"{counts['requests']} requests in {elapsed:.1f}s, "
+          f"{counts['requests'] / elapsed:.0f} requests/s")
+
+    # Storage, deduplicator and lexical index agree once the writes are over
+    storage = service.storage
+    ids = storage.find_ids()
+    assert len(ids) == len(set(ids)) == storage.count()
+    assert storage.deduplicator.count() == storage.count()
+    for candidate_id in ids:
+        np.testing.assert_allclose(storage.get_embeddings([candidate_id])[0],
+                                   expected[candidate_id], rtol=1e-6)
+        assert storage.search_lexical(texts[candidate_id],
+                                      limit=1)[0][0] == candidate_id
@@ -0,0 +1,50 @@
+"""
+Candidate filter masks, unknown values never satisfy a condition
+"""
+import pytest
+from talentmatch.etc.candidatefilter import CandidateFilter
+
+CANDIDATES = [
+    {'fields': {'years_experience': 3, 'education': 'bachelor',
+                'skill_years': {'python': 4}},
+     'location': 'Berlin', 'tags': ['visa']},
+    {'fields': {'years_experience': 8, 'education': 'master'},
+     'location': 'Remote', 'tags': []},
+    # Nothing known
+    {'fields': {}, 'location': '', 'tags': []},
+]
+
+
+def matches(expression):
+    return CandidateFilter.parse(expression).mask_candidates(
+        CANDIDATES).tolist()
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ({'years_experience': {'ne': 3}}, [False, True, False]),
+    ({'years_experience': {'lt': 5}}, [True, False, False]),
+    ({'skills.python': {'ne': 1}}, [True, False, False]),
+    ({'education': {'ne': 'bachelor'}}, [False, True, False]),
+    ({'education': {'nin': ['master']}}, [True, False, False]),
+    ({'location': {'ne': 'berlin'}}, [False, True, False]),
+    ({'location': {'nin': ['Remote']}}, [True, False, False]),
+    ({'location': 'Berlin'}, [True, False, False]),
+    ({'tags': {'none': ['visa']}}, [False, True, True]),
+    # A plain list is a set of accepted values
+    ({'location': ['Remote', 'Berlin']}, [True, True, False]),
+    ({'education': ['bachelor', 'doctorate']}, [True, False, False]),
+    ({'tags': ['visa', 'relocation']}, [True, False, False]),
+])
+def test_unknown_values_do_not_match(expression, expected):
+    assert matches(expression) == expected
+
+
+def test_invalid_expressions_are_rejected():
+    with pytest.raises(ValueError):
+        CandidateFilter.parse({'years_experience': {'ne': 'three'}})
+    with pytest.raises(ValueError):
+        CandidateFilter.parse({'location': {'nin': 'Berlin'}})
+    with pytest.raises(ValueError):
+        CandidateFilter.parse({'location': {'eq': ['Remote', 'Berlin']}})
+    with pytest.raises(ValueError):
+        CandidateFilter.parse({'education': {'ne': ['bachelor', 'master']}})
@@ -0,0 +1,36 @@
+"""
+Duplicate detection of resumes without usable text
+"""
+from talentmatch.etc.deduplicator import Deduplicator
+from talentmatch.utils import prepare_candidate
+
+RESUME = ("Senior backend engineer with eight years of Python, Django and "
+          "PostgreSQL experience building payment systems")
+
+
+def prepare(deduplicator, batch, candidate_id, text, info=''):
+    return prepare_candidate({'id': candidate_id, 'info': info}, text,
+                             deduplicator, batch_deduplicator=batch)
+
+
+def test_empty_resumes_are_never_duplicates():
+    deduplicator = Deduplicator()
+    batch = deduplicator.copy_empty()
+
+    # Scanned PDFs without extractable text and without info
+    prepared = [prepare(deduplicator, batch, f'scan-{index}', text)
+                for index, text in enumerate(['', '  \n', '...', 'CV'])]
+    assert all('duplicate_of' not in candidate for candidate in prepared)
+    assert all('content_hash' not in candidate for candidate in prepared)
+    assert batch.count() == 0
+
+
+def test_resumes_with_text_are_still_deduplicated():
+    deduplicator = Deduplicator()
+    batch = deduplicator.copy_empty()
+
+    first = prepare(deduplicator, batch, 'first', RESUME)
+    second = prepare(deduplicator, batch, 'second', RESUME.upper() + '!')
+    assert 'duplicate_of' not in first
+    assert second['duplicate_of'] == {'id': 'first', 'match': 'exact',
+                                      'similarity': 1.0}
@@ -0,0 +1,40 @@
+"""
+Memory diagnostics endpoint authentication
+"""
+from flask import Flask
+import pytest
+from talentmatch.etc.memoryprofiler import MemoryProfiler
+from talentmatch.routes.diagnostics_routes import create_diagnostics_routes
+from talentmatch.services.diagnostics_service import DiagnosticsService
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(create_diagnostics_routes(DiagnosticsService(
+        MemoryProfiler(trace_frames=0), {'cache': lambda: {'entries': 1}})))
+    return app.test_client()
+
+
+def test_code_in_the_query_string_is_refused(client):
+    response = client.get('/api/admin/memory?invitation_code=test')
+    assert response.status_code == 403
+
+
+def test_code_in_a_header(client):
+    response = client.get('/api/admin/memory?objects=1',
+                          headers={'X-Invitation-Code': 'test'})
+    assert response.status_code == 200
+    assert response.json['components'] == {'cache': {'entries': 1}}
+    assert 'objects' in response.json
+    assert client.get('/api/admin/memory', headers={
+        'X-Invitation-Code': 'wrong'}).status_code == 403
+
+
+def test_code_and_options_in_a_post_body(client):
+    response = client.post('/api/admin/memory', json={
+        'invitation_code': 'test', 'objects': True, 'top': 0})
+    assert response.status_code == 200
+    assert 'objects' in response.json
+    assert client.post('/api/admin/memory', json={
+        'invitation_code': 'test', 'top': 'many'}).status_code == 400
@@ -0,0 +1,259 @@
+"""
+LLMClient retries and circuit breaker against a fault-injecting stub server
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import socket
+import threading
+import time
+import pytest
+from talentmatch.etc.llmclient import (CircuitBreaker, LLMClient,
+                                       LLMResponseCache, LLMUnavailableError)
+
+MESSAGES = [{'role': 'user', 'content': 'Summarize the candidate'}]
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    OpenAI-compatible chat completions endpoint answering each request with
+    the next scripted fault: an HTTP status, ('delay', seconds) or 'ok'
+    (the default once the script is spent)
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.script = []
+        self.requests = 0
+        self.client_ports = set()
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/v1'
+
+    def next_fault(self, client_port: int):
+        with self.lock:
+            self.requests += 1
+            self.client_ports.add(client_port)
+            return self.script.pop(0) if self.script else 'ok'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        fault = self.server.next_fault(self.client_address[1])
+        if isinstance(fault, tuple):
+            time.sleep(fault[1])
+            fault = 'ok'
+        if fault == 'ok':
+            status, body = 200, {
+                'id': 'stub', 'object': 'chat.completion', 'created': 0,
+                'model': 'stub',
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant',
+                                         'content': 'answer'}}],
+            }
+        else:
+            status, body = fault, {'error': {'message': f'stub {fault}',
+                                             'type': 'stub'}}
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except BrokenPipeError:
+            pass  # the client gave up on a delayed answer
+
+
+@pytest.fixture
+def server():
+    server = StubServer()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(url: str, **options) -> LLMClient:
+    options.setdefault('circuit_breaker',
+                       CircuitBreaker(min_requests=3, window_size=10,
+                                      cooldown_seconds=60))
+    return LLMClient(api_key='test', base_url=url, retry_backoff_seconds=0.01,
+                     **options)
+
+
+def test_transient_errors_are_retried(server):
+    server.script = [500, 429, ('delay', 2)]
+    client = make_client(server.url, max_retries=3, request_timeout=0.5,
+                         circuit_breaker=CircuitBreaker(min_requests=10))
+
+    assert client.complete(MESSAGES) == 'answer'
+    assert server.requests == 4
+    assert list(client.circuit_breaker._outcomes) == [False, False, False,
+                                                      True]
+
+
+def test_client_errors_do_not_open_the_circuit(server):
+    server.script = [400, 401, 404, 400, 422]
+    client = make_client(server.url)
+
+    for _ in range(5):
+        with pytest.raises(LLMUnavailableError):
+            client.complete(MESSAGES)
+    # Not retried, and the upstream is still considered up
+    assert server.requests == 5
+    assert client.circuit_breaker.state == 'closed'
+    assert client.complete(MESSAGES) == 'answer'
+
+
+def test_server_errors_open_the_circuit(server):
+    server.script = [503] * 10
+    client = make_client(server.url, max_retries=0)
+
+    for _ in range(3):
+        with pytest.raises(LLMUnavailableError):
+            client.complete(MESSAGES)
+    assert client.circuit_breaker.state == 'open'
+    with pytest.raises(LLMUnavailableError, match='circuit is open'):
+        client.complete(MESSAGES)
+    assert server.requests == 3
+
+
+def test_connection_errors_count_as_failures():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        url = f'http://127.0.0.1:{sock.getsockname()[1]}/v1'
+    client = make_client(url, max_retries=1)
+
+    with pytest.raises(LLMUnavailableError):
+        client.complete(MESSAGES)
+    assert list(client.circuit_breaker._outcomes) == [False, False]
+
+
+def test_async_calls_share_one_client_per_loop(server):
+    server.script = [500, 502]
+    client = make_client(server.url, max_retries=2, request_timeout=5)
+
+    async def run():
+        first = await client.complete_async(MESSAGES)
+        # Distinct prompts, not coalesced
+        rest = [await client.complete_async(
+            [{'role': 'user', 'content': f'prompt {index}'}])
+            for index in range(5)]
+        return [first] + rest
+
+    assert asyncio.run(run()) == ['answer'] * 6
+    assert server.requests == 8
+    # Sequential calls reuse the connection of the loop's client
+    assert len(server.client_ports) == 1
+    assert list(client.circuit_breaker._outcomes).count(False) == 2
+
+    # A new loop gets its own client
+    assert asyncio.run(client.complete_async(
+        [{'role': 'user', 'content': 'another loop'}])) == 'answer'
+    assert len(server.client_ports) == 2
+
+
+class ThreadRecordingCache(LLMResponseCache):
+    """Response cache recording the threads it is used from"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, model, response):
+        self.threads.append(threading.get_ident())
+        super().set(key, model, response)
+
+
+def test_async_cache_access_stays_off_the_event_loop(server, tmp_path):
+    cache = ThreadRecordingCache(str(tmp_path / 'llm.sqlite'))
+    client = make_client(server.url, cache=cache)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        answers = [await client.complete_async(MESSAGES) for _ in range(2)]
+        return loop_thread, answers
+
+    loop_thread, answers = asyncio.run(run())
+    assert answers == ['answer', 'answer']
+    # get, set, then a cached get
+    assert server.requests == 1
+    assert len(cache.threads) == 3
+    assert loop_thread not in cache.threads
+
+
+def test_cancelled_leader_hands_over_to_a_waiting_caller(server):
+    server.script = [('delay', 1)]
+    client = make_client(server.url)
+
+    async def run():
+        leader = asyncio.ensure_future(client.complete_async(MESSAGES))
+        while not server.requests:
+            await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(client.complete_async(MESSAGES))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == 'answer'
+    assert server.requests == 2
+    assert client._in_flight == {}
+
+
+def test_interrupted_leader_hands_over_to_a_waiting_thread(server):
+    client = make_client(server.url)
+    started, release, waiting = (threading.Event(), threading.Event(),
+                                 threading.Event())
+    send, join_flight = client._with_retries, client._join_flight
+    results = []
+
+    def join(key):
+        future, leader = join_flight(key)
+        if not leader:
+            waiting.set()
+        return future, leader
+
+    def interrupted(request):
+        client._with_retries = send
+        started.set()
+        release.wait()
+        raise KeyboardInterrupt
+
+    def leader():
+        with pytest.raises(KeyboardInterrupt):
+            client.complete(MESSAGES)
+
+    def follower():
+        results.append(client.complete(MESSAGES))
+
+    client._with_retries, client._join_flight = interrupted, join
+    threads = [threading.Thread(target=leader)]
+    threads[0].start()
+    started.wait()
+    threads.append(threading.Thread(target=follower))
+    threads[1].start()
+    waiting.wait()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['answer']
+    assert server.requests == 1
+    assert client._in_flight == {}
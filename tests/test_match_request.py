@@ -0,0 +1,67 @@
+"""
+Validation of /api/match payloads (shared by the WSGI and ASGI routes)
+"""
+import pytest
+from talentmatch.routes.recommendation_routes import parse_match_request
+
+APP_CONFIG = {
+    'RETRIEVAL_MODE': 'semantic',
+    'MAX_CANDIDATES': 10,
+    'MIN_SIMILARITY_THRESHOLD': 0.3,
+    'RERANK_ENABLED': False,
+    'LLM_SUMMARIES_ENABLED': False,
+    'EXPLANATIONS_ENABLED': False,
+}
+
+
+def payload(**values):
+    return dict({
+        'invitation_code': 'test',
+        'job_description': 'Backend engineer',
+        'candidates': [{'id': 'a', 'info': 'python'}],
+    }, **values)
+
+
+def test_defaults_and_valid_values():
+    arguments, error = parse_match_request(payload(), APP_CONFIG)
+    assert error is None
+    assert (arguments['top_k'], arguments['min_similarity']) == (10, 0.3)
+
+    arguments, error = parse_match_request(
+        payload(top_k=3, min_similarity=0), APP_CONFIG)
+    assert error is None
+    assert (arguments['top_k'], arguments['min_similarity']) == (3, 0)
+
+
+@pytest.mark.parametrize('values', [
+    {'top_k': '5'}, {'top_k': None}, {'top_k': 0}, {'top_k': -1},
+    {'top_k': 2.5}, {'top_k': True},
+    {'min_similarity': '0.5'}, {'min_similarity': None},
+    {'min_similarity': False}, {'min_similarity': float('nan')},
+    {'rerank': 'maybe'}, {'summaries': 2}, {'explain': []},
+    {'use_stored_candidates': 'sure'},
+])
+def test_invalid_parameters_are_rejected(values):
+    arguments, error = parse_match_request(payload(**values), APP_CONFIG)
+    assert arguments is None
+    assert error[1] == 400
+
+
+@pytest.mark.parametrize('value, expected', [
+    (True, True), (False, False), ('true', True), ('false', False),
+    ('False', False), ('1', True), ('0', False), (1, True), (0, False),
+    ('no', False), ('', False),
+])
+def test_flags_are_parsed_strictly(value, expected):
+    arguments, error = parse_match_request(
+        payload(rerank=value, summaries=value, explain=value), APP_CONFIG)
+    assert error is None
+    assert arguments['rerank'] is arguments['summaries'] is \
+        arguments['explain'] is expected
+
+
+def test_flags_default_to_the_configuration():
+    arguments, _ = parse_match_request(payload(), dict(
+        APP_CONFIG, RERANK_ENABLED=True, LLM_SUMMARIES_ENABLED=True))
+    assert (arguments['rerank'], arguments['summaries'],
+            arguments['explain']) == (True, True, False)
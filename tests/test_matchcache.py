@@ -0,0 +1,111 @@
+"""
+MatchResultCache request coalescing when the computing caller goes away
+"""
+import asyncio
+import threading
+import pytest
+from talentmatch.etc.matchcache import MatchResultCache
+
+
+def test_cancelled_leader_hands_over_to_a_waiting_caller():
+    cache = MatchResultCache()
+    started = asyncio.Event()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            await asyncio.sleep(60)
+        return {'matches': len(calls)}
+
+    async def run():
+        leader = asyncio.ensure_future(cache.get_or_compute_async('k', compute))
+        await started.wait()
+        follower = asyncio.ensure_future(
+            cache.get_or_compute_async('k', compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    entry, cached = asyncio.run(run())
+    assert entry.result == {'matches': 2}
+    assert not cached
+    assert cache._in_flight == {}
+    assert cache.get('k') is entry
+
+
+def test_cancelled_waiter_does_not_affect_the_others():
+    cache = MatchResultCache()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return {'matches': 1}
+
+    async def run():
+        leader = asyncio.ensure_future(cache.get_or_compute_async('k', compute))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(
+            cache.get_or_compute_async('k', compute)) for _ in range(2)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        release.set()
+        return await leader, await waiters[1]
+
+    (entry, cached), (shared, shared_cached) = asyncio.run(run())
+    assert not cached and shared_cached
+    assert shared is entry
+
+
+def test_interrupted_leader_hands_over_to_a_waiting_thread():
+    cache = MatchResultCache()
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def interrupted():
+        started.set()
+        release.wait()
+        raise KeyboardInterrupt
+
+    def leader():
+        with pytest.raises(KeyboardInterrupt):
+            cache.get_or_compute('k', interrupted)
+
+    def follower():
+        results.append(cache.get_or_compute('k', lambda: {'matches': 2}))
+
+    threads = [threading.Thread(target=leader)]
+    threads[0].start()
+    started.wait()
+    threads.append(threading.Thread(target=follower))
+    threads[1].start()
+    while not cache.stats()['coalesced']:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    (entry, cached), = results
+    assert entry.result == {'matches': 2}
+    assert not cached
+    assert cache._in_flight == {}
+
+
+def test_errors_are_shared_with_waiting_callers():
+    cache = MatchResultCache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise ValueError('bad request')
+
+    async def run():
+        return await asyncio.gather(
+            *[cache.get_or_compute_async('k', compute) for _ in range(3)],
+            return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert cache.stats()['coalesced'] == 2
@@ -0,0 +1,66 @@
+"""
+Pool archive imports failing partway report what was stored
+"""
+from io import BytesIO
+from flask import Flask
+import numpy as np
+import pytest
+from talentmatch.etc.poolarchive import PoolArchiveChunk, write_pool_archive
+from talentmatch.etc.rwlock import ReadWriteLock
+from talentmatch.routes.candidate_routes import create_candidate_routes
+from talentmatch.services.candidate_service import (CandidateService,
+                                                    PartialImportError)
+from conftest import HashEmbeddingProcessor
+
+
+class StaticModelRegistry:
+    """Model registry stub with one active model"""
+
+    def __init__(self):
+        self.active = HashEmbeddingProcessor()
+        self.cutover_lock = ReadWriteLock()
+
+
+def archive(*chunks) -> bytes:
+    return b''.join(write_pool_archive({'embedding_fingerprint': 'other'}, [
+        PoolArchiveChunk(records, np.zeros((len(records), 8)), None)
+        for records in chunks
+    ]))
+
+
+def records(start: int, count: int):
+    return [{'id': f'c{index}',
+             'resume_text': f'engineer number {index} with python, sql and '
+                            f'{index} years of experience'}
+            for index in range(start, start + count)]
+
+
+BROKEN = archive(records(0, 3), records(3, 2) + [{'id': 'no-text'}])
+
+
+def test_broken_chunk_reports_the_stored_candidates():
+    service = CandidateService(StaticModelRegistry())
+    with pytest.raises(PartialImportError) as error:
+        service.import_candidates(BytesIO(BROKEN))
+    assert isinstance(error.value.error, ValueError)
+    assert error.value.result['imported_count'] == 3
+    assert service.storage.count() == 3
+
+
+def test_broken_first_batch_stores_nothing():
+    service = CandidateService(StaticModelRegistry())
+    with pytest.raises(ValueError):
+        service.import_candidates(BytesIO(archive([{'id': 'no-text'}])))
+    assert service.storage.count() == 0
+
+
+def test_import_route_returns_the_imported_count():
+    app = Flask(__name__)
+    app.register_blueprint(create_candidate_routes(
+        CandidateService(StaticModelRegistry()),
+        {'MAX_IMPORT_CONTENT_LENGTH': 1024 * 1024}))
+    response = app.test_client().post('/api/candidates/import', data=BROKEN)
+    assert response.status_code == 400
+    assert response.json['imported_count'] == 3
+    assert response.json['total_candidates'] == 3
+    assert 'resume_text' in response.json['error']
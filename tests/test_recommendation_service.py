@@ -0,0 +1,36 @@
+"""
+Stored-pool matching input of the recommendation service
+"""
+from talentmatch.etc.llmclient import LLMClient
+from talentmatch.etc.projection import create_projection
+from talentmatch.etc.recommendengine import RecommendationEngine
+from talentmatch.models.candidate import Candidate, CandidateStorage
+from talentmatch.services.recommendation_service import RecommendationService
+from conftest import HashEmbeddingProcessor
+
+SKILLS = ('python', 'java', 'sql', 'docker', 'react', 'spark', 'excel', 'go')
+
+
+def test_stored_pool_count_is_not_the_reduced_shortlist():
+    embedding_processor = HashEmbeddingProcessor(dimension=128)
+    texts = [f"{SKILLS[index % 8]} {SKILLS[index % 5]} engineer number "
+             f"{index} with {index % 13} years" for index in range(500)]
+    storage = CandidateStorage(
+        embedding_fingerprint=embedding_processor.fingerprint)
+    storage.add_candidates(
+        [Candidate(f'c{index}', text, candidate_id=f'c{index}')
+         for index, text in enumerate(texts)],
+        embeddings=embedding_processor.generate_embeddings(texts))
+    embeddings = storage.get_embeddings(storage.find_ids())
+    assert storage.set_projection(create_projection('pca', 16).fit(embeddings),
+                                  embedding_processor.fingerprint)
+    service = RecommendationService(
+        RecommendationEngine(embedding_processor,
+                             llm_client=LLMClient(api_key='test')),
+        candidate_storage=storage)
+
+    prepared = service._prepare_candidates(
+        'python engineer', [], top_k=5, use_stored_candidates=True)
+    assert len(prepared['candidates']) == \
+        service.recommendation_engine.reduced_shortlist_size(5) < 500
+    assert prepared['candidate_count'] == 500
@@ -0,0 +1,62 @@
+"""
+Resume PDFs served with validators and immutable caching
+"""
+import asyncio
+from flask import Flask
+import pytest
+from talentmatch.etc.resumestore import ResumeFileStore
+from talentmatch.models.candidate import CandidateStorage
+from talentmatch.routes.resume_routes import create_resume_routes
+from talentmatch.services.resume_service import ResumeService
+
+PDF = b'%PDF-1.4\n' + b'resume ' * 100
+CONFIG = {'RESUME_CACHE_MAX_AGE': 3600}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResumeFileStore(tmp_path / 'pdf')
+
+
+def make_service(store):
+    return ResumeService(store, CandidateStorage(), gc_interval_seconds=0)
+
+
+@pytest.mark.parametrize('prefix', ['/api/resumes/', '/static/pdf/'])
+def test_resume_links_are_served_by_the_resume_route(store, tmp_path, prefix):
+    # The static folder of the app also holds the pdf directory
+    app = Flask(__name__, static_folder=str(tmp_path))
+    app.register_blueprint(create_resume_routes(make_service(store), CONFIG))
+    client = app.test_client()
+    name = store.save(PDF)
+
+    response = client.get(prefix + name)
+    assert response.status_code == 200
+    assert response.data == PDF
+    assert response.headers['ETag'] == f'"{store.etag(name)}"'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert client.get(prefix + name, headers={
+        'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get(prefix + name, headers={
+        'Range': 'bytes=0-3'}).data == b'%PDF'
+    assert client.get(prefix + '..%2Fsecret.pdf').status_code == 404
+
+
+def test_async_static_pdf_links_use_the_resume_route(store, tmp_path):
+    quart = pytest.importorskip('quart')
+    from talentmatch.routes.async_resume_routes import \
+        create_async_resume_routes
+
+    app = quart.Quart(__name__, static_folder=str(tmp_path))
+    app.register_blueprint(create_async_resume_routes(make_service(store),
+                                                      CONFIG))
+    name = store.save(PDF)
+
+    async def run():
+        response = await app.test_client().get(f'/static/pdf/{name}')
+        return response.status_code, response.headers, \
+            await response.get_data()
+
+    status, headers, data = asyncio.run(run())
+    assert status == 200 and data == PDF
+    assert 'immutable' in headers['Cache-Control']
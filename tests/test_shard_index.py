@@ -0,0 +1,84 @@
+"""
+Sharded scoring returns the same matches as in-process scoring
+"""
+import numpy as np
+import pytest
+from talentmatch.models.candidate import Candidate, CandidateStorage
+from talentmatch.etc.shardindex import ShardedIndex
+
+FINGERPRINT = 'test:32'
+
+
+@pytest.fixture(params=[1, 4], ids=['1-shard', '4-shards'])
+def storage(request):
+    index = ShardedIndex(request.param, timeout=60)
+    yield CandidateStorage(embedding_fingerprint=FINGERPRINT,
+                           shard_index=index)
+    index.close()
+
+
+def candidate(candidate_id: str) -> Candidate:
+    return Candidate(candidate_id, f'resume of {candidate_id}',
+                     candidate_id=candidate_id)
+
+
+def in_process_top_k(storage: CandidateStorage, embedding: np.ndarray, k: int,
+                     candidate_ids=None):
+    """Reference ranking: cosine similarity over the storage matrix"""
+    ids = storage.find_ids() if candidate_ids is None else [
+        candidate_id for candidate_id in candidate_ids
+        if storage.get_by_id(candidate_id) is not None
+    ]
+    rows = storage.get_embeddings(ids)
+    rows = rows / np.linalg.norm(rows, axis=1, keepdims=True)
+    similarities = rows @ (embedding / np.linalg.norm(embedding))
+    matches = sorted(zip(ids, similarities.tolist()),
+                     key=lambda match: (-match[1], match[0]))
+    return matches[:k]
+
+
+def assert_same_matches(storage, rng, k=10, candidate_ids=None):
+    embedding = rng.normal(size=32).astype(np.float32)
+    sharded = storage.shard_index.top_k(FINGERPRINT, embedding, k,
+                                        candidate_ids)
+    expected = in_process_top_k(storage, embedding, k, candidate_ids)
+    assert [candidate_id for candidate_id, _ in sharded] == \
+        [candidate_id for candidate_id, _ in expected]
+    np.testing.assert_allclose([score for _, score in sharded],
+                               [score for _, score in expected],
+                               rtol=1e-5, atol=1e-6)
+
+
+def test_sharded_top_k_matches_in_process_scoring(storage):
+    rng = np.random.default_rng(0)
+    ids = [f'c{index}' for index in range(300)]
+    storage.add_candidates([candidate(candidate_id) for candidate_id in ids],
+                           embeddings=rng.normal(size=(300, 32)))
+    assert storage.shard_index.count() == 300
+    for _ in range(5):
+        assert_same_matches(storage, rng)
+
+    # Tombstones, enough of them to compact the storage and the shards
+    storage.delete_by_ids(ids[::2])
+    storage.delete_by_id('c1')
+    # Replacements move a candidate to a new row with a new embedding
+    replaced = ids[3:60:2]
+    storage.add_candidates(
+        [candidate(candidate_id) for candidate_id in replaced],
+        embeddings=rng.normal(size=(len(replaced), 32)))
+    # Deleted ids added again
+    storage.add_candidates([candidate('c0'), candidate('c2')],
+                           embeddings=rng.normal(size=(2, 32)))
+
+    assert storage.shard_index.count() == storage.count()
+    for _ in range(5):
+        assert_same_matches(storage, rng)
+        assert_same_matches(storage, rng, k=storage.count() + 5)
+    # Filtered subsets, with ids deleted meanwhile and unknown ones
+    subset = list(rng.choice(ids, 80, replace=False)) + ['unknown']
+    for _ in range(5):
+        assert_same_matches(storage, rng, k=7, candidate_ids=subset)
+
+    storage.clear_all()
+    storage.add_candidates([candidate('c5')], embeddings=rng.normal(size=(1, 32)))
+    assert_same_matches(storage, rng)